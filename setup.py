@@ -51,6 +51,7 @@ setup(name='shepherd',
           'docs': ['sphinx>=2.0', 'autoapi>=1.4', 'sphinx-argparse',
                    'sphinx-autodoc-typehints', 'sphinx-bootstrap-theme'],
           'tests': tests_require,
+          'zstd': ['zstandard'],
       },
       entry_points={
           'console_scripts': [
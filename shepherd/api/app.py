@@ -48,16 +48,22 @@ async def middleware_log_on_request(request: web.Request, handler: web.RequestHa
 
     async def get_request_arguments(request: web.Request) -> dict:
 
-        def optimize_json_info(json: dict, max_chars_amount=100) -> dict:
+        def optimize_json_info(json: dict, max_chars_amount=100, max_items_amount=10) -> dict:
             for key in json:
                 if isinstance(json[key], str) and len(json[key]) >= max_chars_amount:
                     json[key] = '<HIDDEN BIG TEXT>'
+                elif isinstance(json[key], list) and len(json[key]) >= max_items_amount:
+                    json[key] = f'<{len(json[key])} ITEMS>'
                 elif isinstance(json[key], dict):
                     # optimize recursively all dicts inside the dict
                     optimize_json_info(json[key])
             return json
 
-        return optimize_json_info(await request.json()) if await request.text() else {}
+        # other bodies (e.g. uploaded files) are not logged, so that they can be streamed without being buffered
+        if request.content_type != 'application/json' or not await request.text():
+            return {}
+
+        return optimize_json_info(await request.json())
 
     def get_response_body(response) -> str:
         if not hasattr(response, "text"):
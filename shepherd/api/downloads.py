@@ -0,0 +1,151 @@
+import re
+import abc
+from typing import Optional, BinaryIO, Union, NamedTuple, Mapping, Tuple
+
+
+class AsyncStream(metaclass=abc.ABCMeta):
+    """
+    An asynchronous stream of a downloaded content (e.g. the body of an HTTP response from a remote storage).
+    """
+
+    @abc.abstractmethod
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Read up to ``size`` bytes (all the remaining bytes if negative).
+
+        :param size: maximum number of bytes to read
+        :return: the data (empty at the end of the stream)
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """
+        Release the resources held by the stream (the rest of the content is discarded).
+        """
+
+
+class FileDownload(NamedTuple):
+    """A (possibly partial) content of a stored file together with the HTTP status and headers describing it."""
+    stream: Optional[Union[AsyncStream, BinaryIO]]
+    """The content (None if there is no content, e.g. for 304 Not Modified). It must be closed after use."""
+    status: int
+    """HTTP status of the download (200, 206, 304 or 416)."""
+    headers: Mapping[str, str]
+    """HTTP headers describing the content (e.g. ``ETag``, ``Last-Modified``, ``Content-Range``)."""
+    path: Optional[str] = None
+    """Path to a local file with the whole content, which is sent with ``sendfile`` instead of a stream."""
+
+
+DOWNLOAD_REQUEST_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+"""Request headers that control conditional and partial downloads."""
+
+DOWNLOAD_RESPONSE_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified")
+"""Response headers that describe the downloaded content."""
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+"""Pattern of a single byte range in the Range header."""
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header with a single byte range. Invalid headers are ignored (RFC 9110, section 14.2).
+
+    >>> _parse_range('bytes=0-9', 100)
+    (0, 10)
+    >>> _parse_range('bytes=90-', 100)
+    (90, 100)
+    >>> _parse_range('bytes=-5', 100)
+    (95, 100)
+    >>> _parse_range('bytes=0-1,5-6', 100) is None
+    True
+    >>> _parse_range('bytes=5-3', 100) is None
+    True
+
+    :param range_header: value of the Range header
+    :param size: size of the requested file
+    :raise ValueError: if the range is valid but cannot be satisfied (it starts beyond the end of the file)
+    :return: a tuple (start, stop) or None if the header is invalid or not supported (and should be ignored)
+    """
+
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+
+    start, end = match.groups()
+
+    if start == '':
+        if int(end) == 0 or size == 0:
+            raise ValueError(f'Range `{range_header}` cannot be satisfied')
+
+        return max(size - int(end), 0), size
+
+    if end and int(end) < int(start):
+        return None
+
+    if int(start) >= size:
+        raise ValueError(f'Range `{range_header}` cannot be satisfied')
+
+    return int(start), min(int(end) + 1, size) if end else size
+
+
+class _BoundedReader:
+    """A read-only view of the first ``length`` bytes (from the current position) of a binary stream."""
+
+    def __init__(self, stream: BinaryIO, length: int):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+def make_file_download(stream: BinaryIO, size: int, etag: str,
+                       headers: Optional[Mapping[str, str]] = None) -> FileDownload:
+    """
+    Evaluate the conditional and range request headers against a locally available file.
+
+    Only single byte ranges and ETag conditions are supported.
+
+    :param stream: seekable stream with the whole file content (it is closed when no content is to be sent)
+    :param size: size of the file
+    :param etag: quoted entity tag of the file
+    :param headers: request headers of the download (see :py:data:`DOWNLOAD_REQUEST_HEADERS`)
+    :return: the download
+    """
+
+    headers = headers or {}
+    response_headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None and (if_none_match.strip() == "*" or
+                                      etag in map(str.strip, if_none_match.split(","))):
+        stream.close()
+        return FileDownload(None, 304, response_headers)
+
+    byte_range = None
+    if "Range" in headers and headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = _parse_range(headers["Range"], size)
+        except ValueError:
+            stream.close()
+            response_headers["Content-Range"] = f"bytes */{size}"
+            return FileDownload(None, 416, response_headers)
+
+    if byte_range is None:
+        response_headers["Content-Length"] = str(size)
+        return FileDownload(stream, 200, response_headers)
+
+    start, stop = byte_range
+    response_headers["Content-Length"] = str(stop - start)
+    response_headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    stream.seek(start)
+
+    return FileDownload(_BoundedReader(stream, stop - start), 206, response_headers)
@@ -4,7 +4,7 @@ from datetime import datetime
 
 from apistrap.examples import ModelExample, ExamplesMixin
 from schematics import Model
-from schematics.types import StringType, BooleanType, ModelType, UUIDType, DateTimeType
+from schematics.types import StringType, BooleanType, ModelType, UUIDType, DateTimeType, FloatType
 
 
 class ModelModel(Model):
@@ -33,6 +33,16 @@ class ErrorModel(Model):
     exception_traceback: str = StringType(required=False)
 
 
+class JobProgressModel(Model):
+    """
+    Progress of a job reported by the runner.
+    """
+    percent: Optional[float] = FloatType(required=False)
+    stage: Optional[str] = StringType(required=False)
+    eta: Optional[float] = FloatType(required=False)
+    reported_at: datetime = DateTimeType(required=True)
+
+
 class JobStatus:
     """
     Used as an enum class that represents all possible states of a job.
@@ -57,6 +67,8 @@ class JobStatusModel(Model, ExamplesMixin):
     enqueued_at: datetime = DateTimeType(required=False)
     processing_started_at: datetime = DateTimeType(required=False)
     finished_at: datetime = DateTimeType(required=False)
+    progress: Optional[JobProgressModel] = ModelType(JobProgressModel, required=False, default=None)
+    callback_url: Optional[str] = StringType(required=False)  # notified when the job is done or failed
 
     def copy(self) -> 'JobStatusModel':
         """
@@ -1,5 +1,7 @@
 from schematics import Model
-from schematics.types import StringType, ModelType
+from typing import List
+
+from schematics.types import StringType, ModelType, ListType, FloatType, URLType
 
 from shepherd.api.models import ModelModel
 
@@ -9,3 +11,18 @@ class StartJobRequest(Model):
     sheep_id: str = StringType(default=None)
     model: ModelModel = ModelType(ModelModel, required=True)
     payload: str = StringType(required=False)
+    callback_url: str = URLType(required=False)  # the final job status is POSTed here when the job is done or failed
+    timeout: float = FloatType(required=False, min_value=0)  # the job fails if its processing takes longer (seconds)
+
+
+class BatchStartJobRequest(Model):
+    jobs: List[StartJobRequest] = ListType(ModelType(StartJobRequest), required=True, min_size=1)
+
+
+class JobIdsRequest(Model):
+    job_ids: List[str] = ListType(StringType(), required=True, min_size=1)
+
+
+class WaitJobsRequest(JobIdsRequest):
+    mode: str = StringType(default="all", choices=["any", "all"])  # wait for any or all of the jobs to finish
+    timeout: float = FloatType(default=60, min_value=0, max_value=3600)  # maximum waiting time in seconds
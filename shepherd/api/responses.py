@@ -1,9 +1,9 @@
-from typing import Dict
+from typing import Dict, List, Optional
 
 from apistrap.examples import ModelExample, ExamplesMixin
 from apistrap.schemas import ErrorResponse
 from schematics import Model
-from schematics.types import BooleanType, DictType, ModelType
+from schematics.types import BooleanType, DictType, ModelType, ListType, StringType
 
 from .models import SheepModel, JobStatusModel
 
@@ -40,6 +40,30 @@ class StartJobResponse(Model):
     success: bool = BooleanType(default=True, required=True)
 
 
+class StartJobResult(Model):
+    job_id: str = StringType(required=True)
+    success: bool = BooleanType(required=True)
+    message: Optional[str] = StringType(required=False)  # the reason why the job could not be started
+
+
+class BatchStartJobResponse(Model):
+    jobs: List[StartJobResult] = ListType(ModelType(StartJobResult), required=True)
+
+
+class BulkJobStatusResponse(Model):
+    statuses: Dict[str, JobStatusModel] = DictType(ModelType(JobStatusModel), required=True)
+    unknown: List[str] = ListType(StringType(), required=True)  # ids of jobs that are not known to the shepherd
+
+
+class WaitJobsResponse(BulkJobStatusResponse):
+    finished: List[str] = ListType(StringType(), required=True)  # ids of the jobs that are done or failed
+    timed_out: bool = BooleanType(required=True)
+
+
+class UploadInputResponse(Model):
+    success: bool = BooleanType(default=True, required=True)
+
+
 JobStatusResponse = JobStatusModel
 
 
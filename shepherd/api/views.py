@@ -1,17 +1,25 @@
-from aiohttp import web
+from aiohttp import web, BodyPartReader
 from apistrap.types import FileResponse
 from io import BytesIO
 
+import json
+import asyncio
+import hashlib
 import mimetypes
+from typing import AsyncIterable, Iterable, Dict, Set, Tuple
+
+from schematics.exceptions import BaseError as SchematicsError
 
 from ..storage import Storage
 from ..constants import DEFAULT_OUTPUT_FILE, OUTPUT_DIR, DEFAULT_PAYLOAD_PATH, DEFAULT_PAYLOAD_FILE, INPUT_DIR
-from ..api.models import JobStatus
+from ..api.models import JobStatus, JobStatusModel
 from ..shepherd import Shepherd
-from .requests import StartJobRequest
+from .downloads import FileDownload, AsyncStream
+from .requests import StartJobRequest, BatchStartJobRequest, JobIdsRequest, WaitJobsRequest
 from .responses import StartJobResponse, StatusResponse, JobStatusResponse, ErrorResponse, \
-    JobErrorResponse, JobNotReadyResponse
-from ..errors.api import UnknownJobError, NameConflictError
+    JobErrorResponse, JobNotReadyResponse, UploadInputResponse, BatchStartJobResponse, StartJobResult, \
+    BulkJobStatusResponse, WaitJobsResponse
+from ..errors.api import UnknownJobError, NameConflictError, ApiClientError, ApiServerError, UnknownSheepError
 from .openapi import oapi
 
 
@@ -26,6 +34,205 @@ async def check_job_dir_exists(storage: Storage, job_id: str) -> None:
         raise UnknownJobError('Data for job `{}` does not exist'.format(job_id))
 
 
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+"""Size of chunks in which uploaded files are read from requests."""
+
+_BATCH_CONCURRENCY = 16
+"""Maximum number of jobs from a single batch whose data are prepared in the storage concurrently."""
+
+_STATUS_CONCURRENCY = 32
+"""Maximum number of concurrent storage requests when querying status of multiple jobs."""
+
+_EVENT_STREAM_KEEPALIVE = 15
+"""Interval (in seconds) in which keep-alive comments are sent to idle event stream clients."""
+
+_MULTIPART_JOB_FIELDS = ("model", "sheep_id", "callback_url", "timeout")
+"""Names of the ``multipart/form-data`` fields that specify a job started with uploaded inputs."""
+
+
+async def prepare_job_data(storage: Storage, start_job_request: StartJobRequest) -> None:
+    """
+    Create the job dir/bucket and store the job payload, or check that the job dir exists if there is no payload.
+
+    :param storage: a storage adapter
+    :param start_job_request: the job specification
+    :raises NameConflictError: a job with given id was already submitted
+    :raises UnknownJobError: the job has no payload and its dir/bucket does not exist
+    """
+    if not start_job_request.payload:
+        await check_job_dir_exists(storage, start_job_request.job_id)
+    else:
+        await storage.init_job(start_job_request.job_id)
+
+        payload_data = start_job_request.payload.encode()
+        await storage.put_file(start_job_request.job_id, DEFAULT_PAYLOAD_PATH,
+                               BytesIO(payload_data), len(payload_data))
+
+
+async def init_unsubmitted_job(shepherd: Shepherd, storage: Storage, job_id: str) -> None:
+    """
+    Create the job dir/bucket. An existing one is accepted as long as the job was not submitted yet (i.e., it has no
+    status), so that interrupted uploads can be retried.
+
+    :param shepherd: the shepherd
+    :param storage: a storage adapter
+    :param job_id: an identifier of the job
+    :raises NameConflictError: the job was already submitted
+    """
+    try:
+        await storage.init_job(job_id)
+    except NameConflictError:
+        if shepherd.get_job_status(job_id) is not None:
+            raise
+
+        try:
+            await storage.get_job_status(job_id)
+        except UnknownJobError:
+            pass
+        else:
+            raise
+
+
+async def get_job_statuses(shepherd: Shepherd, storage: Storage,
+                           job_ids: Iterable[str]) -> Tuple[Dict[str, JobStatusModel], Set[str]]:
+    """
+    Get status information for multiple jobs. The local state of the shepherd is checked first, the remaining jobs
+    are queried in the storage concurrently.
+
+    :param shepherd: the shepherd
+    :param storage: a storage adapter
+    :param job_ids: identifiers of the queried jobs
+    :return: a tuple (statuses of the known jobs, ids of the unknown jobs)
+    """
+    statuses = {}
+    remote_job_ids = []
+
+    for job_id in job_ids:
+        status = shepherd.get_job_status(job_id)
+        if status is not None:
+            statuses[job_id] = status
+        else:
+            remote_job_ids.append(job_id)
+
+    semaphore = asyncio.Semaphore(_STATUS_CONCURRENCY)
+
+    async def get_remote_status(job_id: str):
+        async with semaphore:
+            try:
+                return await storage.get_job_status(job_id)
+            except UnknownJobError:
+                return None
+
+    remote_statuses = await asyncio.gather(*map(get_remote_status, remote_job_ids))
+    statuses.update((job_id, status) for job_id, status in zip(remote_job_ids, remote_statuses) if status is not None)
+
+    return statuses, set(remote_job_ids) - statuses.keys()
+
+
+def check_input_path(input_path: str) -> str:
+    """
+    Check that an input file path supplied by a client stays inside the inputs folder.
+
+    >>> check_input_path('images/1.png')
+    'images/1.png'
+
+    :param input_path: a relative path (with ``/`` as the separator)
+    :raise ApiClientError: if the path is empty, absolute or contains ``.``/``..`` segments
+    :return: the checked path
+    """
+    segments = input_path.split("/")
+
+    if not input_path or any(segment in ("", ".", "..") for segment in segments):
+        raise ApiClientError("Invalid input file path `{}`".format(input_path))
+
+    return input_path
+
+
+async def iter_body_part(part: BodyPartReader) -> AsyncIterable[bytes]:
+    """
+    Read a part of a multipart request in chunks.
+
+    :param part: the part to be read
+    """
+    while True:
+        chunk = await part.read_chunk(_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def send_file_download(request: web.Request, download: FileDownload, mimetype: str) -> web.StreamResponse:
+    """
+    Stream a (possibly partial or conditional) file download to the client, including its status and headers.
+    Local files are sent with ``sendfile``, the reads of other synchronous streams are done in an executor.
+
+    :param request: the request being handled
+    :param download: the download obtained from the storage
+    :param mimetype: MIME type of the file
+    :return: a prepared response (or a file response to be prepared by the framework)
+    """
+    if download.path is not None:
+        return web.FileResponse(download.path, headers={"ETag": download.headers["ETag"], "Content-Type": mimetype})
+
+    loop = asyncio.get_event_loop()
+    response = web.StreamResponse(status=download.status, headers=download.headers)
+
+    if download.stream is not None:
+        response.content_type = mimetype
+
+    try:
+        await response.prepare(request)
+
+        if download.stream is not None:
+            is_async = isinstance(download.stream, AsyncStream)
+
+            while True:
+                if is_async:
+                    chunk = await download.stream.read(64 * 1024)
+                else:
+                    chunk = await loop.run_in_executor(None, download.stream.read, 64 * 1024)
+
+                if not chunk:
+                    break
+
+                await response.write(chunk)
+    finally:
+        if download.stream is not None:
+            download.stream.close()
+
+    await response.write_eof()
+
+    return response
+
+
+def format_status_events(transitions: Iterable[Tuple[str, JobStatusModel]]) -> bytes:
+    """
+    Format job status transitions as server-sent events.
+
+    :param transitions: tuples (job id, status)
+    :return: the encoded events
+    """
+    return "".join("event: status\ndata: {}\n\n".format(json.dumps({"job_id": job_id, "status": status.to_primitive()}))
+                   for job_id, status in transitions).encode()
+
+
+def job_status_response(request: web.Request, status: JobStatusModel) -> web.Response:
+    """
+    Serialize job status with an ETag, or respond with 304 Not Modified if the client already has the same status.
+
+    :param request: the request being handled
+    :param status: the job status
+    :return: a response with the serialized status
+    """
+    body = json.dumps(status.to_primitive())
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+    if etag in map(str.strip, request.headers.get("If-None-Match", "").split(",")):
+        return web.Response(status=304, headers={"ETag": etag})
+
+    return web.Response(text=body, content_type="application/json", headers={"ETag": etag})
+
+
 def create_shepherd_routes(shepherd: Shepherd, storage: Storage) -> web.RouteTableDef:
     """
     Create shepherd API endpoint handlers.
@@ -45,37 +252,245 @@ def create_shepherd_routes(shepherd: Shepherd, storage: Storage) -> web.RouteTab
         Start a new job.
 
         :raises NameConflictError: a job with given id was already submitted
+        :raises UnknownSheepError: the requested sheep does not exist
         """
-        if not start_job_request.payload:
-            await check_job_dir_exists(storage, start_job_request.job_id)
-        else:
-            await storage.init_job(start_job_request.job_id)
+        shepherd.check_sheep_id(start_job_request.sheep_id)
+        await prepare_job_data(storage, start_job_request)
+        await shepherd.enqueue_job(start_job_request.job_id, start_job_request.model, start_job_request.sheep_id,
+                                   start_job_request.callback_url, start_job_request.timeout)
+
+        return StartJobResponse()
+
+    @api.post('/jobs/batch')
+    @oapi.accepts(BatchStartJobRequest)
+    @oapi.responds_with(BatchStartJobResponse)
+    async def start_jobs(batch_request: BatchStartJobRequest):
+        """
+        Start multiple jobs at once. The job data are prepared concurrently and the successfully prepared jobs are
+        en-queued together. The result of each job is reported separately (e.g. a job requesting an unknown sheep
+        fails without its data being prepared). A job id repeated in the batch is reported as a name conflict.
+        """
+        semaphore = asyncio.Semaphore(_BATCH_CONCURRENCY)
+        seen_job_ids = set()
+        duplicates = []
+        for job in batch_request.jobs:
+            duplicates.append(job.job_id in seen_job_ids)
+            seen_job_ids.add(job.job_id)
+
+        async def prepare(start_job_request: StartJobRequest, duplicate: bool) -> StartJobResult:
+            async with semaphore:
+                try:
+                    if duplicate:
+                        raise NameConflictError("A job with this ID is already specified in the batch")
+
+                    shepherd.check_sheep_id(start_job_request.sheep_id)
+                    await prepare_job_data(storage, start_job_request)
+                except (ApiClientError, ApiServerError) as error:
+                    return StartJobResult(dict(job_id=start_job_request.job_id, success=False, message=str(error)))
+
+            return StartJobResult(dict(job_id=start_job_request.job_id, success=True))
+
+        results = await asyncio.gather(*map(prepare, batch_request.jobs, duplicates))
+
+        await shepherd.enqueue_jobs([(job.job_id, job.model, job.sheep_id, job.callback_url, job.timeout)
+                                     for job, result in zip(batch_request.jobs, results) if result.success])
+
+        return BatchStartJobResponse(dict(jobs=results))
+
+    @api.post('/jobs/{job_id}/start')
+    @oapi.responds_with(StartJobResponse)
+    async def start_job_multipart(job_id: str, request: web.Request):
+        """
+        Start a new job with inputs uploaded as ``multipart/form-data``. Each file part is streamed to the storage
+        as an input file named after the part file name. The ``model`` field (a JSON object with the model ``name``
+        and ``version``) is required, the ``sheep_id``, ``callback_url`` and ``timeout`` fields are optional (see
+        ``/start-job``). The fields must precede the file parts, so that the job is validated before any input is
+        stored. A failed upload can be retried with the same job id.
+
+        :param job_id: An identifier of the new job
+        :raises NameConflictError: a job with given id was already submitted
+        :raises UnknownSheepError: the requested sheep does not exist
+        """
+        if request.content_type != "multipart/form-data":
+            raise ApiClientError("The request body must be multipart/form-data")
+
+        fields = dict(job_id=job_id)
+        start_job_request = None
+        reader = await request.multipart()
+
+        async def init_job() -> StartJobRequest:
+            if "model" not in fields:
+                raise ApiClientError("Missing `model` field (it must precede the file parts)")
+
+            try:
+                job_request = StartJobRequest(fields)
+                job_request.validate()
+            except SchematicsError as error:
+                raise ApiClientError(f"Invalid job specification: {error}") from error
+
+            shepherd.check_sheep_id(job_request.sheep_id)
+            await init_unsubmitted_job(shepherd, storage, job_id)
 
-            payload_data = start_job_request.payload.encode()
-            payload = BytesIO(payload_data)
-            await storage.put_file(start_job_request.job_id, DEFAULT_PAYLOAD_PATH,
-                                   payload, len(start_job_request.payload))
+            return job_request
 
-        await shepherd.enqueue_job(start_job_request.job_id, start_job_request.model, start_job_request.sheep_id)
+        while True:
+            part = await reader.next()
+            if part is None:
+                break
+
+            if part.filename:
+                input_path = INPUT_DIR + "/" + check_input_path(part.filename)
+
+                if start_job_request is None:
+                    start_job_request = await init_job()
+
+                await storage.put_file_stream(job_id, input_path, iter_body_part(part))
+            elif part.name in _MULTIPART_JOB_FIELDS:
+                if start_job_request is not None:
+                    raise ApiClientError(f"The `{part.name}` field must precede the file parts")
+
+                fields[part.name] = await part.text()
+
+                if part.name == "model":
+                    try:
+                        fields["model"] = json.loads(fields["model"])
+                    except ValueError as error:
+                        raise ApiClientError("Invalid `model` field") from error
+
+        if start_job_request is None:
+            start_job_request = await init_job()
+
+        await shepherd.enqueue_job(job_id, start_job_request.model, start_job_request.sheep_id,
+                                   start_job_request.callback_url, start_job_request.timeout)
 
         return StartJobResponse()
 
+    @api.put('/jobs/{job_id}/inputs/{input_path:.+}')
+    @oapi.responds_with(UploadInputResponse)
+    async def upload_input(job_id: str, input_path: str, request: web.Request):
+        """
+        Upload an input file of a job (the raw request body is streamed to the storage).
+        The job directory is created if it does not exist yet, the job can be started with ``/start-job`` afterwards.
+
+        :param job_id: An identifier of the job
+        :param input_path: Path of the file in the inputs folder
+        :raises NameConflictError: the job was already submitted (its inputs cannot be changed)
+        """
+        input_path = INPUT_DIR + "/" + check_input_path(input_path)
+        await init_unsubmitted_job(shepherd, storage, job_id)
+
+        await storage.put_file_stream(job_id, input_path, request.content.iter_chunked(_UPLOAD_CHUNK_SIZE),
+                                      request.content_length)
+
+        return UploadInputResponse()
+
     @api.get("/jobs/{job_id}/status")
     @oapi.responds_with(JobStatusResponse)
-    async def get_job_status(job_id: str):
+    async def get_job_status(job_id: str, request: web.Request):
         """
-        Get status information for a job.
+        Get status information for a job. Supports conditional requests with ``If-None-Match``.
 
         :param job_id: An identifier of the queried job
         """
 
         status = shepherd.get_job_status(job_id)
-        if status is not None:
-            return status
+        if status is None:
+            status = await storage.get_job_status(job_id)
 
-        status = await storage.get_job_status(job_id)
+        response = job_status_response(request, status)
+        return response, response.status
+
+    @api.post("/jobs/status")
+    @oapi.accepts(JobIdsRequest)
+    @oapi.responds_with(BulkJobStatusResponse)
+    async def get_job_statuses_bulk(job_ids_request: JobIdsRequest):
+        """
+        Get status information for multiple jobs.
+        """
+
+        statuses, unknown = await get_job_statuses(shepherd, storage, set(job_ids_request.job_ids))
+
+        return BulkJobStatusResponse(dict(statuses=statuses, unknown=sorted(unknown)))
+
+    @api.post("/jobs/wait")
+    @oapi.accepts(WaitJobsRequest)
+    @oapi.responds_with(WaitJobsResponse)
+    async def wait_jobs(wait_request: WaitJobsRequest):
+        """
+        Wait until any or all (depending on ``mode``) of the specified jobs are finished or the timeout expires.
+        Unknown jobs are reported and not waited for.
+        """
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + wait_request.timeout
+        pending = set(wait_request.job_ids)
+        statuses = {}
+        unknown = set()
+        finished = set()
+        timed_out = False
+
+        while True:
+            # jobs running on this shepherd are removed from its local state when they finish
+            local = {job_id for job_id in pending if shepherd.get_job_status(job_id) is not None}
+
+            # only the jobs which were not finished yet need to be checked again (without holding the condition)
+            pending_statuses, pending_unknown = await get_job_statuses(shepherd, storage, pending)
+            statuses.update(pending_statuses)
+            unknown |= pending_unknown
+            finished |= {job_id for job_id, status in pending_statuses.items()
+                         if status.status in (JobStatus.DONE, JobStatus.FAILED)}
+            pending -= finished | unknown
+
+            if not pending or (wait_request.mode == "any" and finished):
+                break
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                timed_out = True
+                break
+
+            async with shepherd.job_done_condition:
+                # a job that finished while the statuses were queried would not wake us up
+                if all(shepherd.get_job_status(job_id) is not None for job_id in local & pending):
+                    try:
+                        await asyncio.wait_for(shepherd.job_done_condition.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+        return WaitJobsResponse(dict(statuses=statuses, unknown=sorted(unknown), finished=sorted(finished),
+                                     timed_out=timed_out))
+
+    @api.get("/jobs/events")
+    @oapi.accepts_qs("job_ids")
+    async def stream_job_events(request: web.Request, job_ids: str = None):
+        """
+        Stream job status transitions as server-sent events (``status`` events with a JSON object containing
+        the ``job_id`` and its new ``status``). If comma-separated ``job_ids`` are specified, only transitions of these
+        jobs are streamed and their current statuses are sent first. Otherwise, transitions of all jobs are streamed.
+
+        :param job_ids: Comma-separated identifiers of the jobs of interest
+        """
+
+        subscribed_job_ids = set(filter(None, job_ids.split(","))) if job_ids else None
+        subscription = shepherd.status_feed.subscribe(subscribed_job_ids)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+
+        try:
+            await response.prepare(request)
 
-        return status
+            if subscribed_job_ids:
+                statuses, _ = await get_job_statuses(shepherd, storage, subscribed_job_ids)
+                await response.write(format_status_events(statuses.items()))
+
+            while True:
+                transitions = await subscription.get(_EVENT_STREAM_KEEPALIVE)
+                await response.write(format_status_events(transitions) if transitions else b": keep-alive\n\n")
+        except ConnectionResetError:
+            pass  # the client disconnected
+        finally:
+            subscription.close()
+
+        return response
 
     @api.get("/jobs/{job_id}/wait_ready")
     @oapi.responds_with(JobStatusResponse)
@@ -99,14 +514,22 @@ def create_shepherd_routes(shepherd: Shepherd, storage: Storage) -> web.RouteTab
     @oapi.responds_with(ErrorResponse, code=404)
     @oapi.responds_with(JobErrorResponse, code=500)
     @oapi.responds_with(FileResponse, code=200)
-    async def get_job_result(job_id: str, result_file: str = DEFAULT_OUTPUT_FILE):
+    async def get_job_result(job_id: str, request: web.Request, result_file: str = DEFAULT_OUTPUT_FILE):
         """
-        Get the result of the specified job.
+        Get the result of the specified job. Supports range and conditional requests.
 
         :param job_id: An identifier of the job
         :param result_file: Name of the requested file
         """
 
+        output_path = OUTPUT_DIR + "/" + result_file
+        mime = mimetypes.guess_type(result_file)[0] or "application/octet-stream"
+
+        # outputs are cached only when the job is done, so neither the job status nor the storage have to be checked
+        cached_output = shepherd.get_cached_output(job_id, output_path, request.headers)
+        if cached_output is not None:
+            return await send_file_download(request, cached_output, mime)
+
         await check_job_dir_exists(storage, job_id)
         status = await storage.get_job_status(job_id)
 
@@ -116,21 +539,24 @@ def create_shepherd_routes(shepherd: Shepherd, storage: Storage) -> web.RouteTab
         if status is None or status.status != JobStatus.DONE:
             return JobNotReadyResponse()
 
-        output_path = OUTPUT_DIR + "/" + result_file
-        output = await storage.get_file(job_id, output_path)
+        # large outputs may be downloaded directly from the storage (apistrap needs the status code of raw responses)
+        download_url = await storage.get_file_url(job_id, output_path)
+        if download_url is not None:
+            return web.HTTPTemporaryRedirect(download_url), 307
+
+        output = await storage.download_file(job_id, output_path, request.headers)
         if output is None:
             return ErrorResponse(dict(message="Requested file does not exist"))
 
-        mime = mimetypes.guess_type(result_file)[0] or "application/octet-stream"
-        return FileResponse(output, mimetype=mime)
+        return await send_file_download(request, output, mime)
 
     @api.get("/jobs/{job_id}/input/{input_file}")
     @api.get("/jobs/{job_id}/input")
     @oapi.responds_with(ErrorResponse, code=404)
     @oapi.responds_with(FileResponse, code=200)
-    async def get_job_input(job_id: str, input_file: str = DEFAULT_PAYLOAD_FILE):
+    async def get_job_input(job_id: str, request: web.Request, input_file: str = DEFAULT_PAYLOAD_FILE):
         """
-        Get the input of the specified job.
+        Get the input of the specified job. Supports range and conditional requests.
 
         :param job_id: An identifier of the job
         :param result_file: Name of the requested file
@@ -139,12 +565,17 @@ def create_shepherd_routes(shepherd: Shepherd, storage: Storage) -> web.RouteTab
         await check_job_dir_exists(storage, job_id)
 
         input_path = INPUT_DIR + "/" + input_file
-        input = await storage.get_file(job_id, input_path)
+
+        download_url = await storage.get_file_url(job_id, input_path)
+        if download_url is not None:
+            return web.HTTPTemporaryRedirect(download_url), 307
+
+        input = await storage.download_file(job_id, input_path, request.headers)
         if input is None:
             return ErrorResponse(dict(message="Requested file does not exist"))
 
         mime = mimetypes.guess_type(input_file)[0] or "application/octet-stream"
-        return FileResponse(input, mimetype=mime)
+        return await send_file_download(request, input, mime)
 
     @api.get('/status')
     @oapi.responds_with(StatusResponse)
@@ -2,4 +2,5 @@
 from .messages import *
 from .messenger import Messenger
 
-__all__ = ['Message', 'InputMessage', 'DoneMessage', 'ErrorMessage', 'Messenger']
+__all__ = ['Message', 'InputMessage', 'DoneMessage', 'ErrorMessage', 'ProgressMessage', 'OutputMessage',
+           'ManifestEntry', 'Messenger']
@@ -1,7 +1,7 @@
 import json
 import sys, inspect
 from schematics import Model
-from schematics.types import StringType, serializable, PolyModelType
+from schematics.types import StringType, IntType, FloatType, ListType, ModelType, serializable, PolyModelType
 from typing import Iterable, Optional
 
 
@@ -39,9 +39,27 @@ class InputMessage(Message):
     """Job data root (with ``inputs`` and ``outputs`` folders)."""
 
 
+class ManifestEntry(Model):
+    """A file in the outputs of a job."""
+
+    path = StringType(required=True)
+    """Path of the file relative to the outputs folder (with ``/`` separators)."""
+
+    size = IntType(required=True, min_value=0)
+    """Size of the file in bytes."""
+
+    md5 = StringType()
+    """Hex MD5 digest of the file (if computed by the runner)."""
+
+
 class DoneMessage(Message):
     """Message informing :py:class:`shepherd.shepherd.Shepherd` about a finished job."""
-    pass
+
+    manifest = ListType(ModelType(ManifestEntry))
+    """Files in the outputs of the job (if listed by the runner)."""
+
+    rss = IntType()
+    """Resident set size of the runner (in bytes) after the job was processed (if known)."""
 
 
 class ErrorMessage(Message):
@@ -56,6 +74,29 @@ class ErrorMessage(Message):
     exception_traceback = StringType()
     """Exception traceback (where applicable)."""
 
+    rss = IntType()
+    """Resident set size of the runner (in bytes) after the job was processed (if known)."""
+
+
+class OutputMessage(Message):
+    """Message informing :py:class:`shepherd.shepherd.Shepherd` about output files finished before the job is done."""
+
+    files = ListType(ModelType(ManifestEntry))
+    """The finished output files (which are not going to be modified anymore)."""
+
+
+class ProgressMessage(Message):
+    """Message informing :py:class:`shepherd.shepherd.Shepherd` that a job is still being processed."""
+
+    percent = FloatType(min_value=0, max_value=100)
+    """Percentage of the job done (if reported by the runner)."""
+
+    stage = StringType()
+    """Human-readable name of the current processing stage (if reported by the runner)."""
+
+    eta = FloatType(min_value=0)
+    """Estimated time (in seconds) until the job is done (if reported by the runner)."""
+
 
 class MessageWrapper(Model):
     """Message wrapper allowing simple en/de-coding."""
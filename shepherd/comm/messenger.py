@@ -38,7 +38,8 @@ class Messenger:
 
     @staticmethod
     async def recv(socket: zmq.asyncio.Socket, expected_message_types: Optional[Sequence[type]]=None,
-                   noblock: bool=False) -> Union[InputMessage, DoneMessage, ErrorMessage]:
+                   noblock: bool=False) -> Union[InputMessage, DoneMessage, ErrorMessage, ProgressMessage,
+                                                       OutputMessage]:
         """
 
         Receive, decode and return a message from the given socket.
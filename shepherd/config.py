@@ -5,7 +5,8 @@ from typing import Optional, Dict, Any
 
 import ruamel.yaml
 from schematics import Model
-from schematics.types import ModelType, DictType, StringType, BaseType
+from schematics.exceptions import ValidationError
+from schematics.types import ModelType, DictType, StringType, BaseType, IntType, BooleanType, FloatType
 
 
 def strip_url_scheme(url):
@@ -25,9 +26,26 @@ def strip_url_scheme(url):
 
 
 class StorageConfig(Model):
-    url: str = StringType(required=True)
-    access_key: str = StringType(required=True)
-    secret_key: str = StringType(required=True)
+    type: str = StringType(default="minio", choices=["minio", "memory"])
+    url: Optional[str] = StringType(required=False)
+    access_key: Optional[str] = StringType(required=False)
+    secret_key: Optional[str] = StringType(required=False)
+    byte_budget: Optional[int] = IntType(required=False, min_value=0)  # limit of the in-memory storage size
+    list_max_keys: int = IntType(default=1000, min_value=1, max_value=1000)  # page size of minio bucket listings
+    pack_outputs: bool = BooleanType(default=False)  # pack outputs of all jobs (not only those with packed inputs)
+    keep_packed_output_files: bool = BooleanType(default=False)  # upload packed outputs also as separate objects
+    input_cache_size: Optional[int] = IntType(required=False, min_value=0)  # size of the local input cache in bytes
+    redirect_downloads: bool = BooleanType(default=False)  # redirect file downloads to presigned minio URLs
+    redirect_min_size: int = IntType(default=0, min_value=0)  # smaller files are proxied through shepherd
+    redirect_url_expiry: int = IntType(default=300, min_value=1, max_value=604800)  # validity of presigned URLs
+    public_url: Optional[str] = StringType(required=False)  # minio URL reachable by the clients (defaults to `url`)
+
+    def _validate_minio_field(self, data, value):
+        if data["type"] == "minio" and not value:
+            raise ValidationError("This field is required for the minio storage.")
+        return value
+
+    validate_url = validate_access_key = validate_secret_key = _validate_minio_field
 
     @property
     def schemeless_url(self):
@@ -57,6 +75,27 @@ class LoggingConfig(Model):
         return getattr(logging, self.level.upper())
 
 
+class ResultCacheConfig(Model):
+    ttl: int = IntType(default=3600, min_value=0)  # time (in seconds) after which the cached results expire
+    max_entries: int = IntType(default=10000, min_value=1)  # maximum number of cached results
+
+
+class OutputCacheConfig(Model):
+    memory_size: int = IntType(default=64 * 1024 ** 2, min_value=0)  # size of the memory tier in bytes
+    memory_max_file_size: int = IntType(default=1024 ** 2, min_value=0)  # larger files are cached on the disk only
+    disk_size: int = IntType(default=1024 ** 3, min_value=0)  # size of the disk tier in bytes
+
+
+class WebhookConfig(Model):
+    batch_size: int = IntType(default=100, min_value=1)  # maximum number of notifications sent in a single request
+    batch_delay: float = FloatType(default=0.5, min_value=0)  # time (in seconds) for which notifications accumulate
+    max_connections: int = IntType(default=8, min_value=1)  # maximum number of concurrent requests
+    timeout: float = FloatType(default=10, min_value=0)  # timeout (in seconds) of a single request
+    max_attempts: int = IntType(default=10, min_value=1)  # number of attempts after which a notification is dropped
+    retry_delay: float = FloatType(default=1, min_value=0)  # delay (in seconds) before the first retry
+    max_retry_delay: float = FloatType(default=300, min_value=0)  # maximum delay (in seconds) between retries
+
+
 class ShepherdConfig(Model):
     data_root: str = StringType(required=True)
     storage: StorageConfig = ModelType(StorageConfig, required=True)
@@ -65,6 +104,9 @@ class ShepherdConfig(Model):
                                                                                  logging_directory='../logs')))
     sheep: Dict[str, Dict[str, Any]] = DictType(DictType(BaseType), required=True)
     registry: Optional[RegistryConfig] = ModelType(RegistryConfig, required=False)
+    result_cache: Optional[ResultCacheConfig] = ModelType(ResultCacheConfig, required=False)
+    output_cache: Optional[OutputCacheConfig] = ModelType(OutputCacheConfig, required=False)
+    webhooks: Optional[WebhookConfig] = ModelType(WebhookConfig, required=False)
 
 
 def load_shepherd_config(config_stream) -> ShepherdConfig:
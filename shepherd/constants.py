@@ -32,3 +32,43 @@ DEFAULT_OUTPUT_PATH = OUTPUT_DIR + "/" + DEFAULT_OUTPUT_FILE
 """
 Default path to the output of a runner in a job bucket
 """
+
+INPUT_ARCHIVE = INPUT_DIR + ".tar"
+"""
+Name of an optional tar archive in a job bucket that contains the input data for a runner (packed transfer)
+"""
+
+OUTPUT_ARCHIVE = OUTPUT_DIR + ".tar"
+"""
+Name of an optional tar archive in a job bucket that contains the output data of a runner (packed transfer)
+"""
+
+ZSTD_SUFFIX = ".zst"
+"""
+Suffix of zstd compressed archives
+"""
+
+INPUT_CACHE_DIR = ".input-cache"
+"""
+Name of a folder in the shepherd data root that contains the local cache of job input files
+"""
+
+OUTPUT_CACHE_DIR = ".output-cache"
+"""
+Name of a folder in the shepherd data root that contains the local (disk tier) cache of job output files
+"""
+
+WEIGHTS_CACHE_DIR = ".weights-cache"
+"""
+Name of a folder in the shepherd data root that contains model weight files shared (memory-mapped) by the runners
+"""
+
+WEIGHTS_CACHE_ENV = "SHEPHERD_WEIGHTS_CACHE"
+"""
+Name of an environment variable with the path of the shared weights cache, which is passed to the runners
+"""
+
+WEBHOOK_OUTBOX_DIR = ".webhook-outbox"
+"""
+Name of a folder in the shepherd data root that contains the pending job completion notifications
+"""
@@ -2,7 +2,7 @@ from apistrap.errors import ApiClientError, ApiServerError
 
 
 __all__ = ['ApiServerError', 'ApiClientError', 'UnknownSheepError', 'UnknownJobError', 'StorageError',
-           'StorageInaccessibleError', 'NameConflictError']
+           'StorageInaccessibleError', 'NameConflictError', 'OutputManifestError']
 
 
 class UnknownSheepError(ApiClientError):
@@ -17,6 +17,10 @@ class StorageError(ApiServerError):
     """Exception raised when application encounters some issue with the minio storage."""
 
 
+class OutputManifestError(StorageError):
+    """Exception raised when the outputs of a job do not match the manifest reported by its runner."""
+
+
 class StorageInaccessibleError(ApiServerError):
     """Exception raised when the remote storage is not accessible at the moment"""
 
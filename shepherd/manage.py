@@ -1,11 +1,13 @@
 import logging
+import os.path as path
 
 import click
 
 from aiohttp import web
 import aiohttp_cors
 
-from .storage import MinioStorage
+from .storage import MinioStorage, InMemoryStorage, InputCache, OutputCache
+from .constants import INPUT_CACHE_DIR, OUTPUT_CACHE_DIR
 from .api import create_app
 from .shepherd import Shepherd
 from .sheep.welcome import welcome
@@ -34,12 +36,28 @@ def run(host, port, config_file) -> None:
                   logging_directory=config.logging.logging_directory)
     welcome()
 
-    # create minio, shepherd and API handles
-    logging.debug('Creating minio handle')
-    storage = MinioStorage(config.storage)
+    # create storage, shepherd and API handles
+    if config.storage.type == "memory":
+        logging.debug('Creating in-memory storage')
+        storage = InMemoryStorage(config.storage.byte_budget)
+    else:
+        input_cache = None
+        if config.storage.input_cache_size:
+            logging.debug('Creating input cache')
+            input_cache = InputCache(path.join(config.data_root, INPUT_CACHE_DIR), config.storage.input_cache_size)
+
+        logging.debug('Creating minio handle')
+        storage = MinioStorage(config.storage, input_cache)
+
+    output_cache = None
+    if config.output_cache is not None:
+        logging.debug('Creating output cache')
+        output_cache = OutputCache(path.join(config.data_root, OUTPUT_CACHE_DIR), config.output_cache.memory_size,
+                                   config.output_cache.disk_size, config.output_cache.memory_max_file_size)
 
     logging.debug('Creating shepherd')
-    shepherd = Shepherd(config.sheep, config.data_root, storage, config.registry)
+    shepherd = Shepherd(config.sheep, config.data_root, storage, config.registry, config.result_cache, output_cache,
+                        config.webhooks)
 
     app = create_app()
     app.add_routes(create_shepherd_routes(shepherd, storage))
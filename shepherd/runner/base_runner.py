@@ -1,15 +1,23 @@
+import asyncio
 import logging
+import mmap
 import os
 import os.path as path
 import re
+import threading
 import traceback
 from abc import abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Set, List, Tuple, Any, Dict
 
 import zmq
 import zmq.asyncio
 
 from shepherd.comm import *
-from shepherd.constants import INPUT_DIR, OUTPUT_DIR
+from shepherd.constants import INPUT_DIR, OUTPUT_DIR, WEIGHTS_CACHE_ENV
+from shepherd.utils.manifest import build_manifest, manifest_entry
+
+from .weights_cache import map_weights
 
 
 def n_available_gpus() -> int:
@@ -33,22 +41,195 @@ def n_available_gpus() -> int:
     return len(devices.split(',')) if len(devices) > 0 else 0
 
 
+def current_rss() -> Optional[int]:
+    """
+    Return the resident set size of this process in bytes.
+
+    :return: the resident set size or None if it cannot be determined (``/proc`` is not available)
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_worker_runner: Optional['BaseRunner'] = None
+"""The runner used by the current process pool worker (see :py:func:`_init_worker`)."""
+
+
+def _init_worker(runner_class: type, config_path: str, port: int, stream_name: str) -> None:
+    """Create a runner in a process pool worker, so that the jobs can be processed there."""
+    global _worker_runner
+    _worker_runner = runner_class(config_path, port, stream_name)
+
+
+def _keep_traceback(error: BaseException) -> BaseException:
+    """
+    Store the formatted traceback of an exception in its ``formatted_traceback`` attribute, so that it survives
+    pickling when the exception is passed from a process pool worker (the ``__traceback__`` itself is not pickled).
+    """
+    error.formatted_traceback = traceback.format_tb(error.__traceback__)
+    return error
+
+
+def _process_batch_in_worker(jobs: List[Tuple[str, str]]) -> List[Optional[BaseException]]:
+    """Process a batch of jobs with the runner of the current process pool worker."""
+    try:
+        errors = _worker_runner._process_batch(jobs)
+    except BaseException as ex:
+        raise _keep_traceback(ex)
+
+    return [_keep_traceback(error) if error is not None else None for error in errors]
+
+
+def _compute_batch_in_worker(inputs: List[Any]) -> List[Any]:
+    """Compute the outputs of a batch of jobs with the runner of the current process pool worker."""
+    try:
+        outputs = _worker_runner._compute_batch(inputs)
+    except BaseException as ex:
+        raise _keep_traceback(ex)
+
+    return [_keep_traceback(output) if isinstance(output, BaseException) else output for output in outputs]
+
+
 class BaseRunner:
     """
     Base **emloop** runner class suitable for inheritance when implementing a runner with custom behavior.
     :py:class:`BaseRunner` manages the socket, messages and many more. See :py:meth:`_process_job` for more info.
+
+    The jobs are processed in a pool of ``max_workers`` threads (or processes), so that the runner keeps receiving
+    messages while the jobs are processed. With more than one worker, :py:meth:`_process_job` must be thread-safe
+    (or a process pool has to be used - each of its processes creates its own runner).
+
+    Jobs waiting in the socket are processed in batches of up to ``max_batch_size`` jobs, for which the runner waits
+    at most ``max_batch_latency`` seconds. Override :py:meth:`_process_batch` to process the whole batch at once
+    (e.g. with vectorized model inference).
+
+    Alternatively, runners may split the processing into :py:meth:`_load_inputs`, :py:meth:`_compute` (or
+    :py:meth:`_compute_batch`) and :py:meth:`_write_outputs` stages instead of overriding :py:meth:`_process_job`.
+    The stages then run as a pipeline - the inputs of the next batch are loaded and the outputs of the previous batch
+    are written (in a separate thread pool) while the current batch is computed.
+
+    Every ``progress_interval`` seconds, the runner sends a ``ProgressMessage`` for each job it processes, so that the
+    shepherd can tell a working runner from a dead one. The jobs may report their progress with
+    :py:meth:`_report_progress`, which is then included in these messages. Only changes of the reported progress
+    prevent the shepherd from failing a job as stalled (if the sheep has a ``stall_timeout``).
+
+    The ``DoneMessage`` of each job lists the output files with their sizes (and MD5 digests if ``hash_outputs`` is
+    set), so that the shepherd uploads exactly these files and detects incompletely written outputs. Jobs producing
+    many output files may announce each finished file with :py:meth:`_output_ready`, so that the shepherd uploads it
+    while the job is still processed.
     """
 
-    def __init__(self, config_path: str, port: int, stream_name: str):
-        """Create new :py:class:`Runner`."""
+    def __init__(self, config_path: str, port: int, stream_name: str, max_workers: int = 1,
+                 executor_type: str = 'thread', max_batch_size: int = 1, max_batch_latency: float = 0,
+                 progress_interval: float = 5, hash_outputs: bool = False):
+        """
+        Create new :py:class:`Runner`.
+
+        :param config_path: path to the model configuration
+        :param port: port to which the runner socket binds
+        :param stream_name: name of the dataset stream used for the jobs
+        :param max_workers: maximum number of jobs processed concurrently
+        :param executor_type: type of the pool in which the jobs are processed (``thread`` or ``process``)
+        :param max_batch_size: maximum number of jobs processed in a single batch
+        :param max_batch_latency: maximum time (in seconds) for which the runner waits for more jobs to fill a batch
+        :param progress_interval: time (in seconds) between the progress messages of a job
+        :param hash_outputs: compute MD5 digests of the output files (so that unchanged files are not uploaded again)
+        """
         logging.info('Creating runner from `%s` listening on port %s', config_path, port)
 
+        if executor_type not in ('thread', 'process'):
+            raise ValueError('Unknown executor type `{}`'.format(executor_type))
+
         # bind to the socket
         self._port = port
         self._socket = None
 
         self._config_path: str = config_path
         self._stream_name: str = stream_name
+        self._max_workers: int = max_workers
+        self._executor_type: str = executor_type
+        self._max_batch_size: int = max_batch_size
+        self._max_batch_latency: float = max_batch_latency
+        self._executor: Optional[Executor] = None
+        self._io_executor: Optional[Executor] = None
+        self._mapped_weights: Dict[str, mmap.mmap] = {}
+        self._progress_interval: float = progress_interval
+        self._hash_outputs: bool = hash_outputs
+        self._jobs_in_progress: Dict[str, InputMessage] = {}
+        self._progress: Dict[str, Dict[str, Any]] = {}  # the latest progress reported by each job in progress
+        self._worker_jobs = threading.local()  # ids of the jobs processed by the current worker thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready_outputs: Dict[str, List[ManifestEntry]] = {}  # finished output files not yet announced
+        self._ready_outputs_lock = threading.Lock()
+        self._outputs_ready: Optional[asyncio.Event] = None
+
+    def _map_weights(self, file_path: str) -> mmap.mmap:
+        """
+        Map a model weights file to memory (read-only), so that its pages are shared by all runners on the host.
+        If the shared weights cache is configured (the ``SHEPHERD_WEIGHTS_CACHE`` environment variable, set by bare
+        sheep), the file is copied there once and mapped from the cache. Each file is mapped only once per runner.
+
+        The returned map may be wrapped without copying, e.g. with ``numpy.frombuffer(weights, dtype=numpy.float32)``.
+
+        :param file_path: path of the weights file
+        :return: read-only memory map of the file
+        """
+        file_path = path.abspath(file_path)
+        if file_path not in self._mapped_weights:
+            self._mapped_weights[file_path] = map_weights(file_path, os.environ.get(WEIGHTS_CACHE_ENV))
+
+        return self._mapped_weights[file_path]
+
+    def _report_progress(self, percent: Optional[float] = None, stage: Optional[str] = None,
+                         eta: Optional[float] = None) -> None:
+        """
+        Report the progress of the job (or the batch of jobs) processed by the calling thread. The latest report is
+        sent to the shepherd with the next progress message. It may be called from :py:meth:`_process_job`,
+        :py:meth:`_process_batch` and the pipeline stages; the reports from process pool workers are ignored.
+
+        :param percent: percentage of the job done
+        :param stage: name of the current processing stage
+        :param eta: estimated time (in seconds) until the job is done
+        """
+        for job_id in getattr(self._worker_jobs, 'job_ids', []):
+            self._progress[job_id] = dict(percent=percent, stage=stage, eta=eta)
+
+    def _output_ready(self, file_path: str) -> None:
+        """
+        Announce that an output file of a job in progress is finished (it is not going to be modified anymore), so that
+        the shepherd can upload it while the job is still processed. It may be called from any thread of the runner;
+        the files finished in process pool workers are uploaded only after their jobs are done.
+
+        :param file_path: path of the file in the outputs folder of the job
+        :raise ValueError: if the file is not in the outputs folder of any job in progress
+        """
+        if self._loop is None:
+            return  # a process pool worker, the file is uploaded with the job
+
+        file_path = path.abspath(file_path)
+
+        for job_id, input_message in list(self._jobs_in_progress.items()):
+            output_path = path.abspath(path.join(input_message.io_data_root, job_id, OUTPUT_DIR))
+            if path.commonpath([output_path, file_path]) == output_path:
+                break
+        else:
+            raise ValueError('`{}` is not in the outputs of any job in progress'.format(file_path))
+
+        entry = manifest_entry(output_path, file_path, self._hash_outputs)
+        with self._ready_outputs_lock:
+            self._ready_outputs.setdefault(job_id, []).append(entry)
+        self._loop.call_soon_threadsafe(self._outputs_ready.set)
+
+    def _run_for_jobs(self, job_ids: List[str], function, *args) -> Any:
+        """Call the function in the worker thread on behalf of the given jobs (see :py:meth:`_report_progress`)."""
+        self._worker_jobs.job_ids = job_ids
+        try:
+            return function(*args)
+        finally:
+            self._worker_jobs.job_ids = []
 
     @abstractmethod
     def _process_job(self, input_path: str, output_path: str) -> None:
@@ -59,36 +240,274 @@ class BaseRunner:
         :param output_path: output directory path
         """
 
+    def _process_batch(self, jobs: List[Tuple[str, str]]) -> List[Optional[BaseException]]:
+        """
+        Process a batch of jobs. By default, the jobs are processed one by one with :py:meth:`_process_job`.
+
+        :param jobs: a list of tuples (input directory path, output directory path)
+        :return: a list with an exception for each failed job and None for each successful job (in the input order)
+        """
+        errors = []
+        for input_path, output_path in jobs:
+            try:
+                self._process_job(input_path, output_path)
+                errors.append(None)
+            except BaseException as ex:
+                errors.append(ex)
+
+        return errors
+
+    def _load_inputs(self, input_path: str) -> Any:
+        """
+        Load and decode the inputs of a job (the first stage of the pipeline, see :py:meth:`_compute`).
+        It may be called from multiple threads at once.
+
+        :param input_path: input directory path
+        :return: the decoded inputs passed to :py:meth:`_compute`
+        """
+        return input_path
+
+    def _compute(self, inputs: Any) -> Any:
+        """
+        Compute the outputs of a job from its decoded inputs (the second stage of the pipeline).
+        Runners overriding this method (or :py:meth:`_compute_batch`) are processed by the pipeline of
+        :py:meth:`_load_inputs`, :py:meth:`_compute` and :py:meth:`_write_outputs` instead of :py:meth:`_process_job`.
+
+        :param inputs: the inputs returned by :py:meth:`_load_inputs`
+        :return: the outputs passed to :py:meth:`_write_outputs`
+        """
+
+    def _compute_batch(self, inputs: List[Any]) -> List[Any]:
+        """
+        Compute the outputs of a batch of jobs. By default, the jobs are computed one by one with :py:meth:`_compute`.
+
+        :param inputs: a list of the inputs returned by :py:meth:`_load_inputs`
+        :return: a list with the outputs of each successful job and an exception for each failed job (in the input order)
+        """
+        outputs = []
+        for job_inputs in inputs:
+            try:
+                outputs.append(self._compute(job_inputs))
+            except BaseException as ex:
+                outputs.append(ex)
+
+        return outputs
+
+    def _write_outputs(self, outputs: Any, output_path: str) -> None:
+        """
+        Encode and save the outputs of a job (the last stage of the pipeline, see :py:meth:`_compute`).
+        It may be called from multiple threads at once.
+
+        :param outputs: the outputs returned by :py:meth:`_compute`
+        :param output_path: output directory path
+        """
+
+    @property
+    def _pipelined(self) -> bool:
+        """Check if the runner implements the pipeline stages (instead of :py:meth:`_process_job`)."""
+        return type(self)._compute is not BaseRunner._compute or \
+            type(self)._compute_batch is not BaseRunner._compute_batch
+
+    def _create_executor(self) -> Executor:
+        """Create the pool in which the jobs are processed."""
+        if self._executor_type == 'process':
+            return ProcessPoolExecutor(self._max_workers, initializer=_init_worker,
+                                       initargs=(type(self), self._config_path, self._port, self._stream_name))
+
+        return ThreadPoolExecutor(self._max_workers, thread_name_prefix='runner')
+
+    async def _receive_batch(self) -> List[InputMessage]:
+        """
+        Wait for a job and receive further jobs until the batch is full or the maximum batch latency expires.
+
+        :return: the messages describing the jobs
+        """
+        batch = [await Messenger.recv(self._socket, [InputMessage])]
+        deadline = asyncio.get_event_loop().time() + self._max_batch_latency
+
+        while len(batch) < self._max_batch_size:
+            timeout = max(0., deadline - asyncio.get_event_loop().time())
+            if not await self._socket.poll(int(timeout * 1000), zmq.POLLIN):
+                break
+            batch.append(await Messenger.recv(self._socket, [InputMessage], noblock=True))
+
+        return batch
+
+    async def _run_pipeline(self, job_ids: List[str], jobs: List[Tuple[str, str]]) -> List[Optional[BaseException]]:
+        """
+        Process a batch of jobs by the pipeline stages. The inputs are loaded and the outputs are written in the I/O
+        executor, so that they overlap the computation of other batches in the main executor.
+
+        :param job_ids: ids of the jobs
+        :param jobs: a list of tuples (input directory path, output directory path)
+        :return: a list with an exception for each failed job and None for each successful job (in the input order)
+        """
+        loop = asyncio.get_event_loop()
+        errors: List[Optional[BaseException]] = [None] * len(jobs)
+
+        async def run_stage(index: int, function, *args) -> Any:
+            try:
+                return await loop.run_in_executor(self._io_executor, self._run_for_jobs, [job_ids[index]], function,
+                                                  *args)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as ex:
+                errors[index] = ex
+
+        inputs = await asyncio.gather(*(run_stage(index, self._load_inputs, input_path)
+                                        for index, (input_path, _) in enumerate(jobs)))
+
+        loaded = [index for index, error in enumerate(errors) if error is None]
+        try:
+            if self._executor_type == 'process':
+                outputs = await loop.run_in_executor(self._executor, _compute_batch_in_worker,
+                                                     [inputs[index] for index in loaded])
+            else:
+                outputs = await loop.run_in_executor(self._executor, self._run_for_jobs,
+                                                     [job_ids[index] for index in loaded], self._compute_batch,
+                                                     [inputs[index] for index in loaded])
+        except asyncio.CancelledError:
+            raise
+        except BaseException as ex:
+            outputs = [ex] * len(loaded)  # the whole batch failed
+
+        computed = []
+        for index, job_outputs in zip(loaded, outputs):
+            if isinstance(job_outputs, BaseException):
+                errors[index] = job_outputs
+            else:
+                computed.append(run_stage(index, self._write_outputs, job_outputs, jobs[index][1]))
+        await asyncio.gather(*computed)
+
+        return errors
+
+    async def _run_batch(self, input_messages: List[InputMessage]) -> None:
+        """
+        Process a batch of jobs and report the result of each job with ``DoneMessage`` or ``ErrorMessage``.
+
+        :param input_messages: the messages describing the jobs
+        """
+        job_ids = [message.job_id for message in input_messages]
+        jobs = [(path.join(message.io_data_root, message.job_id, INPUT_DIR),
+                 path.join(message.io_data_root, message.job_id, OUTPUT_DIR)) for message in input_messages]
+        loop = asyncio.get_event_loop()
+
+        try:
+            if self._pipelined:
+                errors = await self._run_pipeline(job_ids, jobs)
+            elif self._executor_type == 'process':
+                errors = await loop.run_in_executor(self._executor, _process_batch_in_worker, jobs)
+            else:
+                errors = await loop.run_in_executor(self._executor, self._run_for_jobs, job_ids, self._process_batch,
+                                                    jobs)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as ex:
+            errors = [ex] * len(input_messages)  # the whole batch failed
+
+        rss = current_rss()
+
+        for input_message, (_, output_path), error in zip(input_messages, jobs, errors):
+            job_id = input_message.job_id
+            await self._send_ready_outputs(job_id)
+            self._jobs_in_progress.pop(job_id, None)
+            self._progress.pop(job_id, None)
+
+            if error is None:
+                try:
+                    manifest = await loop.run_in_executor(self._io_executor, build_manifest, output_path,
+                                                          self._hash_outputs)
+                except OSError:
+                    logging.warning('Failed to list the outputs of job `%s`', job_id, exc_info=True)
+                    manifest = None
+
+                logging.info('Job `%s` done, sending DoneMessage', job_id)
+                done_message = DoneMessage(dict(job_id=job_id, rss=rss, manifest=manifest))
+                await Messenger.send(self._socket, done_message, input_message)
+                continue
+
+            logging.error('Job `%s` failed', job_id, exc_info=error)
+            logging.error('Sending ErrorMessage for job `%s`', job_id)
+            short_erorr = "{}: {}".format(type(error).__name__, str(error))
+            long_error = str(getattr(error, 'formatted_traceback', None) or traceback.format_tb(error.__traceback__))
+            error_message = ErrorMessage(dict(job_id=job_id, message=short_erorr, exception_traceback=long_error,
+                                              exception_type=str(type(error)), rss=rss))
+            await Messenger.send(self._socket, error_message, input_message)
+
+    async def _send_progress(self) -> None:
+        """Periodically send a ``ProgressMessage`` with the latest reported progress of each job in progress."""
+        while True:
+            await asyncio.sleep(self._progress_interval)
+
+            for job_id, input_message in list(self._jobs_in_progress.items()):
+                progress = self._progress.get(job_id, {})
+                await Messenger.send(self._socket, ProgressMessage(dict(job_id=job_id, **progress)), input_message)
+
+    async def _send_ready_outputs(self, job_id: str) -> None:
+        """Send an ``OutputMessage`` with the output files of the given job announced since the last one (if any)."""
+        with self._ready_outputs_lock:
+            files = self._ready_outputs.pop(job_id, [])
+
+        if files and job_id in self._jobs_in_progress:
+            await Messenger.send(self._socket, OutputMessage(dict(job_id=job_id, files=files)),
+                                 self._jobs_in_progress[job_id])
+
+    async def _announce_outputs(self) -> None:
+        """Send the output files announced by :py:meth:`_output_ready` as soon as they are finished."""
+        while True:
+            await self._outputs_ready.wait()
+            self._outputs_ready.clear()
+
+            for job_id in list(self._ready_outputs.keys()):
+                await self._send_ready_outputs(job_id)
+
     async def process_all(self) -> None:
-        """Listen on the ``self._socket`` and process the incoming jobs in an endless loop."""
+        """
+        Listen on the ``self._socket`` and process the incoming jobs in an endless loop.
+        The jobs are processed in the background and their results are reported as soon as they are finished.
+        While all the workers are busy, the incoming jobs wait in the socket so that they can form the next batch.
+        With the pipeline stages, one more batch is loaded and one more batch is written while the workers compute.
+        """
         logging.info('Starting the loop')
+        self._executor = self._create_executor()
+        if self._pipelined:
+            self._io_executor = ThreadPoolExecutor(2 * self._max_workers, thread_name_prefix='runner-io')
+        idle_workers = asyncio.Semaphore(self._max_workers + 2 if self._pipelined else self._max_workers)
+        batches: Set[asyncio.Task] = set()
+        progress_sender: Optional[asyncio.Task] = None
+        output_announcer: Optional[asyncio.Task] = None
+        self._loop = asyncio.get_event_loop()
+        self._outputs_ready = asyncio.Event()
         try:
             logging.debug('Creating socket')
             self._socket: zmq.Socket = zmq.asyncio.Context.instance().socket(zmq.ROUTER)
             self._socket.setsockopt(zmq.IDENTITY, b"runner")
             self._socket.bind("tcp://0.0.0.0:{}".format(self._port))
+            progress_sender = asyncio.create_task(self._send_progress())
+            output_announcer = asyncio.create_task(self._announce_outputs())
             while True:
+                await idle_workers.acquire()
+
                 logging.info('Waiting for a job')
-                input_message: InputMessage = await Messenger.recv(self._socket, [InputMessage])
-                job_id = input_message.job_id
-                io_data_root = input_message.io_data_root
-                logging.info('Received job `%s` with io data root `%s`', job_id, io_data_root)
-                try:
-                    input_path = path.join(io_data_root, job_id, INPUT_DIR)
-                    output_path = path.join(io_data_root, job_id, OUTPUT_DIR)
-                    self._process_job(input_path, output_path)
-                    logging.info('Job `%s` done, sending DoneMessage', job_id)
-                    await Messenger.send(self._socket, DoneMessage(dict(job_id=job_id)), input_message)
-
-                except BaseException as ex:
-                    logging.exception(ex)
-
-                    logging.error('Sending ErrorMessage for job `%s`', job_id)
-                    short_erorr = "{}: {}".format(type(ex).__name__, str(ex))
-                    long_error = str(traceback.format_tb(ex.__traceback__))
-                    error_message = ErrorMessage(dict(job_id=job_id, message=short_erorr,
-                                                      exception_traceback=long_error, exception_type=str(type(ex))))
-                    await Messenger.send(self._socket, error_message, input_message)
+                input_messages = await self._receive_batch()
+                for input_message in input_messages:
+                    logging.info('Received job `%s` with io data root `%s`', input_message.job_id,
+                                 input_message.io_data_root)
+                    self._jobs_in_progress[input_message.job_id] = input_message
+
+                batch = asyncio.create_task(self._run_batch(input_messages))
+                batches.add(batch)
+                batch.add_done_callback(batches.discard)
+                batch.add_done_callback(lambda _: idle_workers.release())
         finally:
+            for task in (progress_sender, output_announcer):
+                if task is not None:
+                    task.cancel()
+            for batch in batches:
+                batch.cancel()
+            self._executor.shutdown(wait=False)
+            if self._io_executor is not None:
+                self._io_executor.shutdown(wait=False)
+
             if self._socket is not None:
                 self._socket.close(0)
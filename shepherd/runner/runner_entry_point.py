@@ -3,10 +3,10 @@ import importlib
 import logging
 import os
 import sys
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 
 __all__ = ['main']
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Sequence, Dict, Any
 
 from shepherd.runner import BaseRunner
 
@@ -17,15 +17,52 @@ def create_argparser():
     parser.add_argument('-p', '--port', dest="port", default=9999, type=int, help='Socket port to bind to')
     parser.add_argument('-s', '--stream', default='predict', help='Dataset stream name')
     parser.add_argument('-r', '--runner', default='shepherd.runner.JSONRunner', help='Fully qualified runner class')
+    parser.add_argument('-w', '--workers', default=1, type=int, help='Maximum number of jobs processed concurrently')
+    parser.add_argument('-e', '--executor', default='thread', choices=['thread', 'process'],
+                        help='Type of the pool in which the jobs are processed')
+    parser.add_argument('-b', '--batch-size', default=1, type=int, help='Maximum number of jobs processed in a batch')
+    parser.add_argument('-l', '--batch-latency', default=0, type=float,
+                        help='Maximum time (in milliseconds) to wait for more jobs to fill a batch')
+    parser.add_argument('-i', '--progress-interval', default=5, type=float,
+                        help='Time (in seconds) between the progress messages of a job')
+    parser.add_argument('--hash-outputs', action='store_true',
+                        help='Compute MD5 digests of the output files, so that unchanged files are not uploaded again')
     parser.add_argument('config_path', help='configuration file path')
     return parser
 
 
-def main() -> None:
+_RUNNER_OPTIONS = {'workers': 'max_workers', 'executor': 'executor_type', 'batch_size': 'max_batch_size',
+                   'batch_latency': 'max_batch_latency', 'progress_interval': 'progress_interval',
+                   'hash_outputs': 'hash_outputs'}
+"""Mapping of the command line arguments to the keyword arguments of the runner constructor."""
+
+
+def get_runner_options(parser: ArgumentParser, args: Namespace) -> Dict[str, Any]:
+    """
+    Return the runner options which differ from their defaults as keyword arguments of the runner constructor,
+    so that runners overriding ``__init__(config_path, port, stream_name)`` work unless these options are used.
+
+    :param parser: the argument parser
+    :param args: the parsed arguments
+    :return: keyword arguments of the runner constructor
+    """
+    options = {}
+
+    for arg_name, option_name in _RUNNER_OPTIONS.items():
+        value = getattr(args, arg_name)
+        if value != parser.get_default(arg_name):
+            options[option_name] = value / 1000 if arg_name == 'batch_latency' else value  # milliseconds to seconds
+
+    return options
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
     """
     Create a runner and list on the configured port for job ``InputMessage`` s.
 
     Can be invoked with installed ``shepherd-runner`` command.
+
+    :param argv: command line arguments (``sys.argv`` is used if not specified)
     """
 
     # parse args
@@ -33,13 +70,14 @@ def main() -> None:
     logging.basicConfig(level=logging.DEBUG,
                         format="%(asctime)s-%(levelname)s-%(name)s::%(module)s|%(lineno)s:: %(message)s")
 
-    args = create_argparser().parse_args()
+    parser = create_argparser()
+    args = parser.parse_args(argv)
 
     module_name = "model.isletnet_runner"
     class_name = "IsletnetRunner"
 
     _module = importlib.import_module(module_name)
-    runner = getattr(_module, class_name)(args.config_path, args.port, args.stream)
+    runner = getattr(_module, class_name)(args.config_path, args.port, args.stream, **get_runner_options(parser, args))
 
     # listen for input messages
     asyncio.run(runner.process_all())
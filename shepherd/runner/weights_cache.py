@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import uuid
+from os import path
+from typing import Optional
+
+
+def _cache_key(source_path: str) -> str:
+    """Get a prefix of the cached copies of the given file (common to all of its versions)."""
+    return hashlib.sha1(path.abspath(source_path).encode()).hexdigest()
+
+
+def cache_weights(source_path: str, cache_dir: str) -> str:
+    """
+    Copy a weights file to the shared cache directory (unless the same version of the file is already cached).
+
+    Cached copies are identified by the absolute source path, the file size and the modification time,
+    so a modified file is copied again and its outdated copies are removed (processes which still map them
+    keep their pages until they unmap them).
+
+    :param source_path: path of the weights file
+    :param cache_dir: the shared cache directory
+    :return: path of the cached copy
+    """
+    stat = os.stat(source_path)
+    key = _cache_key(source_path)
+    cached_path = path.join(cache_dir, '{}-{}-{}'.format(key, stat.st_size, stat.st_mtime_ns))
+
+    if path.exists(cached_path):
+        return cached_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_path = '{}.{}.tmp'.format(cached_path, uuid.uuid4().hex)
+    logging.info('Caching weights `%s` in `%s`', source_path, cached_path)
+
+    try:
+        shutil.copyfile(source_path, temporary_path)
+        os.chmod(temporary_path, 0o444)
+        os.replace(temporary_path, cached_path)  # atomic, concurrent processes may cache the same file
+    finally:
+        if path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    for file_name in os.listdir(cache_dir):
+        file_path = path.join(cache_dir, file_name)
+        if file_name.startswith(key + '-') and file_path != cached_path and not file_name.endswith('.tmp'):
+            logging.info('Removing outdated cached weights `%s`', file_path)
+            os.remove(file_path)
+
+    return cached_path
+
+
+def map_weights(source_path: str, cache_dir: Optional[str] = None) -> mmap.mmap:
+    """
+    Map a weights file to memory (read-only). The pages of the file are shared by all processes which map it
+    through the OS page cache, so the weights are loaded into RAM only once per host.
+
+    :param source_path: path of the weights file
+    :param cache_dir: the shared cache directory (if specified, the file is mapped from its cached copy)
+    :return: read-only memory map of the file
+    """
+    if cache_dir is not None:
+        source_path = cache_weights(source_path, cache_dir)
+
+    with open(source_path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,181 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from argparse import ArgumentParser
+from typing import Any, Dict, Optional, Sequence
+
+__all__ = ['main', 'fork_runner', 'fork_runner_async']
+
+from .runner_entry_point import main as runner_main
+
+
+def create_argparser():
+    """Create and return argument parser."""
+    parser = ArgumentParser('shepherd runner zygote')
+    parser.add_argument('socket_path', help='Path of the unix socket on which the zygote accepts fork requests')
+    parser.add_argument('preload', nargs='*', help='Modules to be imported before the runners are forked')
+    return parser
+
+
+def _run_forked_runner(request: Dict[str, Any]) -> int:
+    """
+    Prepare the environment of a freshly forked process and run ``shepherd-runner`` in it.
+
+    :param request: the fork request (``args``, ``cwd``, ``env``, ``stdout_file`` and ``stderr_file``)
+    :return: exit code of the runner
+    """
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+
+    for fd, file_path in ((1, request.get('stdout_file')), (2, request.get('stderr_file'))):
+        target = os.open(file_path or os.devnull, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        os.dup2(target, fd)
+        os.close(target)
+
+    sys.argv = ['shepherd-runner'] + request['args']
+    try:
+        runner_main(request['args'])
+    except SystemExit as ex:
+        return ex.code if isinstance(ex.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+def serve(socket_path: str, preload: Sequence[str]) -> None:
+    """
+    Import the ``preload`` modules and fork new runners on requests received on the unix socket at ``socket_path``.
+    The zygote terminates together with its parent process.
+
+    :param socket_path: path of the unix socket
+    :param preload: names of the modules to be imported
+    """
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            logging.exception('Failed to preload module `%s`', module_name)
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # the forked runners are reaped automatically
+    parent_pid = os.getppid()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    server.settimeout(1)
+
+    while os.getppid() == parent_pid:
+        try:
+            connection, _ = server.accept()
+        except socket.timeout:
+            continue
+
+        with connection:
+            connection.settimeout(None)
+            request = json.loads(connection.makefile().readline())
+            pid = os.fork()
+
+            if pid == 0:
+                exit_code = 1
+                try:
+                    server.close()
+                    connection.close()
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    exit_code = _run_forked_runner(request)
+                finally:
+                    os._exit(exit_code)
+
+            connection.sendall(json.dumps({'pid': pid}).encode() + b'\n')
+
+
+def _fork_request(args: Sequence[str], cwd: str, env: Dict[str, str], stdout_file: Optional[str],
+                  stderr_file: Optional[str]) -> bytes:
+    """Encode a fork request (see :py:func:`fork_runner`) as a single line of JSON."""
+    request = dict(args=list(args), cwd=cwd, env=dict(env), stdout_file=stdout_file, stderr_file=stderr_file)
+    return json.dumps(request).encode() + b'\n'
+
+
+def fork_runner(socket_path: str, args: Sequence[str], cwd: str, env: Dict[str, str],
+                stdout_file: Optional[str] = None, stderr_file: Optional[str] = None, timeout: float = 60) -> int:
+    """
+    Ask the zygote listening on ``socket_path`` to fork a new ``shepherd-runner`` process.
+
+    :param socket_path: path of the zygote unix socket
+    :param args: command line arguments of the runner
+    :param cwd: working directory of the runner
+    :param env: environment variables of the runner
+    :param stdout_file: file to which the runner's stdout is appended (discarded if not specified)
+    :param stderr_file: file to which the runner's stderr is appended (discarded if not specified)
+    :param timeout: maximum time (in seconds) to wait for the zygote (it may still be preloading the modules)
+    :return: pid of the forked runner
+    :raise OSError: if the zygote is not available
+    """
+    deadline = time.monotonic() + timeout
+    request = _fork_request(args, cwd, env, stdout_file, stderr_file)
+
+    while True:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(max(1., deadline - time.monotonic()))
+                client.connect(socket_path)
+                client.sendall(request)
+                return json.loads(client.makefile().readline())['pid']
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def fork_runner_async(socket_path: str, args: Sequence[str], cwd: str, env: Dict[str, str],
+                            stdout_file: Optional[str] = None, stderr_file: Optional[str] = None,
+                            timeout: float = 60) -> int:
+    """
+    Asynchronous variant of :py:func:`fork_runner`, which does not block the event loop while the zygote is
+    still preloading the modules.
+
+    :return: pid of the forked runner
+    :raise OSError: if the zygote is not available
+    """
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    request = _fork_request(args, cwd, env, stdout_file, stderr_file)
+
+    while True:
+        try:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if loop.time() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+            continue
+
+        try:
+            writer.write(request)
+            response = await asyncio.wait_for(reader.readline(), max(1., deadline - loop.time()))
+            return json.loads(response)['pid']
+        except asyncio.TimeoutError as ex:
+            raise OSError('The zygote did not answer the fork request in time') from ex
+        finally:
+            writer.close()
+
+
+def main() -> None:
+    """Run the zygote (it is started by :py:class:`shepherd.sheep.BareSheep` in the zygote mode)."""
+    args = create_argparser().parse_args()
+    serve(args.socket_path, args.preload)
+
+
+if __name__ == '__main__':
+    main()  # pragma: no cover
@@ -1,13 +1,20 @@
 import os
+import logging
+import os.path as path
 import shlex
+import signal
 import subprocess
-from typing import Dict, Any, Optional
+import sys
+import tempfile
+from typing import Dict, Any, Optional, List, Tuple
 
-from schematics.types import StringType
+from schematics.types import StringType, IntType, BooleanType, ListType, FloatType
 
 from .base_sheep import BaseSheep
 from .docker_sheep import extract_gpu_number
+from ..constants import WEIGHTS_CACHE_DIR, WEIGHTS_CACHE_ENV
 from ..errors.sheep import SheepConfigurationError
+from ..runner.zygote import fork_runner, fork_runner_async
 
 
 class BareSheep(BaseSheep):
@@ -21,6 +28,14 @@ class BareSheep(BaseSheep):
         working_directory: str = StringType(required=True)  # working directory of the shepherd-runner
         stdout_file: Optional[str] = StringType(required=False)  # if specified, capture runner's stdout to this file
         stderr_file: Optional[str] = StringType(required=False)  # if specified, capture runner's stderr to this file
+        runner_workers: int = IntType(default=1, min_value=1)  # maximum number of jobs processed by the runner at once
+        runner_executor: str = StringType(default='thread', choices=['thread', 'process'])  # runner's worker pool type
+        runner_batch_size: int = IntType(default=1, min_value=1)  # maximum number of jobs in a runner's batch
+        runner_batch_latency: int = IntType(default=0, min_value=0)  # maximum time (ms) to wait for a full batch
+        runner_progress_interval: float = FloatType(default=5, min_value=0)  # time (s) between job progress messages
+        runner_hash_outputs: bool = BooleanType(default=False)  # hash the outputs to skip uploading unchanged files
+        zygote: bool = BooleanType(default=False)  # fork the runners from a long-lived process with preloaded modules
+        zygote_preload: List[str] = ListType(StringType, default=lambda: [])  # modules imported by the zygote
 
     def __init__(self, config: Dict[str, Any], **kwargs):
         """
@@ -32,42 +47,128 @@ class BareSheep(BaseSheep):
         super().__init__(**kwargs)
         self._config: self.Config = self.Config(config)
         self._runner: Optional[subprocess.Popen] = None
+        self._runner_pid: Optional[int] = None  # pid of the runner forked by the zygote
         self._runner_config_path: Optional[str] = None
+        self._zygote: Optional[subprocess.Popen] = None
+        self._zygote_socket_path: Optional[str] = None
 
-    def start(self, model_name: str, model_version: str) -> None:
+        if self._config.zygote:
+            # start preloading the modules right away, so that the first runner is forked without a delay
+            try:
+                self._ensure_zygote()
+            except OSError:
+                logging.exception('Failed to start the zygote, it will be started with the first runner')
+
+    def _ensure_zygote(self) -> str:
         """
-        Start a subprocess with the sheep runner.
+        Start the zygote - a long-lived process which imports the ``zygote_preload`` modules once and then forks
+        the runners on demand (unless it is already running).
+
+        :return: path of the zygote unix socket
+        """
+        if self._zygote is None or self._zygote.poll() is not None:
+            self._zygote_socket_path = path.join(tempfile.mkdtemp(prefix='shepherd-zygote-'), 'zygote.sock')
+            self._zygote = subprocess.Popen(
+                [sys.executable, '-m', 'shepherd.runner.zygote', self._zygote_socket_path,
+                 'shepherd.runner', *self._config.zygote_preload],
+                cwd=self._config.working_directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        return self._zygote_socket_path
+
+    def _prepare_runner(self, model_name: str, model_version: str) -> Tuple[List[str], Dict[str, str], Any, Any]:
+        """
+        (Re)start the sheep and prepare the command, environment and stdout/stderr files of the runner.
 
         :param model_name: model name
         :param model_version: model version
+        :return: a tuple (command, env. variables, stdout, stderr) - the log files are closed in the zygote mode
         """
         super().start(model_name, model_version)
 
         # prepare env. variables for GPU computation and stdout/stderr files
         env = os.environ.copy()
         env['CUDA_VISIBLE_DEVICES'] = ','.join(filter(None, map(extract_gpu_number, self._config.devices)))
-        stdout = subprocess.DEVNULL
+        # weights shared by all sheep are cached in the shepherd data root (the parent of the sheep data roots)
+        env[WEIGHTS_CACHE_ENV] = path.join(path.dirname(path.abspath(self.sheep_data_root)), WEIGHTS_CACHE_DIR)
 
-        try:
-            if self._config.stdout_file is not None:
-                os.makedirs(os.path.dirname(self._config.stdout_file), exist_ok=True)
-                stdout = open(self._config.stdout_file, 'a')
-        except IOError as ex:
-            raise SheepConfigurationError('Could not open stdout log file: {}'.format(str(ex))) from ex
+        stdout = self._open_log_file(self._config.stdout_file, 'stdout')
+        stderr = self._open_log_file(self._config.stderr_file, 'stderr')
+
+        if self._config.zygote:
+            # the log files are opened by the forked runner itself (they are only created here)
+            for log_file in (stdout, stderr):
+                if log_file is not subprocess.DEVNULL:
+                    log_file.close()
+
+        command = shlex.split('shepherd-runner -p {} -w {} -e {} -b {} -l {} -i {} {}'.format(
+            self._config.port, self._config.runner_workers, self._config.runner_executor,
+            self._config.runner_batch_size, self._config.runner_batch_latency, self._config.runner_progress_interval,
+            self._runner_config_path))
+        if self._config.runner_hash_outputs:
+            command.insert(-1, '--hash-outputs')
 
-        stderr = subprocess.DEVNULL
+        return command, env, stdout, stderr
+
+    @staticmethod
+    def _open_log_file(file_path: Optional[str], name: str) -> Any:
+        """
+        Open a log file of the runner for appending.
+
+        :param file_path: path to the log file (the output is discarded if not specified)
+        :param name: name of the captured stream (for the error message)
+        :return: the opened file or :py:data:`subprocess.DEVNULL`
+        :raise SheepConfigurationError: if the file cannot be opened
+        """
+        if file_path is None:
+            return subprocess.DEVNULL
 
         try:
-            if self._config.stderr_file is not None:
-                os.makedirs(os.path.dirname(self._config.stderr_file), exist_ok=True)
-                stderr = open(self._config.stderr_file, 'a')
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            return open(file_path, 'a')
         except IOError as ex:
-            raise SheepConfigurationError('Could not open stderr log file: {}'.format(str(ex))) from ex
+            raise SheepConfigurationError('Could not open {} log file: {}'.format(name, str(ex))) from ex
+
+    def start(self, model_name: str, model_version: str) -> None:
+        """
+        Start a subprocess with the sheep runner.
+
+        :param model_name: model name
+        :param model_version: model version
+        """
+        command, env, stdout, stderr = self._prepare_runner(model_name, model_version)
+
+        if self._config.zygote:
+            try:
+                self._runner_pid = fork_runner(self._ensure_zygote(), command[1:], self._config.working_directory, env,
+                                               self._config.stdout_file, self._config.stderr_file)
+            except OSError as ex:
+                raise SheepConfigurationError('Failed to fork the runner from the zygote: {}'.format(str(ex))) from ex
+            return
 
         # start the runner in a new sub-process
-        self._runner = subprocess.Popen(
-            shlex.split('shepherd-runner -p {} {}'.format(self._config.port, self._runner_config_path)), env=env,
-            cwd=self._config.working_directory, stdout=stdout, stderr=stderr)
+        self._runner = subprocess.Popen(command, env=env, cwd=self._config.working_directory,
+                                        stdout=stdout, stderr=stderr)
+
+    async def start_async(self, model_name: str, model_version: str) -> None:
+        """
+        Start the sheep runner. In the zygote mode, the runner is forked without blocking the event loop
+        (the zygote may still be preloading its modules).
+
+        :param model_name: model name
+        :param model_version: model version
+        """
+        if not self._config.zygote:
+            self.start(model_name, model_version)
+            return
+
+        command, env, _, _ = self._prepare_runner(model_name, model_version)
+
+        try:
+            self._runner_pid = await fork_runner_async(self._ensure_zygote(), command[1:],
+                                                       self._config.working_directory, env,
+                                                       self._config.stdout_file, self._config.stderr_file)
+        except OSError as ex:
+            raise SheepConfigurationError('Failed to fork the runner from the zygote: {}'.format(str(ex))) from ex
 
     def slaughter(self) -> None:
         """Kill the underlying runner (subprocess)."""
@@ -75,8 +176,21 @@ class BareSheep(BaseSheep):
         if self._runner is not None:
             self._runner.kill()
             self._runner = None
+        if self._runner_pid is not None:
+            try:
+                os.kill(self._runner_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self._runner_pid = None
 
     @property
     def running(self) -> bool:
         """Check if the underlying runner (subprocess) is running."""
+        if self._runner_pid is not None:
+            try:
+                os.kill(self._runner_pid, 0)
+                return True
+            except ProcessLookupError:
+                return False
+
         return self._runner is not None and self._runner.poll() is None
@@ -1,12 +1,13 @@
 import abc
 import logging
-from typing import List, Optional
+import time
+from typing import List, Optional, Dict
 from asyncio import Queue
 
 import zmq.asyncio
 from zmq.error import ZMQBaseError
 from schematics import Model
-from schematics.types import StringType, IntType, ListType
+from schematics.types import StringType, IntType, ListType, FloatType, DictType
 
 
 class BaseSheep(metaclass=abc.ABCMeta):
@@ -18,6 +19,12 @@ class BaseSheep(metaclass=abc.ABCMeta):
         type: str = StringType(required=True)
         port: int = IntType(required=True)
         devices: List[str] = ListType(StringType, default=lambda: [])
+        max_jobs: Optional[int] = IntType(required=False, min_value=1)  # restart the runner after this many jobs
+        max_rss_mb: Optional[int] = IntType(required=False, min_value=1)  # restart the runner when it grows this big
+        max_uptime: Optional[int] = IntType(required=False, min_value=1)  # restart the runner after this time (s)
+        job_timeout: Optional[float] = FloatType(required=False, min_value=0)  # fail jobs running longer (s)
+        model_timeouts: Dict[str, float] = DictType(FloatType, default=lambda: {})  # job timeouts by model name (s)
+        stall_timeout: Optional[float] = FloatType(required=False, min_value=0)  # fail jobs without progress (s)
 
     _config: Config
 
@@ -35,6 +42,9 @@ class BaseSheep(metaclass=abc.ABCMeta):
         self.model_version: Optional[str] = None  # current model version
         self.sheep_data_root: Optional[str] = sheep_data_root
         self.in_progress: set = set()  # set of job_ids which are currently sent for processing to the sheep's runner
+        self.jobs_processed: int = 0  # number of jobs processed by the current runner
+        self.runner_rss: Optional[int] = None  # the last reported resident set size of the runner in bytes
+        self.started_at: Optional[float] = None  # time (monotonic) when the current runner was started
 
     def _load_model(self, model_name: str, model_version: str) -> None:
         """Tell the sheep to prepare a new model (without restarting)."""
@@ -53,8 +63,21 @@ class BaseSheep(metaclass=abc.ABCMeta):
             self.slaughter()
         self._load_model(model_name, model_version)
         self.in_progress = set()
+        self.jobs_processed = 0
+        self.runner_rss = None
+        self.started_at = time.monotonic()
         self.socket.connect("tcp://0.0.0.0:{}".format(self._config.port))
 
+    async def start_async(self, model_name: str, model_version: str) -> None:
+        """
+        (Re)start the sheep without blocking the event loop while the runner is being started.
+        By default, :py:meth:`start` is called.
+
+        :param model_name: model name
+        :param model_version: model version
+        """
+        self.start(model_name, model_version)
+
     def slaughter(self) -> None:
         zmq_address = 'tcp://0.0.0.0:{}'.format(self._config.port)
         try:
@@ -62,6 +85,50 @@ class BaseSheep(metaclass=abc.ABCMeta):
         except ZMQBaseError:
             logging.warning('Failed to disconnect socket (perhaps it was not started/connected)')
 
+    def get_job_timeout(self, model_name: str) -> Optional[float]:
+        """
+        Get the maximum time for which the runner may process a job of the given model.
+
+        :param model_name: name of the model
+        :return: the timeout in seconds or None if the jobs may run indefinitely
+        """
+        return self._config.model_timeouts.get(model_name, self._config.job_timeout)
+
+    @property
+    def stall_timeout(self) -> Optional[float]:
+        """Maximum time (in seconds) for which a job may report no progress (None if the stalls are not detected)."""
+        return self._config.stall_timeout
+
+    def record_job(self, rss: Optional[int]) -> None:
+        """
+        Record a job processed by the runner.
+
+        :param rss: resident set size of the runner reported with the job result (None if unknown)
+        """
+        self.jobs_processed += 1
+        if rss is not None:
+            self.runner_rss = rss
+
+    @property
+    def recycling_reason(self) -> Optional[str]:
+        """
+        Check whether the runner should be restarted (between jobs) according to the ``max_jobs``,
+        ``max_rss_mb`` and ``max_uptime`` config.
+
+        :return: a human-readable reason for the restart or None if the runner does not need to be restarted
+        """
+        jobs_sent = self.jobs_processed + len(self.in_progress)
+        if self._config.max_jobs is not None and jobs_sent >= self._config.max_jobs:
+            return 'it was sent {} jobs'.format(jobs_sent)
+        if self._config.max_rss_mb is not None and self.runner_rss is not None \
+                and self.runner_rss >= self._config.max_rss_mb * 1024 ** 2:
+            return 'its memory usage reached {} MB'.format(self.runner_rss // 1024 ** 2)
+        if self._config.max_uptime is not None and self.started_at is not None \
+                and time.monotonic() - self.started_at >= self._config.max_uptime:
+            return 'it has been running for {} s'.format(int(time.monotonic() - self.started_at))
+
+        return None
+
     @property
     @abc.abstractmethod
     def running(self) -> bool:
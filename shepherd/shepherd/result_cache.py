@@ -0,0 +1,80 @@
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from ..api.models import ModelModel
+
+
+class ResultCache:
+    """
+    Maps digests of job inputs and model identities to identifiers of jobs which already computed the results.
+    Entries expire after a configured time and the least recently used entries are dropped when the cache is full.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        """
+        Create a new result cache.
+
+        :param ttl: time (in seconds) after which the entries expire
+        :param max_entries: maximum number of entries
+        """
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()  # digest -> (job id, creation time)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_digest(inputs_digest: str, model: ModelModel) -> str:
+        """
+        Combine a digest of job inputs with the model identity.
+
+        :param inputs_digest: digest of the job inputs (see :py:meth:`shepherd.storage.Storage.get_inputs_digest`)
+        :param model: model used for the job
+        :return: the combined digest
+        """
+        return hashlib.sha256('\0'.join((inputs_digest, str(model.name), str(model.version))).encode()).hexdigest()
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        Find a job that computed results for the given digest.
+
+        :param digest: the combined digest of the job inputs and model
+        :return: the job id or None if no valid entry exists
+        """
+        entry = self._entries.get(digest)
+
+        if entry is None:
+            return None
+
+        job_id, created_at = entry
+
+        if time.monotonic() - created_at > self._ttl:
+            del self._entries[digest]
+            return None
+
+        self._entries.move_to_end(digest)
+        return job_id
+
+    def put(self, digest: str, job_id: str) -> None:
+        """
+        Remember that a job computed results for the given digest.
+
+        :param digest: the combined digest of the job inputs and model
+        :param job_id: the job id
+        """
+        self._entries[digest] = (job_id, time.monotonic())
+        self._entries.move_to_end(digest)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def remove(self, digest: str) -> None:
+        """
+        Forget the given digest (e.g. when the results are no longer available).
+
+        :param digest: the combined digest of the job inputs and model
+        """
+        self._entries.pop(digest, None)
@@ -5,21 +5,34 @@ import traceback
 import os.path as path
 from datetime import datetime
 from itertools import cycle
-from typing import Mapping, Generator, Tuple, Dict, Any, Optional
+from typing import Mapping, Generator, Tuple, Dict, Any, Optional, Sequence, List
 
 import zmq
 import zmq.asyncio
 
-from ..constants import OUTPUT_DIR
+from ..constants import OUTPUT_DIR, WEBHOOK_OUTBOX_DIR
 from ..storage.minio_storage import Storage
-from ..config import RegistryConfig
+from ..storage.output_cache import OutputCache
+from ..api.downloads import FileDownload
+from ..config import RegistryConfig, ResultCacheConfig, WebhookConfig
 from ..sheep import *
-from ..api.models import SheepModel, ModelModel, JobStatus, JobStatusModel, ErrorModel
-from ..errors.api import UnknownSheepError, UnknownJobError
+from ..api.models import SheepModel, ModelModel, JobStatus, JobStatusModel, ErrorModel, JobProgressModel
+from ..errors.api import UnknownSheepError, OutputManifestError
 from ..errors.sheep import SheepConfigurationError, SheepError
 from ..utils import create_clean_dir
-from ..comm import Messenger, InputMessage, DoneMessage, ErrorMessage
+from ..comm import Messenger, InputMessage, DoneMessage, ErrorMessage, ProgressMessage, OutputMessage, ManifestEntry
 from ..utils.task_queue import TaskQueue
+from .result_cache import ResultCache
+from .status_feed import JobStatusFeed
+from .webhooks import WebhookDispatcher
+from .timer_wheel import TimerWheel
+
+
+_DEADLINE_RESOLUTION = 1
+"""Resolution (in seconds) of job timeouts."""
+
+_OUTPUT_UPLOAD_CONCURRENCY = 16
+"""Maximum number of output files uploaded concurrently while their jobs are processed."""
 
 
 class Shepherd:
@@ -31,7 +44,10 @@ class Shepherd:
                  sheep_config: Mapping[str, Dict[str, Any]],
                  data_root: str,
                  storage: Storage,
-                 registry_config: Optional[RegistryConfig] = None):
+                 registry_config: Optional[RegistryConfig] = None,
+                 result_cache_config: Optional[ResultCacheConfig] = None,
+                 output_cache: Optional[OutputCache] = None,
+                 webhook_config: Optional[WebhookConfig] = None):
         """
         Create the mighty Shepherd.
 
@@ -39,12 +55,17 @@ class Shepherd:
         :param sheep_config: sheep config
         :param data_root: directory where the task/sheep directories will be managed
         :param storage: remote storage adapter
+        :param result_cache_config: optional config of result memoization (disabled if not specified)
+        :param output_cache: optional local cache of the outputs of finished jobs
+        :param webhook_config: optional config of job completion webhooks (callback URLs are ignored if not specified)
         """
         for config in sheep_config.values():
             if config["type"] == "docker" and registry_config is None:
                 raise SheepConfigurationError("To use docker sheep, you need to configure a registry URL")
 
         self.job_done_condition = asyncio.Condition()
+        self._output_upload_slots = asyncio.Semaphore(_OUTPUT_UPLOAD_CONCURRENCY)
+        self.status_feed = JobStatusFeed()
 
         self._storage = storage
         self._poller = zmq.asyncio.Poller()
@@ -55,6 +76,24 @@ class Shepherd:
         self._health_checker = None
         self._job_status: Dict[str, JobStatusModel] = {}
         self._job_status_update_queue = None
+        self._result_cache: Optional[ResultCache] = None
+        self._job_digests: Dict[str, str] = {}  # digests of jobs that should be memoized once they are done
+        self._output_cache = output_cache
+        self._webhooks: Optional[WebhookDispatcher] = None
+        self._job_timeouts: Dict[str, float] = {}  # timeouts (in seconds) of the jobs which are not finished yet
+        self._job_deadlines = TimerWheel(_DEADLINE_RESOLUTION)  # deadlines of the jobs sent to the runners
+        self._job_stall_deadlines = TimerWheel(_DEADLINE_RESOLUTION)  # deadlines of the next progress of the jobs
+        self._deadline_watcher = None
+        self._output_uploads: Dict[str, List[Tuple[ManifestEntry, asyncio.Task]]] = {}  # outputs uploaded in advance
+
+        if result_cache_config is not None:
+            self._result_cache = ResultCache(result_cache_config.ttl, result_cache_config.max_entries)
+
+        if webhook_config is not None:
+            self._webhooks = WebhookDispatcher(path.join(data_root, WEBHOOK_OUTBOX_DIR), webhook_config.batch_size,
+                                               webhook_config.batch_delay, webhook_config.max_connections,
+                                               webhook_config.timeout, webhook_config.max_attempts,
+                                               webhook_config.retry_delay, webhook_config.max_retry_delay)
 
         for sheep_id, config in sheep_config.items():
             socket = zmq.asyncio.Context.instance().socket(zmq.DEALER)
@@ -87,8 +126,12 @@ class Shepherd:
 
         self._listener = asyncio.create_task(self._listen())
         self._health_checker = asyncio.create_task(self._shepherd_health_check())
+        self._deadline_watcher = asyncio.create_task(self._watch_job_deadlines())
         self._job_status_update_queue = TaskQueue(worker_count=1)
 
+        if self._webhooks is not None:
+            await self._webhooks.start()
+
     def _get_sheep(self, sheep_id: str) -> BaseSheep:
         """
         Get the sheep with the given ``sheep_id``.
@@ -102,7 +145,17 @@ class Shepherd:
         except KeyError:
             raise UnknownSheepError('Unknown sheep id `{}`'.format(sheep_id))
 
-    def _start_sheep(self, sheep_id: str, model: str, version: str) -> None:
+    def check_sheep_id(self, sheep_id: Optional[str]) -> None:
+        """
+        Check that a job may be en-queued for the given sheep.
+
+        :param sheep_id: sheep id (None for any sheep)
+        :raise UnknownSheepError: if the given ``sheep_id`` is not known to this shepherd
+        """
+        if sheep_id is not None:
+            self._get_sheep(sheep_id)
+
+    async def _start_sheep(self, sheep_id: str, model: str, version: str) -> None:
         """
         (Re)Start the sheep with the given ``sheep_id`` and configure it to run the specified ``model``:``version``.
 
@@ -111,7 +164,7 @@ class Shepherd:
         :param version: mode version to be loaded
         """
         logging.info('Starting sheep `%s` with model `%s:%s`', sheep_id, model, version)
-        self._get_sheep(sheep_id).start(model, version)
+        await self._get_sheep(sheep_id).start_async(model, version)
 
     def _slaughter_sheep(self, sheep_id: str) -> None:
         """
@@ -124,27 +177,125 @@ class Shepherd:
 
         self._get_sheep(sheep_id).slaughter()
 
-    async def enqueue_job(self, job_id: str, job_meta: ModelModel, sheep_id: Optional[str] = None) -> None:
+    async def enqueue_job(self, job_id: str, job_meta: ModelModel, sheep_id: Optional[str] = None,
+                          callback_url: Optional[str] = None, timeout: Optional[float] = None) -> None:
         """
         En-queue the given job for execution. If specified, use a certain sheep.
 
         :param job_id: job id
         :param job_meta: job meta data (model name and version)
         :param sheep_id: optional sheep id, if not specified use first sheep available
+        :param callback_url: optional URL that is notified when the job is done or failed
+        :param timeout: optional maximum processing time (in seconds), overrides the timeout configured for the sheep
         """
-        logging.info('En-queueing job `%s` for sheep `%s`', job_id, sheep_id)
-        if sheep_id is None:
-            sheep_id = next(self._sheep_ring)
-            logging.info('Job `%s` is auto-assigned to sheep `%s`', job_id, sheep_id)
+        await self.enqueue_jobs([(job_id, job_meta, sheep_id, callback_url, timeout)])
+
+    async def enqueue_jobs(self, jobs: Sequence[Tuple[str, ModelModel, Optional[str], Optional[str],
+                                                      Optional[float]]]) -> None:
+        """
+        En-queue multiple jobs for execution in a single pass. The status updates of all the jobs are issued at once
+        and awaited together.
+
+        :param jobs: a sequence of tuples (job id, job meta data, optional sheep id, optional callback URL,
+                     optional timeout)
+        :raise UnknownSheepError: if any of the jobs requests an unknown sheep (no job is en-queued in such case)
+        """
+        for _, _, sheep_id, _, _ in jobs:
+            self.check_sheep_id(sheep_id)
+
+        status_futures = []
+
+        for job_id, job_meta, sheep_id, callback_url, timeout in jobs:
+            logging.info('En-queueing job `%s` for sheep `%s`', job_id, sheep_id)
+            if sheep_id is None:
+                sheep_id = next(self._sheep_ring)
+                logging.info('Job `%s` is auto-assigned to sheep `%s`', job_id, sheep_id)
+
+            if callback_url is not None and self._webhooks is None:
+                logging.warning('Webhooks are not configured, callback URL of job `%s` is ignored', job_id)
+                callback_url = None
+
+            if timeout is not None:
+                self._job_timeouts[job_id] = timeout
+
+            if self._result_cache is not None and await self._reuse_memoized_result(job_id, job_meta, callback_url):
+                continue
+
+            # the callback URL is stored with the status, so that it is not lost if the shepherd is restarted
+            status = JobStatusModel({"model": job_meta, "status": JobStatus.QUEUED, "enqueued_at": datetime.utcnow(),
+                                     "callback_url": callback_url})
+            self._job_status[job_id] = status
 
-        status = JobStatusModel({"model": job_meta, "status": JobStatus.QUEUED, "enqueued_at": datetime.utcnow()})
-        self._job_status[job_id] = status
+            status_futures.append(await self._update_job_status(job_id, status))
+            await self._get_sheep(sheep_id).jobs_queue.put(job_id)
+
+        # Wait for the status updates to finish before returning (this way we can be sure the jobs were enqueued)
+        await asyncio.gather(*status_futures)
+
+    async def _update_job_status(self, job_id: str, status: JobStatusModel) -> asyncio.Future:
+        """
+        Publish a new status of a job to the status feed and en-queue its update in the remote storage. The callback
+        URL of the job (if any) is notified when the job is done or failed.
+
+        :param job_id: job id
+        :param status: the new status (a copy is published and stored, so it can be modified afterwards)
+        :return: a future that resolves when the status is stored
+        """
+        status = status.copy()
+        self.status_feed.publish(job_id, status)
 
-        status_future = await self._job_status_update_queue.enqueue_task(self._storage.set_job_status(job_id, status))
-        await self._get_sheep(sheep_id).jobs_queue.put(job_id)
+        if status.status in (JobStatus.DONE, JobStatus.FAILED) and status.callback_url is not None \
+                and self._webhooks is not None:
+            self._webhooks.notify(status.callback_url, job_id, status)
 
-        # Wait for the status update to finish before returning (this way we can be sure the job was enqueued)
-        await status_future
+        return await self._job_status_update_queue.enqueue_task(self._storage.set_job_status(job_id, status))
+
+    async def _reuse_memoized_result(self, job_id: str, job_meta: ModelModel, callback_url: Optional[str]) -> bool:
+        """
+        Try to finish the given job with outputs of a previous job with identical inputs and model.
+        If no such job is known, remember the job digest so that its results can be reused once it is done.
+
+        :param job_id: job id
+        :param job_meta: job meta data (model name and version)
+        :param callback_url: optional URL that is notified when the job is done
+        :return: True if the job was finished with memoized outputs, False if it has to be processed
+        """
+        try:
+            inputs_digest = await self._storage.get_inputs_digest(job_id)
+        except Exception:
+            logging.exception('Failed to compute the inputs digest of job `%s`', job_id)
+            return False
+
+        if inputs_digest is None:
+            logging.debug('Inputs digest of job `%s` is not available, its result will not be memoized', job_id)
+            return False
+
+        digest = ResultCache.make_digest(inputs_digest, job_meta)
+        memoized_job_id = self._result_cache.get(digest)
+
+        if memoized_job_id is None:
+            self._job_digests[job_id] = digest
+            return False
+
+        try:
+            await self._storage.copy_job_outputs(memoized_job_id, job_id)
+        except Exception:
+            logging.exception('Failed to reuse outputs of job `%s` for job `%s`', memoized_job_id, job_id)
+            self._result_cache.remove(digest)
+            self._job_digests[job_id] = digest
+            return False
+
+        now = datetime.utcnow()
+        status = JobStatusModel({"model": job_meta, "status": JobStatus.DONE, "enqueued_at": now,
+                                 "processing_started_at": now, "finished_at": now, "callback_url": callback_url})
+        await (await self._update_job_status(job_id, status))
+        logging.info('Job `%s` done with memoized outputs of job `%s`', job_id, memoized_job_id)
+
+        # notify about the finished job
+        async with self.job_done_condition:
+            self.job_done_condition.notify_all()
+
+        return True
 
     async def _shepherd_health_check(self) -> None:
         """
@@ -188,6 +339,125 @@ class Shepherd:
                 logging.warning('Failed to check sheep\'s health '  # pragma: no cover
                                 'due to the following exception: %s', str(se))
 
+    async def _watch_job_deadlines(self) -> None:
+        """
+        Periodically fail the jobs which exceed their timeouts (or stall) and restart the runners which process them.
+        """
+        while True:
+            await asyncio.sleep(_DEADLINE_RESOLUTION)
+
+            now = asyncio.get_event_loop().time()
+            expired = [(job_id, 'Job processing timed out after {} seconds'.format(self._job_timeouts.get(job_id)))
+                       for job_id in self._job_deadlines.advance(now)]
+            expired += [(job_id, 'Job processing stalled (the runner reported no progress)')
+                        for job_id in self._job_stall_deadlines.advance(now)]
+
+            for job_id, reason in expired:
+                try:
+                    await self._time_out_job(job_id, reason)
+                except Exception:
+                    logging.exception('Failed to time out job `%s`', job_id)
+
+    def _clear_job_deadlines(self, job_id: str) -> None:
+        """Stop watching the timeout and the progress of the given job."""
+        self._job_deadlines.remove(job_id)
+        self._job_stall_deadlines.remove(job_id)
+
+    def _record_job_progress(self, job_id: str, message: ProgressMessage, sheep: BaseSheep) -> None:
+        """
+        Save the progress reported by the runner to the local job status and postpone the stall deadline of the job
+        if it advanced. Progress messages without any change of the reported progress do not postpone the deadline,
+        as they are sent by the runner event loop, which keeps running even if the job itself hangs.
+
+        :param job_id: id of the job
+        :param message: the progress message
+        :param sheep: the sheep processing the job
+        """
+        status = self._job_status[job_id]
+        previous = (status.progress.percent, status.progress.stage) if status.progress is not None else (None, None)
+        advanced = (message.percent, message.stage) != previous
+
+        # the progress is only kept in the local state, it is not worth a storage update
+        status.progress = JobProgressModel({'percent': message.percent, 'stage': message.stage, 'eta': message.eta,
+                                            'reported_at': datetime.utcnow()})
+
+        if advanced and sheep.stall_timeout is not None:
+            self._job_stall_deadlines.add(job_id, asyncio.get_event_loop().time() + sheep.stall_timeout)
+
+    def _push_job_outputs(self, job_id: str, files: Sequence[ManifestEntry], sheep: BaseSheep) -> None:
+        """
+        Start uploading the output files which the runner finished while the job is still processed.
+
+        :param job_id: id of the job
+        :param files: the finished output files
+        :param sheep: the sheep processing the job
+        """
+        working_directory = path.join(sheep.sheep_data_root, job_id)
+
+        async def push(entry: ManifestEntry) -> bool:
+            async with self._output_upload_slots:
+                return await self._storage.push_job_output(job_id, working_directory, entry)
+
+        uploads = self._output_uploads.setdefault(job_id, [])
+        for entry in files:
+            uploads.append((entry, asyncio.create_task(push(entry))))
+
+    async def _finish_output_uploads(self, job_id: str) -> List[ManifestEntry]:
+        """
+        Wait until the output files of a finished job uploaded in advance are uploaded.
+
+        :param job_id: id of the job
+        :return: the successfully uploaded files (the other ones are uploaded with the whole job)
+        """
+        uploads = self._output_uploads.pop(job_id, [])
+        results = await asyncio.gather(*(task for _, task in uploads), return_exceptions=True)
+
+        uploaded = []
+        for (entry, _), result in zip(uploads, results):
+            if isinstance(result, BaseException):
+                logging.warning('Failed to upload output `%s` of job `%s` in advance: %s', entry.path, job_id, result)
+            elif result:
+                uploaded.append(entry)
+
+        return uploaded
+
+    def _cancel_output_uploads(self, job_id: str) -> None:
+        """
+        Cancel the uploads of the output files of a job which failed or is going to be processed again.
+        The files which were already uploaded are not removed - they remain in the storage until they are overwritten
+        by the next run of the job.
+        """
+        for _, task in self._output_uploads.pop(job_id, []):
+            task.cancel()
+
+    async def _time_out_job(self, job_id: str, reason: str) -> None:
+        """
+        Fail a job which exceeded its timeout (or stalled) and kill the runner processing it. The other jobs sent to
+        the runner are en-queued again, so that they are processed by the restarted runner.
+
+        :param job_id: id of the job
+        :param reason: human-readable reason of the failure
+        """
+        sheep_id = next((sheep_id for sheep_id, sheep in self._sheep.items() if job_id in sheep.in_progress), None)
+        if sheep_id is None:
+            return
+
+        sheep = self._get_sheep(sheep_id)
+        logging.error('Job `%s` on `%s` failed: %s, restarting the runner', job_id, sheep_id, reason)
+
+        sheep.in_progress.remove(job_id)
+        self._slaughter_sheep(sheep_id)
+
+        for other_job_id in sheep.in_progress:
+            logging.info('Re-enqueueing job `%s` interrupted by the runner restart on `%s`', other_job_id, sheep_id)
+            self._clear_job_deadlines(other_job_id)
+            self._cancel_output_uploads(other_job_id)
+            self._job_status[other_job_id].progress = None
+            sheep.jobs_queue.put_nowait(other_job_id)
+        sheep.in_progress = set()
+
+        await self._report_job_failed(job_id, ErrorModel({'message': reason}), sheep)
+
     async def _dequeue_and_feed_jobs(self, sheep_id: str) -> None:
         """
         De-queue jobs, prepare working directories and send ``InputMessage`` to the specified sheep in an end-less
@@ -209,18 +479,24 @@ class Shepherd:
             status = self._job_status[job_id]
             status.status = JobStatus.PROCESSING
             status.processing_started_at = datetime.utcnow()
-            await self._job_status_update_queue.enqueue_task(self._storage.set_job_status(job_id, status.copy()))
+            await self._update_job_status(job_id, status)
 
             # (re)start the sheep if needed
             model = status.model
-            if model.name != sheep.model_name or model.version != sheep.model_version or not sheep.running:
-                logging.info('Job `%s` requires model `%s:%s` on `%s`', job_id, model.name, model.version, sheep_id)
+            recycling_reason = sheep.recycling_reason if sheep.running else None
+            if model.name != sheep.model_name or model.version != sheep.model_version or not sheep.running \
+                    or recycling_reason is not None:
+                if recycling_reason is not None:
+                    logging.info('Recycling the runner of `%s` because %s', sheep_id, recycling_reason)
+                else:
+                    logging.info('Job `%s` requires model `%s:%s` on `%s`', job_id, model.name, model.version,
+                                 sheep_id)
                 # we need to wait for the in-progress jobs which are already in the socket
                 async with self.job_done_condition:
                     await self.job_done_condition.wait_for(lambda: len(sheep.in_progress) == 0)
                 self._slaughter_sheep(sheep_id)
                 try:
-                    self._start_sheep(sheep_id, model.name, model.version)
+                    await self._start_sheep(sheep_id, model.name, model.version)
                 except SheepConfigurationError as sce:
                     error = ErrorModel({
                         'message': 'Failed to start sheep for this job ({})'.format(str(sce))
@@ -240,6 +516,13 @@ class Shepherd:
                     logging.exception("Error encountered when starting sheep `%s` for job `%s`", sheep_id, job_id)
                     continue
 
+            # start measuring the job processing time
+            timeout = self._job_timeouts.setdefault(job_id, sheep.get_job_timeout(model.name))
+            if timeout is not None:
+                self._job_deadlines.add(job_id, asyncio.get_event_loop().time() + timeout)
+            if sheep.stall_timeout is not None:
+                self._job_stall_deadlines.add(job_id, asyncio.get_event_loop().time() + sheep.stall_timeout)
+
             # send the InputMessage to the sheep
             sheep.in_progress.add(job_id)
             logging.info('Sending InputMessage for job `%s` on `%s`', job_id, sheep_id)
@@ -252,6 +535,10 @@ class Shepherd:
         """
         A job has failed - remove the local copy of its data and mark it as failed in the remote storage.
         """
+        self._job_digests.pop(job_id, None)
+        self._job_timeouts.pop(job_id, None)
+        self._clear_job_deadlines(job_id)
+        self._cancel_output_uploads(job_id)
         status = self._job_status.pop(job_id)
         status.status = JobStatus.FAILED
         status.error_details = error
@@ -263,7 +550,8 @@ class Shepherd:
 
         try:
             shutil.rmtree(path.join(sheep.sheep_data_root, job_id), ignore_errors=True)
-            await self._job_status_update_queue.enqueue_task(self._storage.set_job_status(job_id, status.copy()))
+            await self._storage.forget_job(job_id)
+            await self._update_job_status(job_id, status)
         except Exception:
             logging.exception('Error when reporting job `%s` as failed', job_id)
 
@@ -279,22 +567,54 @@ class Shepherd:
             # process the sheep with pending outputs
             for sheep_id in sheep_ids:
                 sheep = self._get_sheep(sheep_id)
-                message = await Messenger.recv(sheep.socket, [DoneMessage, ErrorMessage], noblock=True)
+                message = await Messenger.recv(sheep.socket, [DoneMessage, ErrorMessage, ProgressMessage, OutputMessage],
+                                               noblock=True)
                 job_id = message.job_id
 
+                if job_id not in sheep.in_progress:
+                    logging.warning('Ignoring %s of job `%s` which is not in progress on `%s` (perhaps it timed out)',
+                                    message.message_type, job_id, sheep_id)
+                    continue
+
+                if isinstance(message, ProgressMessage):
+                    self._record_job_progress(job_id, message, sheep)
+                    continue
+
+                if isinstance(message, OutputMessage):
+                    self._push_job_outputs(job_id, message.files, sheep)
+                    continue
+
                 # clean-up the working directory and upload the results
                 working_directory = path.join(self._get_sheep(sheep_id).sheep_data_root, job_id)
-                await self._storage.push_job_data(job_id, working_directory)
+                uploaded = await self._finish_output_uploads(job_id)
+                try:
+                    await self._storage.push_job_data(job_id, working_directory,
+                                                      message.manifest if isinstance(message, DoneMessage) else None,
+                                                      uploaded)
+                except OutputManifestError as ex:
+                    logging.error('Outputs of job `%s` from sheep `%s` are incomplete: %s', job_id, sheep_id, ex)
+                    message = ErrorMessage(dict(job_id=job_id, message=str(ex), rss=message.rss))
+                if self._output_cache is not None and isinstance(message, DoneMessage):
+                    await asyncio.get_event_loop().run_in_executor(None, self._output_cache.add_job, job_id,
+                                                                   working_directory)
                 shutil.rmtree(working_directory)
 
                 # save the done/error file
                 if isinstance(message, DoneMessage):
+                    self._job_timeouts.pop(job_id, None)
+                    self._clear_job_deadlines(job_id)
                     status = self._job_status.pop(job_id)
                     status.status = JobStatus.DONE
+                    status.progress = None
                     status.finished_at = datetime.utcnow()
-                    await self._job_status_update_queue.enqueue_task(self._storage.set_job_status(job_id, status.copy()))
+                    await self._update_job_status(job_id, status)
                     logging.info('Job `%s` from sheep `%s` done', job_id, sheep_id)
 
+                    # remember the job so that its outputs can be reused by jobs with identical inputs
+                    digest = self._job_digests.pop(job_id, None)
+                    if digest is not None:
+                        self._result_cache.put(digest, job_id)
+
                     # notify about the finished job
                     async with self.job_done_condition:
                         self.job_done_condition.notify_all()
@@ -308,6 +628,7 @@ class Shepherd:
                     await self._report_job_failed(job_id, error, sheep)
                     logging.info('Job `%s` from sheep `%s` failed (%s)', job_id, sheep_id, message.message)
 
+                sheep.record_job(message.rss)
                 sheep.in_progress.remove(job_id)
 
     def get_status(self) -> Generator[Tuple[str, SheepModel], None, None]:
@@ -340,6 +661,22 @@ class Shepherd:
 
         return self._job_status.get(job_id)
 
+    def get_cached_output(self, job_id: str, object_name: str,
+                          headers: Optional[Mapping[str, str]] = None) -> Optional[FileDownload]:
+        """
+        Get an output file of a finished job from the local output cache, without querying the remote storage.
+
+        :param job_id: id of the job
+        :param object_name: name of the output object (e.g. ``outputs/output``)
+        :param headers: request headers of the download (conditional and range requests are supported)
+        :return: the download or None if the file is not cached
+        """
+
+        if self._output_cache is None:
+            return None
+
+        return self._output_cache.download(job_id, object_name, headers)
+
     async def is_job_done(self, job_id: str) -> bool:
         """
         Check if the specified job is already done.
@@ -350,9 +687,6 @@ class Shepherd:
         :raise UnknownJobError: if the job is not ready nor it is known to this shepherd
         :return: job ready flag
         """
-        if not await self._storage.job_dir_exists(job_id):
-            raise UnknownJobError()
-
         status = await self._storage.get_job_status(job_id)
 
         return status is not None and status.status in (JobStatus.DONE, JobStatus.FAILED)
@@ -365,6 +699,7 @@ class Shepherd:
         self._slaughter_all()
         self._listener.cancel()
         self._health_checker.cancel()
+        self._deadline_watcher.cancel()
 
         for sheep_tasks in self._sheep_tasks.values():
             for sheep_task in sheep_tasks:
@@ -372,3 +707,6 @@ class Shepherd:
 
         await self._job_status_update_queue.close()
         await self._storage.close()
+
+        if self._webhooks is not None:
+            await self._webhooks.close()
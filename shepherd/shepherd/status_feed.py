@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Set, List, Tuple, AbstractSet
+
+from ..api.models import JobStatusModel
+
+
+class StatusSubscription:
+    """
+    A stream of job status transitions delivered to a single subscriber.
+
+    Transitions are buffered until they are fetched. If the subscriber is too slow and the buffer is full,
+    the oldest transitions are dropped.
+    """
+
+    def __init__(self, feed: 'JobStatusFeed', job_ids: Optional[AbstractSet[str]], max_pending: int):
+        """
+        Create a subscription (use :py:meth:`JobStatusFeed.subscribe` instead).
+
+        :param feed: the feed that publishes the transitions
+        :param job_ids: ids of the jobs of interest (all jobs if None)
+        :param max_pending: maximum number of buffered transitions
+        """
+        self._feed = feed
+        self._job_ids = job_ids
+        self._pending: 'deque[Tuple[str, JobStatusModel]]' = deque()
+        self._max_pending = max_pending
+        self._available = asyncio.Event()
+        self.dropped_count = 0
+
+    def _push(self, job_id: str, status: JobStatusModel) -> None:
+        """Buffer a transition if the subscriber is interested in the job."""
+        if self._job_ids is not None and job_id not in self._job_ids:
+            return
+
+        if len(self._pending) >= self._max_pending:
+            self._pending.popleft()
+            self.dropped_count += 1
+
+        self._pending.append((job_id, status))
+        self._available.set()
+
+    async def get(self, timeout: Optional[float] = None) -> List[Tuple[str, JobStatusModel]]:
+        """
+        Wait for transitions and return all of the buffered ones.
+
+        :param timeout: maximum waiting time in seconds
+        :return: a list of tuples (job id, new status) - empty if the timeout expired
+        """
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        transitions = list(self._pending)
+        self._pending.clear()
+        self._available.clear()
+
+        return transitions
+
+    def close(self) -> None:
+        """Stop receiving transitions."""
+        self._feed.unsubscribe(self)
+
+
+class JobStatusFeed:
+    """
+    Publishes job status transitions to in-process subscribers (e.g. clients of an event stream).
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        """
+        Create a new feed.
+
+        :param max_pending: maximum number of transitions buffered for a single subscriber
+        """
+        self._max_pending = max_pending
+        self._subscriptions: Set[StatusSubscription] = set()
+
+    def subscribe(self, job_ids: Optional[AbstractSet[str]] = None) -> StatusSubscription:
+        """
+        Subscribe to status transitions.
+
+        :param job_ids: ids of the jobs of interest (all jobs if None)
+        :return: a new subscription (it must be closed when it is not needed anymore)
+        """
+        subscription = StatusSubscription(self, job_ids, self._max_pending)
+        self._subscriptions.add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription) -> None:
+        """
+        Cancel a subscription.
+
+        :param subscription: the subscription to be cancelled
+        """
+        self._subscriptions.discard(subscription)
+
+        if subscription.dropped_count > 0:
+            logging.warning('A status feed subscriber missed %d transitions', subscription.dropped_count)
+
+    def publish(self, job_id: str, status: JobStatusModel) -> None:
+        """
+        Publish a status transition to all interested subscribers.
+
+        :param job_id: id of the job
+        :param status: the new status (it must not be modified afterwards)
+        """
+        for subscription in self._subscriptions:
+            subscription._push(job_id, status)
@@ -0,0 +1,81 @@
+import math
+from typing import Dict, Hashable, List
+
+
+class TimerWheel:
+    """
+    A hashed timer wheel tracking deadlines of many keys (e.g. job ids) at once.
+
+    Deadlines are hashed into ``slot_count`` slots by their tick (``resolution`` seconds long), so adding and removing
+    a deadline takes constant time and each advance only inspects the slots of the elapsed ticks. Deadlines further
+    than one revolution ahead share the slots with the nearer ones and are skipped until their round comes.
+    """
+
+    def __init__(self, resolution: float = 1, slot_count: int = 512):
+        """
+        Create an empty wheel.
+
+        :param resolution: length of a tick in seconds (deadlines expire with at most this delay)
+        :param slot_count: number of slots of the wheel
+        """
+        self._resolution = resolution
+        self._slots: List[Dict[Hashable, float]] = [{} for _ in range(slot_count)]
+        self._positions: Dict[Hashable, int] = {}  # key -> index of its slot
+        self._last_tick = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def add(self, key: Hashable, deadline: float) -> None:
+        """
+        Add (or move) the deadline of the given key.
+
+        :param key: the key
+        :param deadline: the deadline (in the time of the clock passed to :py:meth:`advance`)
+        """
+        self.remove(key)
+        tick = math.ceil(deadline / self._resolution)
+        if self._last_tick is not None:
+            tick = max(tick, self._last_tick + 1)  # past deadlines expire in the next tick
+
+        slot = tick % len(self._slots)
+        self._slots[slot][key] = deadline
+        self._positions[key] = slot
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove the deadline of the given key (if any).
+
+        :param key: the key
+        """
+        slot = self._positions.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Advance the wheel to the given time and remove the expired deadlines.
+
+        :param now: the current time
+        :return: keys whose deadlines expired
+        """
+        tick = math.floor(now / self._resolution)
+        first_tick = self._last_tick + 1 if self._last_tick is not None else None
+        self._last_tick = tick
+
+        if first_tick is None or tick - first_tick + 1 >= len(self._slots):
+            slots = range(len(self._slots))  # the first advance or the whole wheel elapsed
+        else:
+            slots = (elapsed_tick % len(self._slots) for elapsed_tick in range(first_tick, tick + 1))
+
+        expired = []
+        for slot in slots:
+            expired += [key for key, deadline in self._slots[slot].items() if deadline <= now]
+
+        for key in expired:
+            self.remove(key)
+
+        return expired
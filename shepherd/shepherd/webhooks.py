@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import os
+import os.path as path
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+from schematics import Model
+from schematics.types import StringType, IntType, FloatType, ModelType
+
+from ..api.models import JobStatusModel
+
+
+class Delivery(Model):
+    """
+    A pending notification of a finished job (persisted in the outbox until it is delivered).
+    """
+    id: str = StringType(required=True)
+    url: str = StringType(required=True)
+    job_id: str = StringType(required=True)
+    status: JobStatusModel = ModelType(JobStatusModel, required=True)  # the final status of the job
+    attempts: int = IntType(default=0)
+    next_attempt: float = FloatType(default=0)  # unix timestamp
+
+
+class WebhookDispatcher:
+    """
+    Delivers job completion notifications to the callback URLs of the jobs.
+
+    Pending deliveries are stored in an outbox directory, so that they survive restarts. Deliveries for the same URL
+    are sent together as a single request with a JSON body ``{"jobs": [{"job_id": ..., "status": {...}}, ...]}``.
+    Failed deliveries are retried with exponential backoff until they succeed or run out of attempts.
+    """
+
+    def __init__(self, outbox_dir: str, batch_size: int = 100, batch_delay: float = 0.5, max_connections: int = 8,
+                 timeout: float = 10, max_attempts: int = 10, retry_delay: float = 1, max_retry_delay: float = 300):
+        """
+        Create a new dispatcher and load the deliveries left in the outbox.
+
+        :param outbox_dir: directory where the pending deliveries are stored
+        :param batch_size: maximum number of notifications sent in a single request
+        :param batch_delay: time (in seconds) for which new deliveries are accumulated before they are sent
+        :param max_connections: maximum number of concurrent requests
+        :param timeout: timeout (in seconds) of a single request
+        :param max_attempts: number of attempts after which a delivery is dropped
+        :param retry_delay: delay (in seconds) before the first retry, doubled with each further attempt
+        :param max_retry_delay: maximum delay (in seconds) between retries
+        """
+        self._outbox_dir = outbox_dir
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+
+        self._deliveries: Dict[str, Delivery] = {}
+        self._in_flight: Set[str] = set()
+        self._requests: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        os.makedirs(outbox_dir, exist_ok=True)
+        for file_name in os.listdir(outbox_dir):
+            file_path = path.join(outbox_dir, file_name)
+            if not file_name.endswith('.json'):
+                os.remove(file_path)  # an unfinished write
+                continue
+
+            try:
+                with open(file_path) as file:
+                    delivery = Delivery(json.load(file))
+                delivery.validate()
+            except Exception:
+                logging.exception('Dropping a corrupted webhook delivery `%s`', file_path)
+                os.remove(file_path)
+                continue
+
+            self._deliveries[delivery.id] = delivery
+
+        if self._deliveries:
+            logging.info('Loaded %d pending webhook deliveries', len(self._deliveries))
+
+    def __len__(self) -> int:
+        return len(self._deliveries)
+
+    async def start(self) -> None:
+        """
+        Start sending the deliveries in the background.
+        """
+        self._wakeup = asyncio.Event()
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self._max_connections),
+                                              timeout=aiohttp.ClientTimeout(total=self._timeout))
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def notify(self, url: str, job_id: str, status: JobStatusModel) -> None:
+        """
+        Store a notification about a finished job in the outbox and schedule its delivery.
+
+        :param url: callback URL of the job
+        :param job_id: id of the job
+        :param status: the final status of the job
+        """
+        delivery = Delivery(dict(id=uuid.uuid4().hex, url=url, job_id=job_id, status=status.copy()))
+        self._save(delivery)
+        self._deliveries[delivery.id] = delivery
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _save(self, delivery: Delivery) -> None:
+        """Atomically write a delivery to the outbox."""
+        file_path = path.join(self._outbox_dir, delivery.id + '.json')
+        with open(file_path + '.tmp', 'w') as file:
+            json.dump(delivery.to_primitive(), file)
+        os.replace(file_path + '.tmp', file_path)
+
+    def _remove(self, delivery: Delivery) -> None:
+        """Remove a finished delivery from the outbox."""
+        del self._deliveries[delivery.id]
+        try:
+            os.remove(path.join(self._outbox_dir, delivery.id + '.json'))
+        except FileNotFoundError:
+            pass
+
+    async def _dispatch(self) -> None:
+        """
+        Send the due deliveries (grouped by their URLs) in an endless loop.
+        """
+        while True:
+            waiting = [delivery.next_attempt for delivery_id, delivery in self._deliveries.items()
+                       if delivery_id not in self._in_flight]
+            timeout = max(0., min(waiting) - time.time()) if waiting else None
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            # let more notifications accumulate, so that they can be sent together
+            await asyncio.sleep(self._batch_delay)
+
+            now = time.time()
+            batches: Dict[str, List[Delivery]] = defaultdict(list)
+            for delivery_id, delivery in self._deliveries.items():
+                if delivery_id not in self._in_flight and delivery.next_attempt <= now:
+                    batches[delivery.url].append(delivery)
+
+            for url, deliveries in batches.items():
+                for start in range(0, len(deliveries), self._batch_size):
+                    batch = deliveries[start:start + self._batch_size]
+                    self._in_flight.update(delivery.id for delivery in batch)
+                    request = asyncio.create_task(self._send(url, batch))
+                    self._requests.add(request)
+                    request.add_done_callback(self._requests.discard)
+
+    async def _send(self, url: str, batch: List[Delivery]) -> None:
+        """
+        Send a batch of deliveries to the given URL and either remove them from the outbox or schedule a retry.
+
+        :param url: the callback URL
+        :param batch: the deliveries to be sent
+        """
+        payload = {'jobs': [{'job_id': delivery.job_id, 'status': delivery.status.to_primitive()}
+                            for delivery in batch]}
+        delivered = False
+
+        try:
+            async with self._session.post(url, json=payload) as response:
+                delivered = response.status < 300
+                if not delivered:
+                    logging.warning('Webhook `%s` responded with status %d', url, response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logging.warning('Failed to call webhook `%s`: %s', url, str(error) or type(error).__name__)
+
+        for delivery in batch:
+            self._in_flight.discard(delivery.id)
+
+            if delivery.id not in self._deliveries:
+                continue
+
+            if delivered:
+                self._remove(delivery)
+                continue
+
+            delivery.attempts += 1
+            if delivery.attempts >= self._max_attempts:
+                logging.error('Giving up notifying `%s` about job `%s` after %d attempts',
+                              url, delivery.job_id, delivery.attempts)
+                self._remove(delivery)
+            else:
+                delivery.next_attempt = time.time() + min(self._retry_delay * 2 ** (delivery.attempts - 1),
+                                                          self._max_retry_delay)
+                self._save(delivery)
+
+        self._wakeup.set()
+
+    async def close(self) -> None:
+        """
+        Stop sending the deliveries. The undelivered ones stay in the outbox and are sent after the next start.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+
+        for request in list(self._requests):
+            request.cancel()
+        await asyncio.gather(*self._requests, return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
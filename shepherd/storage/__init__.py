@@ -1,4 +1,7 @@
-from .storage import Storage
+from .storage import Storage, FileDownload
 from .minio_storage import MinioStorage
+from .memory_storage import InMemoryStorage
+from .input_cache import InputCache
+from .output_cache import OutputCache
 
-__all__ = ['Storage', 'MinioStorage']
+__all__ = ['Storage', 'FileDownload', 'MinioStorage', 'InMemoryStorage', 'InputCache', 'OutputCache']
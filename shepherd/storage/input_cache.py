@@ -0,0 +1,171 @@
+import os
+import re
+import time
+import shutil
+import logging
+from collections import OrderedDict
+from os import path
+from typing import Optional, Tuple
+
+
+class InputCache:
+    """
+    A content-addressed on-disk cache of job input files shared by all sheep of a shepherd.
+
+    Cached files are identified by a content key (e.g. an ETag and a size of the remote object) and they are placed
+    into job working directories as hardlinks, so the cache must reside on the same filesystem as the sheep data roots.
+    The files are evicted in the least-recently-used order when the total size of the cache exceeds the configured
+    limit.
+
+    Runners should not modify their inputs in place, as a hardlinked file shares its content with the cache. Since
+    file modes do not stop privileged runners, the size and modification time of each cached file are recorded and
+    a file that changed since is evicted instead of being linked to another job.
+    """
+
+    def __init__(self, cache_root: str, max_bytes: int):
+        """
+        Initialize the cache and index the files that are already cached in ``cache_root``.
+
+        :param cache_root: directory where the cached files are stored
+        :param max_bytes: maximum total size of the cached files
+        """
+
+        self._cache_root = cache_root
+        self._max_bytes = max_bytes
+        self._size = 0
+        # key -> (file size, modification time in ns), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[int, int]]' = OrderedDict()
+
+        os.makedirs(cache_root, exist_ok=True)
+
+        cached_files = []
+        for entry in os.scandir(cache_root):
+            if entry.is_file():
+                stat = entry.stat()
+                cached_files.append((stat.st_mtime_ns, entry.name, stat.st_size))
+
+        for mtime_ns, name, size in sorted(cached_files):
+            self._entries[name] = (size, mtime_ns)
+            self._size += size
+
+        self._evict()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached files in bytes."""
+        return self._size
+
+    @staticmethod
+    def make_key(etag: str, size: int) -> str:
+        """
+        Create a cache key (a file name) identifying the content of a remote object.
+
+        >>> InputCache.make_key('"d41d8cd98f00b204e9800998ecf8427e"', 0)
+        'd41d8cd98f00b204e9800998ecf8427e-0'
+
+        :param etag: ETag of the object
+        :param size: size of the object in bytes
+        :return: the cache key
+        """
+
+        return re.sub(r'[^0-9A-Za-z_-]', '', etag) + '-' + str(size)
+
+    def _path(self, key: str) -> str:
+        """Get the path of a cached file."""
+        return path.join(self._cache_root, key)
+
+    def _touch(self, key: str) -> int:
+        """
+        Set the modification time of a cached file to the current time (with a full precision, which is unlikely to be
+        matched by a later write to the file).
+
+        :param key: the cache key
+        :return: the new modification time in ns
+        """
+        mtime_ns = time.time_ns()
+        os.utime(self._path(key), ns=(mtime_ns, mtime_ns))
+        return mtime_ns
+
+    def _remove(self, key: str) -> None:
+        """Remove a file from the cache."""
+        size, _ = self._entries.pop(key)
+        self._size -= size
+
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def link(self, key: str, destination_path: str) -> bool:
+        """
+        Hardlink a cached file to the given destination (if it is cached). The file is copied if it cannot be
+        hardlinked (e.g. the destination is on another filesystem). Files that were modified since they were cached
+        are evicted.
+
+        :param key: the cache key
+        :param destination_path: path of the new link
+        :return: True if the file was cached and linked, False otherwise
+        """
+
+        if key not in self._entries:
+            return False
+
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:  # the file was removed behind our back
+            self._remove(key)
+            return False
+
+        if (stat.st_size, stat.st_mtime_ns) != self._entries[key]:
+            logging.warning('Cached input `%s` was modified (probably by a runner), evicting it', key)
+            self._remove(key)
+            return False
+
+        try:
+            os.link(self._path(key), destination_path)
+        except FileNotFoundError:  # the file was removed behind our back
+            self._remove(key)
+            return False
+        except OSError:
+            logging.warning('Failed to hardlink `%s` from the input cache, copying it instead', destination_path)
+            shutil.copyfile(self._path(key), destination_path)
+
+        self._entries[key] = (stat.st_size, self._touch(key))
+        self._entries.move_to_end(key)
+
+        return True
+
+    def add(self, key: str, source_path: str) -> None:
+        """
+        Add a file to the cache. The file is hardlinked into the cache (its mode is left intact), not copied.
+
+        :param key: the cache key
+        :param source_path: path of the file to be cached
+        """
+
+        if key in self._entries:
+            return
+
+        size = os.stat(source_path).st_size
+        if size > self._max_bytes:
+            return
+
+        try:
+            os.link(source_path, self._path(key))
+        except FileExistsError:
+            pass
+        except OSError:
+            logging.warning('Failed to hardlink `%s` into the input cache, copying it instead', source_path)
+            shutil.copyfile(source_path, self._path(key))
+
+        self._entries[key] = (size, self._touch(key))
+        self._size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used files until the cache fits in the size limit."""
+
+        while self._size > self._max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            logging.debug('Evicted `%s` from the input cache', key)
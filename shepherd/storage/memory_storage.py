@@ -0,0 +1,354 @@
+import json
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from os import path
+from io import BytesIO
+from typing import Optional, BinaryIO, Dict, Iterable, Mapping, AsyncIterable, Sequence
+
+from .storage import Storage
+from ..errors.api import StorageError, NameConflictError, UnknownJobError
+from ..constants import JOB_STATUS_FILE, INPUT_DIR, OUTPUT_DIR, INPUT_ARCHIVE, OUTPUT_ARCHIVE, ZSTD_SUFFIX
+from ..utils.archive import extract_archive, create_archive
+from ..utils.manifest import build_manifest, manifest_file_path, verify_manifest, is_unchanged
+from ..api.downloads import FileDownload, make_file_download
+from ..api.models import JobStatusModel
+from ..comm.messages import ManifestEntry
+
+
+_FOLDER_DELIMITER = '/'
+"""Object name folder delimiter (the same one as in Minio)."""
+
+
+class InMemoryStorage(Storage):
+    """
+    An ephemeral storage that keeps all job data in the memory of the shepherd process.
+
+    Useful for small latency-critical jobs (no HTTP round-trips are made) and as a baseline for benchmarks.
+    The total size of the stored objects is limited by a byte budget - when it is exceeded, whole jobs are evicted
+    in the least-recently-used order.
+    """
+
+    def __init__(self, byte_budget: Optional[int] = None):
+        """
+        Initialize the storage.
+
+        :param byte_budget: maximum total size of the stored objects in bytes (unlimited if None)
+        """
+
+        self._byte_budget = byte_budget
+        self._size = 0
+        self._jobs: 'OrderedDict[str, Dict[str, bytes]]' = OrderedDict()
+        self._packed_jobs: Dict[str, bool] = {}  # jobs with packed inputs (mapped to the zstd compression flag)
+
+    @property
+    def size(self) -> int:
+        """Total size of the stored objects in bytes."""
+        return self._size
+
+    def _get_job(self, job_id: str) -> Dict[str, bytes]:
+        """
+        Get the objects of a job and mark the job as recently used.
+
+        :param job_id: identifier of the job
+        :raises StorageError: the job does not exist
+        """
+
+        try:
+            objects = self._jobs[job_id]
+        except KeyError:
+            raise StorageError(f"Job directory for `{job_id}` does not exist")
+
+        self._jobs.move_to_end(job_id)
+        return objects
+
+    def _evict(self, keep_job_id: str) -> None:
+        """
+        Evict the least recently used jobs until the stored objects fit in the byte budget.
+
+        :param keep_job_id: a job that must not be evicted (the one being written)
+        :raises StorageError: the budget cannot be satisfied without evicting ``keep_job_id``
+        """
+
+        if self._byte_budget is None:
+            return
+
+        for job_id in list(self._jobs.keys()):
+            if self._size <= self._byte_budget:
+                return
+
+            if job_id == keep_job_id:
+                continue
+
+            objects = self._jobs.pop(job_id)
+            self._size -= sum(map(len, objects.values()))
+            logging.warning('Evicting job `%s` from the in-memory storage', job_id)
+
+        if self._size > self._byte_budget:
+            raise StorageError(f"Data of job `{keep_job_id}` do not fit in the in-memory storage")
+
+    def _put_object(self, job_id: str, object_name: str, data: bytes) -> None:
+        """
+        Store an object and enforce the byte budget.
+
+        :param job_id: the job to which the object belongs
+        :param object_name: the name of the new object
+        :param data: the object data
+        :raises StorageError: the data of the job would not fit in the byte budget (nothing is evicted then)
+        """
+
+        objects = self._get_job(job_id)
+        previous = objects.get(object_name)
+        growth = len(data) - len(previous or b"")
+
+        # check the job itself first so that no other job is evicted in vain
+        if self._byte_budget is not None and sum(map(len, objects.values())) + growth > self._byte_budget:
+            raise StorageError(f"Data of job `{job_id}` do not fit in the in-memory storage")
+
+        self._size += growth
+        objects[object_name] = data
+
+        try:
+            self._evict(job_id)
+        except StorageError:
+            self._size -= growth
+            if previous is None:
+                del objects[object_name]
+            else:
+                objects[object_name] = previous
+            raise
+
+    def _list_objects(self, job_id: str, prefix: str = "") -> Iterable[str]:
+        """
+        List the names of the objects of a job.
+
+        :param job_id: the job to list
+        :param prefix: only list objects whose names start with this prefix
+        :return: a list of object names
+        """
+
+        return [name for name in self._get_job(job_id).keys() if name.startswith(prefix)]
+
+    async def is_accessible(self) -> bool:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.is_accessible`.
+        """
+
+        return True
+
+    async def init_job(self, job_id: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.init_job`.
+        """
+
+        if job_id in self._jobs:
+            raise NameConflictError("A job with this ID was already submitted")
+
+        self._jobs[job_id] = {}
+
+    async def job_dir_exists(self, job_id: str) -> bool:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.job_dir_exists`.
+        """
+
+        return job_id in self._jobs
+
+    async def pull_job_data(self, job_id: str, target_directory: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.pull_job_data`.
+
+        Packed inputs (``inputs.tar`` or ``inputs.tar.zst``) are extracted into the ``inputs`` folder.
+        Outputs of jobs with packed inputs are packed as well.
+        """
+        logging.debug('Pulling in-memory job `%s` to dir `%s`', job_id, target_directory)
+
+        objects = self._get_job(job_id)
+        pulled_count = 0
+
+        for object_name in self._list_objects(job_id, INPUT_DIR):
+            if object_name in (INPUT_ARCHIVE, INPUT_ARCHIVE + ZSTD_SUFFIX):
+                filepath = path.join(target_directory, object_name)
+            elif object_name.startswith(INPUT_DIR + _FOLDER_DELIMITER):
+                filepath = path.join(target_directory, *object_name.split(_FOLDER_DELIMITER))
+            else:
+                continue
+
+            os.makedirs(path.dirname(filepath), exist_ok=True)
+
+            with open(filepath, "wb") as file:
+                file.write(objects[object_name])
+
+            if object_name.startswith(INPUT_ARCHIVE):
+                self._packed_jobs[job_id] = object_name.endswith(ZSTD_SUFFIX)
+                extract_archive(filepath, path.join(target_directory, INPUT_DIR))
+                os.remove(filepath)
+
+            pulled_count += 1
+
+        if pulled_count == 0:
+            logging.warning('No input objects pulled for job `%s`. Make sure they are in the `inputs/` folder.',
+                            job_id)
+
+    async def push_job_data(self, job_id: str, source_directory: str,
+                            manifest: Optional[Sequence[ManifestEntry]] = None,
+                            uploaded: Optional[Sequence[ManifestEntry]] = None) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.push_job_data`.
+
+        The outputs are packed in an ``outputs.tar`` (or ``outputs.tar.zst``) archive if the inputs were packed.
+        """
+        logging.debug('Pushing dir `%s` to in-memory job `%s`', source_directory, job_id)
+
+        compressed = self._packed_jobs.pop(job_id, None)
+        self._get_job(job_id)
+        output_directory = path.join(source_directory, OUTPUT_DIR)
+
+        if compressed is not None:
+            if manifest is not None:
+                verify_manifest(output_directory, manifest)
+
+            archive_name = OUTPUT_ARCHIVE + (ZSTD_SUFFIX if compressed else "")
+            archive_path = path.join(source_directory, archive_name)
+            if create_archive(output_directory, archive_path, compressed) == 0:
+                logging.warning('No output files pushed for job `%s`. Make sure they are in the `outputs/` folder.',
+                                job_id)
+
+            with open(archive_path, "rb") as source:
+                self._put_object(job_id, archive_name, source.read())
+
+            return
+
+        if manifest is None:
+            manifest = build_manifest(output_directory)
+        else:
+            verify_manifest(output_directory, manifest)
+
+        uploaded = {uploaded_entry.path: uploaded_entry for uploaded_entry in uploaded or []}
+
+        for entry in manifest:
+            if entry.path in uploaded and is_unchanged(entry, uploaded[entry.path]):
+                continue
+
+            with open(manifest_file_path(output_directory, entry), "rb") as source:
+                self._put_object(job_id, OUTPUT_DIR + _FOLDER_DELIMITER + entry.path, source.read())
+
+        if len(manifest) == 0:
+            logging.warning('No output files pushed for job `%s`. Make sure they are in the `outputs/` folder.',
+                            job_id)
+
+    async def push_job_output(self, job_id: str, source_directory: str, entry: ManifestEntry) -> bool:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.push_job_output`.
+
+        Nothing is stored if the outputs are going to be packed.
+        """
+
+        if job_id in self._packed_jobs:
+            return False
+
+        self._get_job(job_id)
+        output_directory = path.join(source_directory, OUTPUT_DIR)
+        verify_manifest(output_directory, [entry])
+
+        with open(manifest_file_path(output_directory, entry), "rb") as source:
+            self._put_object(job_id, OUTPUT_DIR + _FOLDER_DELIMITER + entry.path, source.read())
+
+        return True
+
+    async def forget_job(self, job_id: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.forget_job`.
+        """
+
+        self._packed_jobs.pop(job_id, None)
+
+    async def put_file(self, job_id: str, file_path: str, stream: BinaryIO, length: int) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.put_file`.
+        """
+
+        self._put_object(job_id, file_path, stream.read(length))
+
+    async def put_file_stream(self, job_id: str, file_path: str, stream: AsyncIterable[bytes],
+                              length: Optional[int] = None) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.put_file_stream`.
+        """
+
+        self._put_object(job_id, file_path, b"".join([chunk async for chunk in stream]))
+
+    async def get_file(self, job_id: str, file_path: str) -> Optional[BinaryIO]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.get_file`.
+        """
+
+        if job_id not in self._jobs:
+            return None
+
+        data = self._get_job(job_id).get(file_path)
+
+        return BytesIO(data) if data is not None else None
+
+    async def download_file(self, job_id: str, file_path: str,
+                            headers: Optional[Mapping[str, str]] = None) -> Optional[FileDownload]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.download_file`.
+
+        Only single byte ranges and ETag conditions are supported.
+        """
+
+        if job_id not in self._jobs:
+            return None
+
+        data = self._get_job(job_id).get(file_path)
+
+        if data is None:
+            return None
+
+        return make_file_download(BytesIO(data), len(data), '"' + hashlib.md5(data).hexdigest() + '"', headers)
+
+    async def set_job_status(self, job_id: str, status: JobStatusModel) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.set_job_status`.
+        """
+
+        try:
+            self._put_object(job_id, JOB_STATUS_FILE, json.dumps(status.to_primitive()).encode())
+        except StorageError as se:
+            raise StorageError(f"Failed to update status of job `{job_id}`") from se
+
+    async def get_job_status(self, job_id: str) -> JobStatusModel:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.get_job_status`.
+        """
+
+        data = self._jobs.get(job_id, {}).get(JOB_STATUS_FILE)
+
+        if data is None:
+            raise UnknownJobError('Data for job `{}` does not exist'.format(job_id))
+
+        return JobStatusModel(json.loads(data))
+
+    async def get_inputs_digest(self, job_id: str) -> Optional[str]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.get_inputs_digest`.
+        """
+
+        objects = self._get_job(job_id)
+        digest = hashlib.sha256()
+
+        for object_name in sorted(self._list_objects(job_id, INPUT_DIR)):
+            digest.update(object_name.encode() + b"\0" + hashlib.sha256(objects[object_name]).digest())
+
+        return digest.hexdigest()
+
+    async def copy_job_outputs(self, source_job_id: str, target_job_id: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.copy_job_outputs`.
+        """
+
+        source_objects = self._get_job(source_job_id)
+
+        for object_name in self._list_objects(source_job_id, OUTPUT_DIR):
+            self._put_object(target_job_id, object_name, source_objects[object_name])
@@ -1,29 +1,61 @@
 import json
 import os
+import hashlib
 import asyncio
 import logging
-from asyncio import StreamReader
+import tempfile
 from os import path
 from io import BytesIO
-from typing import Optional, BinaryIO, AsyncIterable
+from typing import Optional, BinaryIO, AsyncIterable, Dict, Tuple, NamedTuple, Mapping, Sequence, Set
 from xml.etree import ElementTree
 
 from aiohttp.typedefs import LooseHeaders
 import aiohttp
 from aiohttp.client_exceptions import ClientError as AioHTTPClientError
-from minio.helpers import get_target_url, get_md5_base64digest, get_sha256_hexdigest
-from minio.signer import sign_v4
+from minio.helpers import get_md5_base64digest, get_sha256_hexdigest, encode_object_name
 
 from .storage import Storage
+from .signer import RequestSigner
+from .input_cache import InputCache
 from ..config import StorageConfig
 from ..errors.api import StorageError, StorageInaccessibleError, NameConflictError, UnknownJobError
-from ..constants import JOB_STATUS_FILE, INPUT_DIR, OUTPUT_DIR
+from ..constants import JOB_STATUS_FILE, INPUT_DIR, OUTPUT_DIR, INPUT_ARCHIVE, OUTPUT_ARCHIVE, ZSTD_SUFFIX
+from ..utils.archive import extract_archive, create_archive
+from ..utils.manifest import build_manifest, manifest_file_path, verify_manifest, is_unchanged
+from ..api.downloads import FileDownload, AsyncStream, DOWNLOAD_REQUEST_HEADERS, DOWNLOAD_RESPONSE_HEADERS
 from ..api.models import JobStatusModel
+from ..comm.messages import ManifestEntry
 
 
 _MINIO_FOLDER_DELIMITER = '/'
 """Minio folder delimiter."""
 
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+"""Size of chunks read from spooled uploads."""
+
+_UPLOAD_SPOOL_SIZE = 8 * 1024 ** 2
+"""Maximum size of an upload of unknown length that is spooled in memory (larger ones are spooled to the disk)."""
+
+
+class _ObjectInfo(NamedTuple):
+    """Information about a remote object obtained from a bucket listing."""
+    name: str
+    etag: Optional[str]
+    size: int
+
+
+class _ResponseStream(AsyncStream):
+    """Body of a minio response that releases the connection when it is closed."""
+
+    def __init__(self, response: aiohttp.ClientResponse):
+        self._response = response
+
+    async def read(self, size: int = -1) -> bytes:
+        return await self._response.content.read(size)
+
+    def close(self) -> None:
+        self._response.release()
+
 
 class MinioStorage(Storage):
     """
@@ -34,15 +66,24 @@ class MinioStorage(Storage):
         "s3": "http://s3.amazonaws.com/doc/2006-03-01/"
     }
 
-    def __init__(self, storage_config: StorageConfig):
+    _NOT_FOUND_ERROR_CODES = ("NoSuchBucket", "NoSuchKey")
+    """S3 error codes which signify that the requested bucket/object does not exist."""
+
+    def __init__(self, storage_config: StorageConfig, input_cache: Optional[InputCache] = None):
         """
         Initialize the storage according to the configuration.
 
         :param storage_config: storage configuration
+        :param input_cache: optional local cache of the job input files
         """
 
         self._session = aiohttp.ClientSession()
         self._config = storage_config
+        self._signer = RequestSigner(storage_config.url, storage_config.access_key, storage_config.secret_key)
+        self._public_signer = RequestSigner(storage_config.public_url or storage_config.url,
+                                            storage_config.access_key, storage_config.secret_key)
+        self._packed_jobs: Dict[str, bool] = {}  # jobs with packed inputs (mapped to the zstd compression flag)
+        self._input_cache = input_cache
 
     @staticmethod
     def _ensure_user_agent_header(headers: Optional[LooseHeaders] = None) -> LooseHeaders:
@@ -54,24 +95,40 @@ class MinioStorage(Storage):
 
         return headers
 
-    def _ensure_auth_headers(self, method: str, url: str, headers: Optional[LooseHeaders] = None,
-                             content_sha256: Optional[str] = None) -> LooseHeaders:
+    def _prepare_request(self, method: str, bucket: Optional[str] = None, object_name: Optional[str] = None,
+                         query: Optional[Dict[str, str]] = None, headers: Optional[LooseHeaders] = None,
+                         content_sha256: Optional[str] = None) -> Tuple[str, LooseHeaders]:
         """
-        Make sure that given header set contains all headers required for a successful authentication.
+        Build the target URL of a request and make sure that given header set contains all headers required for
+        a successful authentication.
+
+        :return: a tuple (target URL, headers)
         """
 
         headers = self._ensure_user_agent_header(headers)
 
-        return sign_v4(method.upper(), url, "us-east-1", headers, self._config.access_key, self._config.secret_key,
-                       content_sha256=content_sha256)
+        return self._signer.sign(method.upper(), bucket, object_name, query, headers, content_sha256=content_sha256)
+
+    @staticmethod
+    def _get_error_code(error_xml: str) -> Optional[str]:
+        """
+        Extract the error code from an S3 error response.
+
+        :param error_xml: body of the error response
+        :return: the error code (e.g. ``NoSuchKey``) or None if the body is not a valid error response
+        """
+
+        try:
+            return ElementTree.fromstring(error_xml).findtext("Code")
+        except ElementTree.ParseError:
+            return None
 
     async def init_job(self, job_id: str):
         """
         Implementation of :py:meth:`shepherd.storage.Storage.init_job`.
         """
 
-        url = get_target_url(self._config.url, bucket_name=job_id)
-        headers = self._ensure_auth_headers("PUT", url)
+        url, headers = self._prepare_request("PUT", job_id)
 
         try:
             response = await self._session.put(url, headers=headers)
@@ -89,8 +146,7 @@ class MinioStorage(Storage):
         Implementation of :py:meth:`shepherd.storage.Storage.is_accessible`.
         """
 
-        url = get_target_url(self._config.url, "does-not-matter")
-        headers = self._ensure_auth_headers('HEAD', url)
+        url, headers = self._prepare_request('HEAD', "does-not-matter")
 
         try:
             await self._session.head(url, headers=headers)
@@ -103,8 +159,7 @@ class MinioStorage(Storage):
         Implementation of :py:meth:`shepherd.storage.Storage.job_data_exists`.
         """
 
-        url = get_target_url(self._config.url, job_id)
-        headers = self._ensure_auth_headers('HEAD', url)
+        url, headers = self._prepare_request('HEAD', job_id)
 
         try:
             response = await self._session.head(url, headers=headers)
@@ -113,40 +168,60 @@ class MinioStorage(Storage):
 
         return response.status == 200
 
-    async def _list_bucket(self, bucket: str) -> AsyncIterable[str]:
+    async def _list_bucket(self, bucket: str, prefix: Optional[str] = None) -> AsyncIterable[_ObjectInfo]:
         """
-        List the names of all files in a bucket.
+        List all files in a bucket (using ListObjectsV2).
+        The listing is filtered on the server side and each page is parsed incrementally as it is received.
 
         :param bucket: the bucket to list
-        :return: a generator of file names
+        :param prefix: only list files whose names start with this prefix
+        :return: a generator of file information (name, ETag and size)
         """
 
+        contents_tag = "{%s}Contents" % self._NS["s3"]
+        truncated_tag = "{%s}IsTruncated" % self._NS["s3"]
+        token_tag = "{%s}NextContinuationToken" % self._NS["s3"]
+
         continuation_token = None
         truncated = True
 
         while truncated:
-            query = {}
+            query = {"list-type": "2", "max-keys": str(self._config.list_max_keys)}
+            if prefix is not None:
+                query["prefix"] = prefix
             if continuation_token is not None:
                 query["continuation-token"] = continuation_token
 
-            url = get_target_url(self._config.url, bucket_name=bucket, query=query)
-            headers = self._ensure_auth_headers("GET", url)
+            url, headers = self._prepare_request("GET", bucket, query=query)
+            truncated = False
+            continuation_token = None
 
             try:
-                response = await self._session.get(url, headers=headers)
+                async with self._session.get(url, headers=headers) as response:
+                    if response.status != 200:
+                        raise StorageError(f"Listing minio bucket `{bucket}` failed")
+
+                    parser = ElementTree.XMLPullParser(events=("end",))
+
+                    async for chunk in response.content.iter_any():
+                        parser.feed(chunk)
+
+                        for _, element in parser.read_events():
+                            if element.tag == contents_tag:
+                                yield _ObjectInfo(element.findtext("s3:Key", namespaces=self._NS),
+                                                  element.findtext("s3:ETag", namespaces=self._NS),
+                                                  int(element.findtext("s3:Size", "0", namespaces=self._NS)))
+                                element.clear()
+                            elif element.tag == truncated_tag:
+                                truncated = element.text == "true"
+                            elif element.tag == token_tag:
+                                continuation_token = element.text
+
+                    parser.close()
             except AioHTTPClientError as ce:
                 raise StorageInaccessibleError() from ce
-
-            if response.status != 200:
-                raise StorageError(f"Listing minio bucket `{bucket}` failed")
-
-            tree = ElementTree.fromstring(await response.text())
-
-            for key in map(lambda el: el.text, tree.findall(".//s3:Key", self._NS)):
-                yield key
-
-            truncated = tree.find("s3:IsTruncated", self._NS).text != "false"
-            continuation_token = tree.find("s3:NextContinuationToken", self._NS)
+            except ElementTree.ParseError as pe:
+                raise StorageError(f"Listing minio bucket `{bucket}` returned an invalid response") from pe
 
     async def _get_object(self, bucket: str, object_name: str, destination: BinaryIO) -> None:
         """
@@ -156,8 +231,7 @@ class MinioStorage(Storage):
         :param object_name: the path to the object
         """
 
-        url = get_target_url(self._config.url, bucket_name=bucket, object_name=object_name)
-        headers = self._ensure_auth_headers("GET", url)
+        url, headers = self._prepare_request("GET", bucket, object_name)
 
         try:
             async with self._session.get(url, headers=headers) as response:
@@ -186,9 +260,55 @@ class MinioStorage(Storage):
         with open(destination_path, "wb") as destination:
             await self._get_object(bucket, object_name, destination)
 
+    async def _pull_object(self, bucket: str, object_info: _ObjectInfo, destination_path: str) -> None:
+        """
+        Download a remote object into a file identified by a path, or hardlink it from the input cache if possible.
+
+        :param bucket: the bucket where the object is stored
+        :param object_info: information about the object
+        :param destination_path: where the object should be stored
+        """
+
+        if self._input_cache is None or not object_info.etag:
+            await self._download_object(bucket, object_info.name, destination_path)
+            return
+
+        cache_key = InputCache.make_key(object_info.etag, object_info.size)
+
+        if self._input_cache.link(cache_key, destination_path):
+            logging.debug('Input `%s/%s` found in the input cache', bucket, object_info.name)
+            return
+
+        await self._download_object(bucket, object_info.name, destination_path)
+        self._input_cache.add(cache_key, destination_path)
+
+    async def _pull_archive(self, bucket: str, object_info: _ObjectInfo, target_directory: str) -> None:
+        """
+        Download a tar archive with job inputs and extract it into the ``inputs`` folder of a local directory.
+
+        :param bucket: the bucket where the archive is stored
+        :param object_info: information about the archive object
+        :param target_directory: the job directory where the inputs should be extracted
+        """
+
+        archive_name = object_info.name
+        archive_path = path.join(target_directory, archive_name)
+        await self._pull_object(bucket, object_info, archive_path)
+
+        try:
+            extracted_count = await asyncio.get_event_loop().run_in_executor(
+                None, extract_archive, archive_path, path.join(target_directory, INPUT_DIR))
+        finally:
+            os.remove(archive_path)
+
+        logging.debug('Extracted %s input files from `%s/%s`', extracted_count, bucket, archive_name)
+
     async def pull_job_data(self, job_id: str, target_directory: str) -> None:
         """
         Implementation of :py:meth:`shepherd.storage.Storage.pull_job_data`.
+
+        Inputs can be stored either as separate objects in the ``inputs/`` folder or packed in an ``inputs.tar``
+        (or zstd compressed ``inputs.tar.zst``) archive. Outputs of jobs with packed inputs are packed as well.
         """
         logging.debug('Pulling minio bucket `%s` to dir `%s`', job_id, target_directory)
 
@@ -198,11 +318,18 @@ class MinioStorage(Storage):
         pulled_count = 0
         tasks = []
 
-        async for file_name in self._list_bucket(job_id):
-            if file_name.startswith(INPUT_DIR + _MINIO_FOLDER_DELIMITER):
+        # list both the `inputs/` folder and the `inputs.tar(.zst)` archives in a single listing
+        async for object_info in self._list_bucket(job_id, prefix=INPUT_DIR):
+            file_name = object_info.name
+
+            if file_name in (INPUT_ARCHIVE, INPUT_ARCHIVE + ZSTD_SUFFIX):
+                self._packed_jobs[job_id] = file_name.endswith(ZSTD_SUFFIX)
+                tasks.append(self._pull_archive(job_id, object_info, target_directory))
+                pulled_count += 1
+            elif file_name.startswith(INPUT_DIR + _MINIO_FOLDER_DELIMITER):
                 filepath = path.join(*file_name.split(_MINIO_FOLDER_DELIMITER))
                 os.makedirs(path.join(target_directory, path.dirname(filepath)), exist_ok=True)
-                tasks.append(self._download_object(job_id, file_name, path.join(target_directory, filepath)))
+                tasks.append(self._pull_object(job_id, object_info, path.join(target_directory, filepath)))
                 pulled_count += 1
 
         await asyncio.gather(*tasks)
@@ -221,8 +348,6 @@ class MinioStorage(Storage):
         :param length: the length of the data
         """
 
-        url = get_target_url(self._config.url, bucket_name=bucket, object_name=object_name)
-
         headers = self._ensure_user_agent_header({
             "Content-Length": str(length),
             "Content-Type": "application/octet-stream"
@@ -235,7 +360,8 @@ class MinioStorage(Storage):
             headers["Content-Md5"] = get_md5_base64digest(data)
             content_sha256 = "UNSIGNED-PAYLOAD"
 
-        headers = self._ensure_auth_headers("PUT", url, headers, content_sha256=content_sha256)
+        url, headers = self._prepare_request("PUT", bucket, object_name, headers=headers,
+                                             content_sha256=content_sha256)
 
         try:
             response = await self._session.put(url, data=data, headers=headers)
@@ -245,6 +371,44 @@ class MinioStorage(Storage):
         if response.status != 200:
             raise StorageError(f"Failed to upload object `{bucket}/{object_name}`")
 
+    async def _put_stream(self, bucket: str, object_name: str, content: AsyncIterable[bytes], length: int) -> None:
+        """
+        Stream data from an asynchronous iterable to a remote object without buffering it (the payload is not signed).
+
+        :param bucket: the bucket where the object should be stored
+        :param object_name: the name of the new object
+        :param content: a stream of the object data chunks
+        :param length: the length of the data
+        """
+
+        headers = self._ensure_user_agent_header({
+            "Content-Length": str(length),
+            "Content-Type": "application/octet-stream"
+        })
+
+        url, headers = self._prepare_request("PUT", bucket, object_name, headers=headers,
+                                             content_sha256="UNSIGNED-PAYLOAD")
+
+        try:
+            response = await self._session.put(url, data=content, headers=headers)
+        except AioHTTPClientError as ce:
+            raise StorageInaccessibleError() from ce
+
+        if response.status != 200:
+            raise StorageError(f"Failed to upload object `{bucket}/{object_name}`")
+
+    @staticmethod
+    async def _read_chunks(file: BinaryIO) -> AsyncIterable[bytes]:
+        """Read a file in chunks (as an asynchronous iterable). The file is read in an executor."""
+
+        loop = asyncio.get_event_loop()
+
+        while True:
+            chunk = await loop.run_in_executor(None, file.read, _UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
     async def _upload_object(self, bucket: str, object_name: str, source_path: str):
         """
         Store the contents of a file identified by a path in a remote object.
@@ -256,25 +420,83 @@ class MinioStorage(Storage):
         with open(source_path, 'rb') as source:
             await self._put_object(bucket, object_name, source, os.stat(source_path).st_size)
 
-    async def push_job_data(self, job_id: str, source_directory: str) -> None:
+    async def _find_unchanged_outputs(self, job_id: str, manifest: Sequence[ManifestEntry]) -> Set[str]:
+        """
+        Find the output files whose objects are already stored (with the same size and MD5 digest, e.g. when a job is
+        processed again after its runner was restarted).
+
+        :param job_id: the job (bucket) identifier
+        :param manifest: the output files with their MD5 digests
+        :return: manifest paths of the unchanged files
+        """
+        if not any(entry.md5 for entry in manifest):
+            return set()
+
+        stored = {}
+        async for object_info in self._list_bucket(job_id, OUTPUT_DIR + _MINIO_FOLDER_DELIMITER):
+            stored[object_info.name] = object_info
+
+        unchanged = set()
+        for entry in manifest:
+            object_info = stored.get(OUTPUT_DIR + _MINIO_FOLDER_DELIMITER + entry.path)
+            if entry.md5 and object_info is not None and object_info.size == entry.size and \
+                    (object_info.etag or "").strip('"') == entry.md5:
+                unchanged.add(entry.path)
+
+        return unchanged
+
+    async def push_job_data(self, job_id: str, source_directory: str,
+                            manifest: Optional[Sequence[ManifestEntry]] = None,
+                            uploaded: Optional[Sequence[ManifestEntry]] = None) -> None:
         """
         Implementation of :py:meth:`shepherd.storage.Storage.push_job_data`.
+
+        The outputs are packed in an ``outputs.tar`` archive if the inputs were packed or if ``pack_outputs`` is
+        configured. Separate output objects are uploaded only if the outputs are not packed or if
+        ``keep_packed_output_files`` is configured. With a manifest, the outputs folder is not listed, the sizes of the
+        files are verified before anything is uploaded and the files whose objects are already stored are skipped.
+        The ``uploaded`` files are skipped as well unless they changed since.
         """
         logging.debug('Pushing dir `%s` to minio bucket `%s`', source_directory, job_id)
 
+        compressed = self._packed_jobs.pop(job_id, None)
+
         if not await self.job_dir_exists(job_id):
             raise StorageError(f"Job directory for `{job_id}` does not exist")
 
         pushed_count = 0
         tasks = []
-
-        for prefix, _, files in os.walk(path.join(source_directory, OUTPUT_DIR)):
-            for file in files:
-                filepath = path.relpath(path.join(OUTPUT_DIR, prefix, file), source_directory)
-                object_name = filepath.replace(path.sep, _MINIO_FOLDER_DELIMITER)
-                source_path = path.join(source_directory, filepath)
-                tasks.append(self._upload_object(job_id, object_name, source_path))
-                pushed_count += 1
+        packed = compressed is not None or self._config.pack_outputs
+        output_directory = path.join(source_directory, OUTPUT_DIR)
+
+        if manifest is not None:
+            verify_manifest(output_directory, manifest)
+
+        if packed:
+            archive_name = OUTPUT_ARCHIVE + (ZSTD_SUFFIX if compressed else "")
+            archive_path = path.join(source_directory, archive_name)
+            pushed_count = await asyncio.get_event_loop().run_in_executor(
+                None, create_archive, path.join(source_directory, OUTPUT_DIR), archive_path, bool(compressed))
+            tasks.append(self._upload_object(job_id, archive_name, archive_path))
+
+        if not packed or self._config.keep_packed_output_files:
+            if manifest is None:
+                manifest = build_manifest(output_directory)
+                unchanged = set()
+            else:
+                unchanged = await self._find_unchanged_outputs(job_id, manifest)
+
+            uploaded = {uploaded_entry.path: uploaded_entry for uploaded_entry in uploaded or []}
+            unchanged.update(entry.path for entry in manifest
+                             if entry.path in uploaded and is_unchanged(entry, uploaded[entry.path]))
+
+            for entry in manifest:
+                if entry.path not in unchanged:
+                    tasks.append(self._upload_object(job_id, OUTPUT_DIR + _MINIO_FOLDER_DELIMITER + entry.path,
+                                                     manifest_file_path(output_directory, entry)))
+
+            if not packed:
+                pushed_count = len(manifest)
 
         await asyncio.gather(*tasks)
 
@@ -282,49 +504,143 @@ class MinioStorage(Storage):
             logging.warning('No output files pushed to bucket `%s`. Make sure they are in the `outputs/` folder.',
                             job_id)
 
+    async def push_job_output(self, job_id: str, source_directory: str, entry: ManifestEntry) -> bool:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.push_job_output`.
+
+        Nothing is uploaded if the outputs are going to be packed without keeping the separate output objects.
+        """
+        packed = job_id in self._packed_jobs or self._config.pack_outputs
+        if packed and not self._config.keep_packed_output_files:
+            return False
+
+        output_directory = path.join(source_directory, OUTPUT_DIR)
+        verify_manifest(output_directory, [entry])
+        await self._upload_object(job_id, OUTPUT_DIR + _MINIO_FOLDER_DELIMITER + entry.path,
+                                  manifest_file_path(output_directory, entry))
+
+        return True
+
+    async def forget_job(self, job_id: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.forget_job`.
+        """
+
+        self._packed_jobs.pop(job_id, None)
+
     async def put_file(self, job_id: str, file_path: str, stream: BinaryIO, length: int) -> None:
         """
         Implementation of :py:meth:`shepherd.storage.Storage.put_file`.
         """
         await self._put_object(job_id, file_path, stream, length)
 
-    async def _object_exists(self, bucket: str, object_name: str) -> bool:
+    async def put_file_stream(self, job_id: str, file_path: str, stream: AsyncIterable[bytes],
+                              length: Optional[int] = None) -> None:
         """
-        Check if an object exists in the remote storage.
+        Implementation of :py:meth:`shepherd.storage.Storage.put_file_stream`.
 
-        :param bucket: the bucket to search for the object
-        :param object_name: name of the object
-        :return: True if the object exists, False otherwise
+        Minio requires the length of the object in advance, so streams of unknown length are spooled first (the spool
+        is written in an executor, as it is rolled over to the disk for large files).
         """
 
-        url = get_target_url(self._config.url, bucket_name=bucket, object_name=object_name)
-        headers = self._ensure_auth_headers("HEAD", url)
+        if length is not None:
+            await self._put_stream(job_id, file_path, stream, length)
+            return
 
-        try:
-            response = await self._session.head(url, headers=headers)
+        with tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_SIZE) as spool:
+            loop = asyncio.get_event_loop()
 
-            return response.status == 200
-        except AioHTTPClientError as ce:
-            raise StorageInaccessibleError() from ce
+            async for chunk in stream:
+                await loop.run_in_executor(None, spool.write, chunk)
+
+            length = spool.tell()
+            spool.seek(0)
 
-    async def get_file(self, job_id: str, file_path: str) -> Optional[StreamReader]:
+            await self._put_stream(job_id, file_path, self._read_chunks(spool), length)
+
+    async def get_file(self, job_id: str, file_path: str) -> Optional[AsyncStream]:
         """
         Implementation of :py:meth:`shepherd.storage.Storage.get_file`.
         """
 
-        url = get_target_url(self._config.url, bucket_name=job_id, object_name=file_path)
-        headers = self._ensure_auth_headers("GET", url)
+        download = await self.download_file(job_id, file_path)
+
+        return download.stream if download is not None else None
+
+    async def download_file(self, job_id: str, file_path: str,
+                            headers: Optional[Mapping[str, str]] = None) -> Optional[FileDownload]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.download_file`.
+
+        The range and conditional headers are passed through to minio (ranged and conditional GET).
+        """
+
+        request_headers = {name: headers[name] for name in DOWNLOAD_REQUEST_HEADERS if headers and name in headers}
+        url, request_headers = self._prepare_request("GET", job_id, file_path, headers=request_headers)
 
         try:
-            if not await self._object_exists(job_id, file_path):
-                return None
+            response = await self._session.get(url, headers=request_headers)
+
+            if response.status not in (200, 206, 304, 416):
+                error_code = self._get_error_code(await response.text())
+
+                if response.status == 404 or error_code in self._NOT_FOUND_ERROR_CODES:
+                    return None
+
+                raise StorageError(f"Could not fetch `{job_id}/{file_path}` from minio")
+
+            response_headers = {name: response.headers[name] for name in DOWNLOAD_RESPONSE_HEADERS
+                                if name in response.headers}
+
+            if response.status in (304, 416):
+                response.release()
+                response_headers.pop("Content-Length", None)  # describes the error body which is not forwarded
+                return FileDownload(None, response.status, response_headers)
+
+            return FileDownload(_ResponseStream(response), response.status, response_headers)
+        except AioHTTPClientError as he:
+            raise StorageInaccessibleError() from he
+
+    async def _get_object_size(self, bucket: str, object_name: str) -> Optional[int]:
+        """
+        Get the size of an object (using a HEAD request).
+
+        :param bucket: the bucket of the object
+        :param object_name: the name of the object
+        :return: the size in bytes or None if the object does not exist
+        """
 
-            response = await self._session.get(url, headers=headers)
+        url, headers = self._prepare_request("HEAD", bucket, object_name)
 
-            return response.content
+        try:
+            async with self._session.head(url, headers=headers) as response:
+                if response.status == 404:
+                    return None
+
+                if response.status != 200:
+                    raise StorageError(f"Could not fetch `{bucket}/{object_name}` metadata from minio")
+
+                return response.content_length
         except AioHTTPClientError as he:
             raise StorageInaccessibleError() from he
 
+    async def get_file_url(self, job_id: str, file_path: str) -> Optional[str]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.get_file_url`.
+
+        Presigned URLs are only returned when ``redirect_downloads`` is enabled. The object is checked first (with
+        a HEAD request), so that missing objects and objects smaller than ``redirect_min_size`` are proxied.
+        """
+
+        if not self._config.redirect_downloads:
+            return None
+
+        size = await self._get_object_size(job_id, file_path)
+        if size is None or size < self._config.redirect_min_size:
+            return None
+
+        return self._public_signer.presign("GET", job_id, file_path, self._config.redirect_url_expiry)
+
     async def set_job_status(self, job_id: str, status: JobStatusModel) -> None:
         """
         Implementation of :py:meth:`shepherd.storage.Storage.set_job_status`
@@ -343,19 +659,75 @@ class MinioStorage(Storage):
         """
         Implementation of :py:meth:`shepherd.storage.Storage.get_job_status`.
         """
+
+        url, headers = self._prepare_request("GET", job_id, JOB_STATUS_FILE)
+
         try:
-            if not await self.job_dir_exists(job_id) or not await self._object_exists(job_id, JOB_STATUS_FILE):
-                raise UnknownJobError('Data for job `{}` does not exist'.format(job_id))
+            async with self._session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    error_code = self._get_error_code(await response.text())
 
-            data = BytesIO()
-            await self._get_object(job_id, JOB_STATUS_FILE, data)
+                    if response.status == 404 or error_code in self._NOT_FOUND_ERROR_CODES:
+                        raise UnknownJobError('Data for job `{}` does not exist'.format(job_id))
+
+                    raise StorageError(f"Failed to get status of job `{job_id}`")
+
+                data = await response.read()
         except AioHTTPClientError as he:
             raise StorageInaccessibleError() from he
-        except StorageError as ce:
-            raise StorageError(f"Failed to get status of job `{job_id}`") from ce
 
-        data.seek(0)
-        return JobStatusModel(json.load(data))
+        return JobStatusModel(json.loads(data))
+
+    async def get_inputs_digest(self, job_id: str) -> Optional[str]:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.get_inputs_digest`.
+
+        The digest is computed from the names, ETags and sizes of the input objects, so no data are downloaded.
+        """
+
+        digest = hashlib.sha256()
+
+        async for object_info in self._list_bucket(job_id, prefix=INPUT_DIR):
+            if object_info.etag is None:
+                return None
+
+            digest.update(f"{object_info.name}\0{object_info.etag}\0{object_info.size}\n".encode())
+
+        return digest.hexdigest()
+
+    async def _copy_object(self, source_bucket: str, source_object_name: str, bucket: str, object_name: str) -> None:
+        """
+        Copy a remote object on the server side. The copy may fail even with a 200 response (the error is then reported
+        in the response body).
+
+        :param source_bucket: the bucket where the source object is stored
+        :param source_object_name: the name of the source object
+        :param bucket: the bucket where the copy should be stored
+        :param object_name: the name of the copy
+        """
+
+        headers = self._ensure_user_agent_header({
+            "X-Amz-Copy-Source": "/" + source_bucket + "/" + encode_object_name(source_object_name)
+        })
+        url, headers = self._prepare_request("PUT", bucket, object_name, headers=headers)
+
+        try:
+            async with self._session.put(url, headers=headers) as response:
+                if response.status != 200 or self._get_error_code(await response.text()) is not None:
+                    raise StorageError(f"Failed to copy object `{source_bucket}/{source_object_name}` "
+                                       f"to `{bucket}/{object_name}`")
+        except AioHTTPClientError as ce:
+            raise StorageInaccessibleError() from ce
+
+    async def copy_job_outputs(self, source_job_id: str, target_job_id: str) -> None:
+        """
+        Implementation of :py:meth:`shepherd.storage.Storage.copy_job_outputs`.
+        """
+
+        tasks = [self._copy_object(source_job_id, object_info.name, target_job_id, object_info.name)
+                 async for object_info in self._list_bucket(source_job_id, prefix=OUTPUT_DIR)]
+
+        await asyncio.gather(*tasks)
 
     async def close(self) -> None:
         """
@@ -0,0 +1,208 @@
+import os
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from os import path
+from typing import Optional, Union, BinaryIO, Tuple, Dict, Mapping
+
+from ..api.downloads import FileDownload, make_file_download
+from ..constants import OUTPUT_DIR
+from ..utils import create_clean_dir
+
+
+_FOLDER_DELIMITER = '/'
+"""Object name folder delimiter (the same one as in Minio)."""
+
+
+class OutputCache:
+    """
+    A two-tier local cache of recently produced job outputs, so that results can be served without a storage round-trip.
+
+    Small files are kept in memory, larger ones in a folder on the local disk (as hardlinks to the files produced by the
+    runners, so the cache should reside on the same filesystem as the sheep data roots). Each tier is limited by the
+    total size of its files and the least-recently-used files are evicted first. The cache is cleared on start-up.
+
+    The jobs may be added from a worker thread (the files are read and linked outside of the lock guarding the tiers).
+    """
+
+    def __init__(self, cache_root: str, max_memory_bytes: int, max_disk_bytes: int, max_memory_file_size: int):
+        """
+        Initialize an empty cache.
+
+        :param cache_root: directory where the disk tier is stored
+        :param max_memory_bytes: maximum total size of the files kept in memory
+        :param max_disk_bytes: maximum total size of the files kept on the disk
+        :param max_memory_file_size: maximum size of a single file kept in memory (larger files go to the disk)
+        """
+
+        self._cache_root = create_clean_dir(cache_root)
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._max_memory_file_size = max_memory_file_size
+        self._memory_size = 0
+        self._disk_size = 0
+        self._memory: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()  # least recently used first
+        self._disk: 'OrderedDict[Tuple[str, str], int]' = OrderedDict()  # key -> file size, least recently used first
+        self._etags: Dict[Tuple[str, str], str] = {}  # key -> quoted MD5 of the file content (both tiers)
+        self._lock = threading.Lock()
+
+    @property
+    def memory_size(self) -> int:
+        """Total size of the files kept in memory in bytes."""
+        return self._memory_size
+
+    @property
+    def disk_size(self) -> int:
+        """Total size of the files kept on the disk in bytes."""
+        return self._disk_size
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        """Get the path of a file in the disk tier."""
+        return path.join(self._cache_root, hashlib.sha1('\0'.join(key).encode()).hexdigest())
+
+    def add_job(self, job_id: str, source_directory: str) -> None:
+        """
+        Cache all the output files in the working directory of a job (the inputs are not cached).
+
+        :param job_id: the job id
+        :param source_directory: working directory of the job (the files are cached under their relative object names)
+        """
+
+        for prefix, _, files in os.walk(path.join(source_directory, OUTPUT_DIR)):
+            for file in files:
+                file_path = path.join(prefix, file)
+                object_name = path.relpath(file_path, source_directory).replace(path.sep, _FOLDER_DELIMITER)
+
+                try:
+                    self._add_file((job_id, object_name), file_path)
+                except OSError:
+                    logging.exception('Failed to cache output `%s` of job `%s`', object_name, job_id)
+
+    def _add_file(self, key: Tuple[str, str], source_path: str) -> None:
+        """
+        Cache a single file in the appropriate tier.
+
+        :param key: job id and object name of the file
+        :param source_path: path to the file
+        """
+
+        with self._lock:
+            if key in self._memory or key in self._disk:
+                return
+
+        size = os.stat(source_path).st_size
+
+        if size <= self._max_memory_file_size and size <= self._max_memory_bytes:
+            with open(source_path, 'rb') as file:
+                data = file.read()
+
+            with self._lock:
+                self._memory[key] = data
+                self._etags[key] = '"' + hashlib.md5(data).hexdigest() + '"'
+                self._memory_size += size
+                self._evict()
+        elif size <= self._max_disk_bytes:
+            try:
+                os.link(source_path, self._path(key))
+            except OSError:
+                shutil.copyfile(source_path, self._path(key))
+
+            md5 = hashlib.md5()
+            with open(self._path(key), 'rb') as file:
+                for chunk in iter(lambda: file.read(64 * 1024), b''):
+                    md5.update(chunk)
+
+            with self._lock:
+                self._disk[key] = size
+                self._etags[key] = '"' + md5.hexdigest() + '"'
+                self._disk_size += size
+                self._evict()
+
+    def get(self, job_id: str, object_name: str) -> Optional[Union[str, BinaryIO]]:
+        """
+        Get a cached output file.
+
+        :param job_id: the job id
+        :param object_name: name of the object (e.g. ``outputs/output``)
+        :return: a stream with the file content (memory tier), a path to the file (disk tier) or None if not cached
+        """
+
+        key = (job_id, object_name)
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return BytesIO(data)
+
+            if key in self._disk:
+                if path.exists(self._path(key)):
+                    self._disk.move_to_end(key)
+                    return self._path(key)
+
+                self._disk_size -= self._disk.pop(key)  # the file was removed behind our back
+                del self._etags[key]
+
+        return None
+
+    def download(self, job_id: str, object_name: str,
+                 headers: Optional[Mapping[str, str]] = None) -> Optional[FileDownload]:
+        """
+        Get a cached output file as a (possibly partial or conditional) download.
+        Whole files from the disk tier are returned as paths, so that they can be sent with ``sendfile``.
+
+        :param job_id: the job id
+        :param object_name: name of the object (e.g. ``outputs/output``)
+        :param headers: request headers of the download (see :py:data:`shepherd.api.downloads.DOWNLOAD_REQUEST_HEADERS`)
+        :return: the download or None if the file is not cached
+        """
+
+        cached = self.get(job_id, object_name)
+        if cached is None:
+            return None
+
+        with self._lock:
+            etag = self._etags.get((job_id, object_name))
+
+        if etag is None:
+            return None
+
+        cached_path = None
+        if isinstance(cached, str):
+            cached_path = cached
+            try:
+                cached = open(cached_path, 'rb')
+            except FileNotFoundError:
+                return None  # evicted in the meantime
+
+        size = cached.seek(0, os.SEEK_END)
+        cached.seek(0)
+        download = make_file_download(cached, size, etag, headers)
+
+        # ranges are left to the stream, the file response would evaluate them on its own
+        if cached_path is not None and download.status == 200 and "Range" not in (headers or {}):
+            download.stream.close()
+            return download._replace(stream=None, path=cached_path)
+
+        return download
+
+    def _evict(self) -> None:
+        """Remove the least recently used files until both tiers fit in their size limits (under the lock)."""
+
+        while self._memory_size > self._max_memory_bytes and self._memory:
+            key, data = self._memory.popitem(last=False)
+            self._memory_size -= len(data)
+            del self._etags[key]
+
+        while self._disk_size > self._max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            del self._etags[key]
+
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,217 @@
+import hashlib
+import hmac
+from datetime import datetime
+from typing import Optional, Dict, Tuple, List
+
+from aiohttp.typedefs import LooseHeaders
+from minio.compat import urlsplit, queryencode
+from minio.helpers import get_target_url, encode_object_name
+from minio.signer import remove_default_port
+
+_SIGN_V4_ALGORITHM = "AWS4-HMAC-SHA256"
+"""Name of the signing algorithm."""
+
+_UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+"""Content hash placeholder used when the payload is not signed."""
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+"""SHA256 hash of an empty payload."""
+
+
+class RequestSigner:
+    """
+    AWS Signature Version 4 signer for requests to a single S3 (Minio) endpoint.
+
+    Produces the same signatures as :py:func:`minio.signer.sign_v4`, but the endpoint URL is parsed only once, the
+    canonical request is built directly from the bucket/object names (without reparsing the target URL) and the derived
+    signing key is cached for each day and region.
+    """
+
+    def __init__(self, endpoint_url: str, access_key: str, secret_key: str, region: str = "us-east-1"):
+        """
+        Initialize the signer.
+
+        :param endpoint_url: URL of the S3 endpoint
+        :param access_key: S3 access key
+        :param secret_key: S3 secret key
+        :param region: region to sign the requests for
+        """
+
+        parsed_url = urlsplit(endpoint_url)
+
+        self._endpoint_url = endpoint_url
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._region = region
+        self._host = remove_default_port(parsed_url)
+        self._base_url = parsed_url.scheme + "://" + self._host
+        self._secure = parsed_url.scheme == "https"
+        self._path_style = all(host not in self._host for host in ("s3.amazonaws.com", "aliyuncs.com"))
+        self._signing_keys: Dict[Tuple[str, str], bytes] = {}
+
+    def _get_signing_key(self, date: str, region: str) -> bytes:
+        """
+        Get the signing key for the given day and region (derive it only if it is not cached yet).
+
+        :param date: the day of the request formatted as ``YYYYMMDD``
+        :param region: the region of the request
+        :return: the signing key
+        """
+
+        key = self._signing_keys.get((date, region))
+
+        if key is None:
+            key = ("AWS4" + self._secret_key).encode()
+            for part in (date, region, "s3", "aws4_request"):
+                key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+
+            if len(self._signing_keys) > 16:  # the keys are only valid for a single day anyway
+                self._signing_keys.clear()
+
+            self._signing_keys[(date, region)] = key
+
+        return key
+
+    def _split_target(self, bucket: Optional[str], object_name: Optional[str],
+                      query: Optional[Dict[str, str]]) -> Tuple[str, str]:
+        """
+        Build the path and the canonical query string of a request.
+
+        :param bucket: the target bucket
+        :param object_name: the target object
+        :param query: query parameters
+        :return: a tuple (path, query string)
+        """
+
+        if not self._path_style:
+            parsed_url = urlsplit(get_target_url(self._endpoint_url, bucket, object_name, self._region, query))
+            return parsed_url.path, parsed_url.query
+
+        path = "/"
+
+        if bucket:
+            path += bucket + "/"
+
+        if object_name:
+            path += encode_object_name(object_name)
+
+        query_string = ""
+
+        if query:
+            query_string = "&".join(key + "=" + queryencode(query[key]) for key in sorted(query.keys()))
+
+        return path, query_string
+
+    def sign(self, method: str, bucket: Optional[str] = None, object_name: Optional[str] = None,
+             query: Optional[Dict[str, str]] = None, headers: Optional[LooseHeaders] = None,
+             content_sha256: Optional[str] = None, request_datetime: Optional[datetime] = None) \
+            -> Tuple[str, LooseHeaders]:
+        """
+        Build the target URL of a request and sign its headers.
+
+        :param method: HTTP method of the request
+        :param bucket: the target bucket
+        :param object_name: the target object
+        :param query: query parameters
+        :param headers: headers of the request (they are updated in-place)
+        :param content_sha256: SHA256 hash of the payload (hash of an empty payload is used if None)
+        :param request_datetime: time of the request (current time is used if None)
+        :return: a tuple (target URL, signed headers)
+        """
+
+        path, query_string = self._split_target(bucket, object_name, query)
+        url = self._base_url + path + ("?" + query_string if query_string else "")
+
+        if headers is None:
+            headers = {}
+
+        if self._secure:
+            content_sha256 = _UNSIGNED_PAYLOAD
+        elif content_sha256 is None:
+            content_sha256 = _EMPTY_SHA256
+
+        if request_datetime is None:
+            request_datetime = datetime.utcnow()
+
+        amz_date = request_datetime.strftime("%Y%m%dT%H%M%SZ")
+
+        headers["Host"] = self._host
+        headers["X-Amz-Date"] = amz_date
+        headers["X-Amz-Content-Sha256"] = content_sha256
+
+        canonical_headers = sorted((name.lower().strip(), str(value).strip()) for name, value in headers.items())
+        scope, signature = self._sign_canonical_request(method, path, query_string, canonical_headers,
+                                                        content_sha256, amz_date)
+        signed_headers = ";".join(name for name, _ in canonical_headers)
+
+        headers["Authorization"] = f"{_SIGN_V4_ALGORITHM} Credential={self._access_key}/{scope}, " \
+                                   f"SignedHeaders={signed_headers}, Signature={signature}"
+
+        return url, headers
+
+    def presign(self, method: str, bucket: str, object_name: str, expires: int,
+                request_datetime: Optional[datetime] = None) -> str:
+        """
+        Create a presigned URL which grants access to an object without any further authentication.
+
+        :param method: HTTP method to be allowed
+        :param bucket: the target bucket
+        :param object_name: the target object
+        :param expires: validity of the URL in seconds
+        :param request_datetime: time of the signature (current time is used if None)
+        :return: the presigned URL
+        """
+
+        if request_datetime is None:
+            request_datetime = datetime.utcnow()
+
+        amz_date = request_datetime.strftime("%Y%m%dT%H%M%SZ")
+        scope = "/".join([amz_date[:8], self._region, "s3", "aws4_request"])
+        query = {
+            "X-Amz-Algorithm": _SIGN_V4_ALGORITHM,
+            "X-Amz-Credential": self._access_key + "/" + scope,
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires),
+            "X-Amz-SignedHeaders": "host"
+        }
+
+        path, query_string = self._split_target(bucket, object_name, query)
+        _, signature = self._sign_canonical_request(method, path, query_string, [("host", self._host)],
+                                                    _UNSIGNED_PAYLOAD, amz_date)
+
+        return self._base_url + path + "?" + query_string + "&X-Amz-Signature=" + signature
+
+    def _sign_canonical_request(self, method: str, path: str, query_string: str,
+                                canonical_headers: List[Tuple[str, str]], content_sha256: str,
+                                amz_date: str) -> Tuple[str, str]:
+        """
+        Build the canonical request and compute its signature.
+
+        :param method: HTTP method of the request
+        :param path: path of the request
+        :param query_string: canonical query string of the request
+        :param canonical_headers: sorted list of the signed headers (lowercase name, value)
+        :param content_sha256: SHA256 hash of the payload
+        :param amz_date: time of the request formatted as ``YYYYMMDDTHHMMSSZ``
+        :return: a tuple (credential scope, signature)
+        """
+
+        date = amz_date[:8]
+
+        canonical_request = "\n".join([
+            method,
+            path.replace("%7E", "~"),
+            query_string.replace("%7E", "~"),
+            *(name + ":" + value for name, value in canonical_headers),
+            "",
+            ";".join(name for name, _ in canonical_headers),
+            content_sha256
+        ])
+
+        scope = "/".join([date, self._region, "s3", "aws4_request"])
+        string_to_sign = "\n".join([_SIGN_V4_ALGORITHM, amz_date, scope,
+                                    hashlib.sha256(canonical_request.encode()).hexdigest()])
+        signature = hmac.new(self._get_signing_key(date, self._region), string_to_sign.encode(),
+                             hashlib.sha256).hexdigest()
+
+        return scope, signature
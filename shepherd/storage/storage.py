@@ -1,8 +1,10 @@
 import abc
-from asyncio import StreamReader
-from typing import Optional, BinaryIO
+from io import BytesIO
+from typing import Optional, BinaryIO, Union, Mapping, AsyncIterable, Sequence
 
+from ..api.downloads import FileDownload, AsyncStream
 from ..api.models import JobStatusModel
+from ..comm.messages import ManifestEntry
 
 
 class Storage(metaclass=abc.ABCMeta):
@@ -46,13 +48,33 @@ class Storage(metaclass=abc.ABCMeta):
         """
 
     @abc.abstractmethod
-    async def push_job_data(self, job_id: str, source_directory: str) -> None:
+    async def push_job_data(self, job_id: str, source_directory: str,
+                            manifest: Optional[Sequence[ManifestEntry]] = None,
+                            uploaded: Optional[Sequence[ManifestEntry]] = None) -> None:
         """
         Upload processed job files from a local directory to the remote storage.
 
         :param job_id: identifier of the job whose files should be uploaded
         :param source_directory: the directory from which the files should be uploaded
+        :param manifest: output files reported by the runner (the outputs folder is listed if not specified)
+        :param uploaded: output files already uploaded by :py:meth:`push_job_output` (skipped if they did not change)
         :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises OutputManifestError: the output files do not match the manifest (nothing is uploaded)
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+    @abc.abstractmethod
+    async def push_job_output(self, job_id: str, source_directory: str, entry: ManifestEntry) -> bool:
+        """
+        Upload a single finished output file of a job which is still being processed.
+
+        :param job_id: identifier of the job whose file should be uploaded
+        :param source_directory: the job directory (containing the outputs folder)
+        :param entry: the output file
+        :return: True if the file was uploaded, False if it is only going to be uploaded with the whole job (e.g. when
+                 the outputs are packed)
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises OutputManifestError: the file does not match the entry
         :raises StorageError: there was an error when communicating with the remote storage
         """
 
@@ -69,18 +91,73 @@ class Storage(metaclass=abc.ABCMeta):
         :raises StorageError: there was an error when communicating with the remote storage
         """
 
+    async def put_file_stream(self, job_id: str, file_path: str, stream: AsyncIterable[bytes],
+                              length: Optional[int] = None) -> None:
+        """
+        Store given file from an asynchronous stream of chunks (e.g. an HTTP request body).
+        Storages that cannot upload streams directly buffer the whole content.
+
+        :param job_id: identifier of the job to which the file belongs
+        :param file_path: path to the stored file
+        :param stream: stream of the file content chunks
+        :param length: length of the content (None if unknown)
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+        content = BytesIO()
+        async for chunk in stream:
+            content.write(chunk)
+
+        length = content.tell()
+        content.seek(0)
+
+        await self.put_file(job_id, file_path, content, length)
+
     @abc.abstractmethod
-    async def get_file(self, job_id: str, file_path: str) -> Optional[StreamReader]:
+    async def get_file(self, job_id: str, file_path: str) -> Optional[Union[AsyncStream, BinaryIO]]:
         """
         Download given file.
 
         :param job_id: identifier of the job to which the file belongs
         :param file_path: path to the queried file
-        :return: a stream to read the file contents from
+        :return: a stream to read the file contents from (None if the file does not exist)
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+    async def download_file(self, job_id: str, file_path: str,
+                            headers: Optional[Mapping[str, str]] = None) -> Optional[FileDownload]:
+        """
+        Download given file with respect to the conditional and range request headers
+        (see :py:data:`DOWNLOAD_REQUEST_HEADERS`). Storages that do not support them return the whole file.
+
+        :param job_id: identifier of the job to which the file belongs
+        :param file_path: path to the queried file
+        :param headers: HTTP headers of the download request
+        :return: the downloaded content with its metadata (None if the file does not exist)
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+        stream = await self.get_file(job_id, file_path)
+
+        return FileDownload(stream, 200, {}) if stream is not None else None
+
+    async def get_file_url(self, job_id: str, file_path: str) -> Optional[str]:
+        """
+        Get a short-lived URL from which the given file can be downloaded directly, bypassing the shepherd.
+        Storages that do not support direct downloads (or have them disabled) return None and the file is proxied.
+
+        :param job_id: identifier of the job to which the file belongs
+        :param file_path: path to the queried file
+        :return: the URL or None if the file should be downloaded using :py:meth:`get_file`
         :raises StorageInaccessibleError: the remote storage is not accessible
         :raises StorageError: there was an error when communicating with the remote storage
         """
 
+        return None
+
     async def set_job_status(self, job_id: str, status: JobStatusModel) -> None:
         """
         Update the status file for a job.
@@ -103,6 +180,37 @@ class Storage(metaclass=abc.ABCMeta):
         :raises UnknownJobError: status for an unknown job was requested
         """
 
+    @abc.abstractmethod
+    async def get_inputs_digest(self, job_id: str) -> Optional[str]:
+        """
+        Compute a digest identifying the contents of the job inputs (both the ``inputs/`` folder and input archives).
+        Result memoization is skipped for jobs whose digest cannot be computed.
+
+        :param job_id: identifier of the job
+        :return: the digest or None if it cannot be computed
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+    @abc.abstractmethod
+    async def copy_job_outputs(self, source_job_id: str, target_job_id: str) -> None:
+        """
+        Copy the outputs (both the ``outputs/`` folder and output archives) of a finished job to another job.
+
+        :param source_job_id: identifier of the job whose outputs should be copied
+        :param target_job_id: identifier of the job to which the outputs should be copied
+        :raises StorageInaccessibleError: the remote storage is not accessible
+        :raises StorageError: there was an error when communicating with the remote storage
+        """
+
+    @abc.abstractmethod
+    async def forget_job(self, job_id: str) -> None:
+        """
+        Drop the local state kept for a job whose data will not be pushed (e.g. a job that failed or timed out).
+
+        :param job_id: identifier of the job
+        """
+
     async def close(self) -> None:
         """
         Perform cleanup tasks (if necessary - e.g. terminate connection pools).
@@ -0,0 +1,114 @@
+import os
+import logging
+import tarfile
+from os import path
+from typing import Optional
+
+from ..constants import ZSTD_SUFFIX
+from ..errors.api import StorageError
+
+
+def _zstandard():
+    """
+    Import the optional ``zstandard`` package.
+
+    :raise StorageError: if the package is not installed
+    """
+    try:
+        import zstandard
+    except ImportError as ie:
+        raise StorageError('Zstandard compressed archives require the `zstandard` package') from ie
+
+    return zstandard
+
+
+def is_compressed_archive(archive_name: str) -> bool:
+    """
+    Check if the given archive name denotes a zstd compressed archive.
+
+    >>> is_compressed_archive('inputs.tar.zst')
+    True
+    >>> is_compressed_archive('inputs.tar')
+    False
+    """
+    return archive_name.endswith(ZSTD_SUFFIX)
+
+
+def extract_archive(archive_path: str, target_directory: str, compressed: Optional[bool] = None) -> int:
+    """
+    Extract a (possibly zstd compressed) tar archive into a directory in a streaming fashion.
+    Only regular files and directories are extracted and their paths must not escape the ``target_directory``.
+
+    :param archive_path: path to the archive
+    :param target_directory: directory to extract the archive to
+    :param compressed: is the archive compressed with zstd? (decided by the archive suffix if None)
+    :raise StorageError: if the archive is invalid or contains forbidden members
+    :return: the number of extracted files
+    """
+    if compressed is None:
+        compressed = is_compressed_archive(archive_path)
+
+    target_directory = path.abspath(target_directory)
+    extracted_count = 0
+
+    with open(archive_path, 'rb') as archive_file:
+        stream = _zstandard().ZstdDecompressor().stream_reader(archive_file) if compressed else archive_file
+
+        try:
+            with tarfile.open(fileobj=stream, mode='r|') as archive:
+                for member in archive:
+                    member_path = path.abspath(path.join(target_directory, member.name))
+
+                    if path.commonpath([target_directory, member_path]) != target_directory:
+                        raise StorageError(f'Archive member `{member.name}` points outside the target directory')
+
+                    if member.isdir():
+                        os.makedirs(member_path, exist_ok=True)
+                    elif member.isfile():
+                        os.makedirs(path.dirname(member_path), exist_ok=True)
+                        with open(member_path, 'wb') as file:
+                            source = archive.extractfile(member)
+                            while True:
+                                chunk = source.read(128 * 1024)
+                                if not chunk:
+                                    break
+                                file.write(chunk)
+                        extracted_count += 1
+                    else:
+                        logging.warning('Skipping archive member `%s` which is not a regular file', member.name)
+        except tarfile.TarError as te:
+            raise StorageError(f'Failed to extract archive `{path.basename(archive_path)}`') from te
+
+    return extracted_count
+
+
+def create_archive(source_directory: str, archive_path: str, compressed: Optional[bool] = None) -> int:
+    """
+    Pack the contents of a directory into a (possibly zstd compressed) tar archive in a streaming fashion.
+    Paths of the archive members are relative to the ``source_directory``.
+
+    :param source_directory: directory to be packed
+    :param archive_path: path to the new archive
+    :param compressed: should the archive be compressed with zstd? (decided by the archive suffix if None)
+    :return: the number of packed files
+    """
+    if compressed is None:
+        compressed = is_compressed_archive(archive_path)
+
+    packed_count = 0
+
+    with open(archive_path, 'wb') as archive_file:
+        stream = _zstandard().ZstdCompressor().stream_writer(archive_file, closefd=False) \
+            if compressed else archive_file
+
+        with tarfile.open(fileobj=stream, mode='w|') as archive:
+            for prefix, _, files in os.walk(source_directory):
+                for file in sorted(files):
+                    file_path = path.join(prefix, file)
+                    archive.add(file_path, arcname=path.relpath(file_path, source_directory), recursive=False)
+                    packed_count += 1
+
+        if compressed:
+            stream.close()
+
+    return packed_count
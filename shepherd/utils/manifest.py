@@ -0,0 +1,100 @@
+import hashlib
+import os
+from os import path
+from typing import List, Sequence
+
+from ..comm.messages import ManifestEntry
+from ..errors.api import OutputManifestError
+
+_HASH_CHUNK_SIZE = 1024 ** 2
+"""Size of chunks read when hashing the output files."""
+
+
+def _md5(file_path: str) -> str:
+    """Compute the hex MD5 digest of a file (the ETag of the object it is uploaded to)."""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_entry(directory: str, file_path: str, hashes: bool = False) -> ManifestEntry:
+    """
+    Describe a file in a directory by a manifest entry.
+
+    :param directory: the directory described by the manifest
+    :param file_path: path of the file in the ``directory``
+    :param hashes: should the MD5 digest of the file be computed?
+    :return: the manifest entry
+    """
+    return ManifestEntry(dict(path=path.relpath(file_path, directory).replace(path.sep, '/'),
+                              size=os.stat(file_path).st_size, md5=_md5(file_path) if hashes else None))
+
+
+def build_manifest(directory: str, hashes: bool = False) -> List[ManifestEntry]:
+    """
+    List the files in a directory (recursively) with their sizes and optionally their MD5 digests.
+
+    :param directory: the directory to be listed (e.g. job outputs)
+    :param hashes: should the MD5 digests of the files be computed?
+    :return: manifest entries with paths relative to the ``directory`` (with ``/`` separators)
+    """
+    manifest = []
+
+    for prefix, _, files in os.walk(directory):
+        for file in sorted(files):
+            manifest.append(manifest_entry(directory, path.join(prefix, file), hashes))
+
+    return manifest
+
+
+def manifest_file_path(directory: str, entry: ManifestEntry) -> str:
+    """
+    Get the local path of a manifest entry.
+
+    :param directory: the directory described by the manifest
+    :param entry: the manifest entry
+    :raise OutputManifestError: if the entry points outside the directory
+    :return: path of the file
+    """
+    directory = path.abspath(directory)
+    file_path = path.abspath(path.join(directory, *entry.path.split('/')))
+
+    if path.commonpath([directory, file_path]) != directory or file_path == directory:
+        raise OutputManifestError(f'Manifest entry `{entry.path}` points outside the outputs directory')
+
+    return file_path
+
+
+def is_unchanged(entry: ManifestEntry, uploaded: ManifestEntry) -> bool:
+    """
+    Check if a manifest entry describes the same file as an entry of an uploaded file (by the size and, if both entries
+    have one, the MD5 digest).
+
+    :param entry: the manifest entry
+    :param uploaded: the entry of the uploaded file
+    :return: True if the file did not change since it was uploaded
+    """
+    return entry.path == uploaded.path and entry.size == uploaded.size and \
+        (entry.md5 is None or uploaded.md5 is None or entry.md5 == uploaded.md5)
+
+
+def verify_manifest(directory: str, manifest: Sequence[ManifestEntry]) -> None:
+    """
+    Check that all files listed in a manifest exist and have the listed sizes (e.g. that they were completely
+    written by the runner).
+
+    :param directory: the directory described by the manifest
+    :param manifest: the manifest entries
+    :raise OutputManifestError: if any of the files is missing or has an unexpected size
+    """
+    for entry in manifest:
+        try:
+            size = os.stat(manifest_file_path(directory, entry)).st_size
+        except FileNotFoundError:
+            raise OutputManifestError(f'Output file `{entry.path}` listed in the manifest is missing')
+
+        if size != entry.size:
+            raise OutputManifestError(f'Output file `{entry.path}` has {size} bytes instead of {entry.size} bytes '
+                                      f'listed in the manifest')
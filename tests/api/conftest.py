@@ -7,7 +7,8 @@ from shepherd.api.openapi import oapi
 from shepherd.api.models import SheepModel
 from shepherd.api.views import create_shepherd_routes
 from shepherd.shepherd import Shepherd
-from shepherd.storage import MinioStorage
+from shepherd.shepherd.status_feed import JobStatusFeed
+from shepherd.storage import Storage, MinioStorage, InMemoryStorage
 
 
 @pytest.fixture(scope="function")
@@ -31,15 +32,35 @@ def mock_shepherd():
     m.get_status.side_effect = status_gen
     m.is_job_done.side_effect = ready
     m.job_done_condition = asyncio.Condition()
+    m.status_feed = JobStatusFeed()
     m.enqueue_job.side_effect = nothing
+    m.enqueue_jobs.side_effect = nothing
+    m.get_cached_output.return_value = None
+    m.get_job_status.return_value = None
     yield m
 
 
-@pytest.fixture(scope="function")
-def app(storage_config, mock_shepherd, minio):
+def create_test_app(shepherd: Shepherd, storage: Storage):
+    """Create an API application with the routes of the given (mocked) shepherd and storage."""
     oapi.app = None  # HACK
 
     app = create_app(debug=True)
-    app.add_routes(create_shepherd_routes(mock_shepherd, MinioStorage(storage_config)))
+    app.add_routes(create_shepherd_routes(shepherd, storage))
+
+    return app
+
+
+@pytest.fixture(scope="function")
+def app(storage_config, mock_shepherd, minio):
+    yield create_test_app(mock_shepherd, MinioStorage(storage_config))
+
+
+@pytest.fixture(scope="function")
+def memory_storage():
+    yield InMemoryStorage()
+
 
-    yield app
+@pytest.fixture(scope="function")
+def memory_app(mock_shepherd, memory_storage):
+    """API application backed by an in-memory storage (it does not need minio)."""
+    yield create_test_app(mock_shepherd, memory_storage)
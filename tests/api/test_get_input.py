@@ -31,3 +31,43 @@ async def test_get_input_not_found(job, aiohttp_client, app):
 
     response = await client.get("/jobs/{}/input/i-dont-exist.json".format(job_id))
     assert response.status == 404
+
+
+async def test_get_input_redirect(aiohttp_client, memory_app, memory_storage, mocker):
+    async def get_file_url(job_id, file_path):
+        return "http://minio.example.com/{}/{}?X-Amz-Signature=abc".format(job_id, file_path)
+
+    mocker.patch.object(memory_storage, "get_file_url", side_effect=get_file_url)
+    await memory_storage.init_job("job")
+    client = await aiohttp_client(memory_app)
+
+    response = await client.get("/jobs/job/input/payload.json", allow_redirects=False)
+    assert response.status == 307
+    assert response.headers["Location"] == "http://minio.example.com/job/inputs/payload.json?X-Amz-Signature=abc"
+
+
+async def test_get_input_range_and_etag(aiohttp_client, memory_app, memory_storage):
+    await memory_storage.init_job("job")
+    await memory_storage.put_file("job", INPUT_DIR + "/payload.txt", BytesIO(b"0123456789"), 10)
+    client = await aiohttp_client(memory_app)
+
+    response = await client.get("/jobs/job/input/payload.txt")
+    assert response.status == 200
+    assert await response.read() == b"0123456789"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    etag = response.headers["ETag"]
+
+    response = await client.get("/jobs/job/input/payload.txt", headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    response = await client.get("/jobs/job/input/payload.txt", headers={"Range": "bytes=2-4"})
+    assert response.status == 206
+    assert response.headers["Content-Range"] == "bytes 2-4/10"
+    assert await response.read() == b"234"
+
+    response = await client.get("/jobs/job/input/payload.txt", headers={"Range": "bytes=20-"})
+    assert response.status == 416
+
+    response = await client.get("/jobs/job/input/payload.txt", headers={"Range": "bytes=5-3"})
+    assert response.status == 200
+    assert await response.read() == b"0123456789"
@@ -1,4 +1,6 @@
+import os
 import json
+import os.path as path
 from io import BytesIO
 
 import pytest
@@ -6,6 +8,7 @@ from minio import Minio
 
 from shepherd.constants import JOB_STATUS_FILE, OUTPUT_DIR
 from shepherd.api.models import JobStatus
+from shepherd.storage import OutputCache
 
 
 @pytest.fixture()
@@ -92,3 +95,36 @@ async def test_get_result_not_found(job_done, aiohttp_client, app):
 
     response = await client.get("/jobs/{}/result/i-dont-exist.json".format(job_id))
     assert response.status == 404
+
+
+async def test_get_result_cached(aiohttp_client, memory_app, mock_shepherd, tmpdir):
+    client = await aiohttp_client(memory_app)
+
+    cache = OutputCache(path.join(str(tmpdir), 'cache'), max_memory_bytes=100, max_disk_bytes=100,
+                        max_memory_file_size=30)
+    working_directory = path.join(str(tmpdir), 'job')
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    with open(path.join(working_directory, OUTPUT_DIR, 'payload.json'), 'wb') as file:
+        file.write(b'{"content": "Lorem ipsum"}')
+    with open(path.join(working_directory, OUTPUT_DIR, 'output.txt'), 'wb') as file:
+        file.write(b'cached on the disk - too large for memory')
+    cache.add_job('uuid-ready', working_directory)
+    mock_shepherd.get_cached_output.side_effect = cache.download
+
+    response = await client.get("/jobs/uuid-ready/result/payload.json")
+    assert response.status == 200
+    assert (await response.json())["content"] == "Lorem ipsum"
+    assert mock_shepherd.get_cached_output.call_args[0][:2] == ("uuid-ready", OUTPUT_DIR + "/payload.json")
+
+    response = await client.get("/jobs/uuid-ready/result/output.txt")
+    assert response.status == 200
+    assert await response.read() == b'cached on the disk - too large for memory'
+    etag = response.headers["ETag"]
+
+    response = await client.get("/jobs/uuid-ready/result/output.txt", headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    response = await client.get("/jobs/uuid-ready/result/output.txt", headers={"Range": "bytes=10-"})
+    assert response.status == 206
+    assert response.headers["Content-Range"] == "bytes 10-40/41"
+    assert await response.read() == b'the disk - too large for memory'
@@ -4,7 +4,8 @@ import pytest
 from io import BytesIO
 
 from shepherd.constants import JOB_STATUS_FILE
-from shepherd.api.models import JobStatus
+from shepherd.api.models import JobStatus, JobStatusModel
+from shepherd.storage import InMemoryStorage
 
 
 async def test_get_status(aiohttp_client, app):
@@ -72,3 +73,131 @@ async def test_ready_error(aiohttp_client, app):
     client = await aiohttp_client(app)
     response = await client.get('/jobs/non-existent/wait_ready')
     assert response.status == 400
+
+
+async def test_job_status_not_modified(aiohttp_client, memory_app, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    mock_shepherd.get_job_status.return_value = JobStatusModel({
+        'status': JobStatus.PROCESSING,
+        'model': {'name': 'model_1', 'version': 'latest'}
+    })
+
+    response = await client.get('/jobs/job/status')
+    assert response.status == 200
+    assert (await response.json())['status'] == JobStatus.PROCESSING
+    etag = response.headers['ETag']
+
+    response = await client.get('/jobs/job/status', headers={'If-None-Match': etag})
+    assert response.status == 304
+
+    mock_shepherd.get_job_status.return_value.status = JobStatus.DONE
+    response = await client.get('/jobs/job/status', headers={'If-None-Match': etag})
+    assert response.status == 200
+    assert response.headers['ETag'] != etag
+
+
+async def set_status(storage: InMemoryStorage, job_id: str, status: str):
+    if not await storage.job_dir_exists(job_id):
+        await storage.init_job(job_id)
+    await storage.set_job_status(job_id, JobStatusModel({'status': status,
+                                                         'model': {'name': 'model_1', 'version': 'latest'}}))
+
+
+async def test_job_statuses_bulk(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    local_status = JobStatusModel({'status': JobStatus.QUEUED, 'model': {'name': 'model_1', 'version': 'latest'}})
+    mock_shepherd.get_job_status.side_effect = lambda job_id: local_status if job_id == 'local' else None
+    await set_status(memory_storage, 'remote', JobStatus.DONE)
+    client = await aiohttp_client(memory_app)
+
+    response = await client.post('/jobs/status', json={'job_ids': ['local', 'remote', 'unknown']})
+    assert response.status == 200
+    data = await response.json()
+    assert data['statuses']['local']['status'] == JobStatus.QUEUED
+    assert data['statuses']['remote']['status'] == JobStatus.DONE
+    assert data['unknown'] == ['unknown']
+
+
+async def test_wait_jobs(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    await set_status(memory_storage, 'processing', JobStatus.PROCESSING)
+    await set_status(memory_storage, 'done', JobStatus.DONE)
+    client = await aiohttp_client(memory_app)
+
+    response = await client.post('/jobs/wait', json={'job_ids': ['processing', 'done', 'unknown'], 'mode': 'any'})
+    data = await response.json()
+    assert data['finished'] == ['done']
+    assert data['unknown'] == ['unknown']
+    assert not data['timed_out']
+
+    response = await client.post('/jobs/wait', json={'job_ids': ['processing', 'done'], 'timeout': 0.1})
+    data = await response.json()
+    assert data['finished'] == ['done']
+    assert data['timed_out']
+
+    async def finish_job():
+        await asyncio.sleep(0.1)
+        await set_status(memory_storage, 'processing', JobStatus.FAILED)
+        async with mock_shepherd.job_done_condition:
+            mock_shepherd.job_done_condition.notify_all()
+
+    finisher = asyncio.create_task(finish_job())
+    response = await client.post('/jobs/wait', json={'job_ids': ['processing', 'done'], 'timeout': 10})
+    data = await response.json()
+    assert data['finished'] == ['done', 'processing']
+    assert data['statuses']['processing']['status'] == JobStatus.FAILED
+    assert not data['timed_out']
+    await finisher
+
+
+async def test_wait_jobs_queries_without_condition(aiohttp_client, memory_app, memory_storage, mock_shepherd, mocker):
+    await set_status(memory_storage, 'processing', JobStatus.PROCESSING)
+    client = await aiohttp_client(memory_app)
+    get_job_status = memory_storage.get_job_status
+
+    async def check_unlocked_get_job_status(job_id):
+        assert not mock_shepherd.job_done_condition.locked()
+        return await get_job_status(job_id)
+
+    mocker.patch.object(memory_storage, 'get_job_status', side_effect=check_unlocked_get_job_status)
+
+    async def notify():
+        await asyncio.sleep(0.05)
+        async with mock_shepherd.job_done_condition:
+            mock_shepherd.job_done_condition.notify_all()
+
+    notifier = asyncio.create_task(notify())
+    response = await client.post('/jobs/wait', json={'job_ids': ['processing'], 'timeout': 0.2})
+    data = await response.json()
+    assert data['timed_out']
+    assert memory_storage.get_job_status.call_count >= 2
+    await notifier
+
+
+async def test_job_events(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    await set_status(memory_storage, 'job-1', JobStatus.QUEUED)
+    client = await aiohttp_client(memory_app)
+
+    response = await client.get('/jobs/events', params={'job_ids': 'job-1,unknown'})
+    assert response.status == 200
+    assert response.headers['Content-Type'] == 'text/event-stream'
+
+    async def read_event():
+        lines = []
+        while not lines or lines[-1] != b'\n':
+            lines.append(await response.content.readline())
+        assert lines[0] == b'event: status\n'
+        return json.loads(lines[1][len(b'data: '):])
+
+    event = await read_event()
+    assert event == {'job_id': 'job-1', 'status': (await memory_storage.get_job_status('job-1')).to_primitive()}
+
+    mock_shepherd.status_feed.publish('job-2', JobStatusModel({'status': JobStatus.DONE,
+                                                               'model': {'name': 'model_1', 'version': 'latest'}}))
+    mock_shepherd.status_feed.publish('job-1', JobStatusModel({'status': JobStatus.PROCESSING,
+                                                               'model': {'name': 'model_1', 'version': 'latest'}}))
+
+    event = await read_event()
+    assert event['job_id'] == 'job-1'
+    assert event['status']['status'] == JobStatus.PROCESSING
+
+    response.close()
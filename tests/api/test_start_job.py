@@ -6,7 +6,7 @@ import pytest
 from minio import Minio
 from unittest.mock import Mock
 
-from shepherd.errors.api import UnknownJobError
+from shepherd.errors.api import UnknownJobError, UnknownSheepError
 
 from shepherd.constants import DEFAULT_PAYLOAD_PATH
 from shepherd.shepherd import Shepherd
@@ -115,3 +115,71 @@ async def test_start_job_with_payload_in_minio(minio: Minio, aiohttp_client, app
     assert response.status == 200
 
     mock_shepherd.enqueue_job.assert_called()
+
+
+def check_sheep_id(sheep_id):
+    if sheep_id == "unknown-sheep":
+        raise UnknownSheepError("Unknown sheep id `{}`".format(sheep_id))
+
+
+async def test_start_job_unknown_sheep(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    mock_shepherd.check_sheep_id.side_effect = check_sheep_id
+    client = await aiohttp_client(memory_app)
+
+    response = await client.post("/start-job", json={"job_id": "uuid-1", "sheep_id": "unknown-sheep",
+                                                     "model": {"name": "model_1", "version": "latest"},
+                                                     "payload": "Payload content"})
+
+    assert response.status == 400
+    assert not await memory_storage.job_dir_exists("uuid-1")
+    mock_shepherd.enqueue_job.assert_not_called()
+
+
+async def test_start_jobs_batch(aiohttp_client, memory_app, memory_storage, mock_shepherd: Union[Mock, Shepherd]):
+    await memory_storage.init_job("uuid-existing")
+    mock_shepherd.check_sheep_id.side_effect = check_sheep_id
+    client = await aiohttp_client(memory_app)
+
+    model = {"name": "model_1", "version": "latest"}
+    response = await client.post("/jobs/batch", json={"jobs": [
+        {"job_id": "uuid-1", "model": model, "payload": "first", "callback_url": "http://example.com/hook"},
+        {"job_id": "uuid-2", "model": model, "payload": "second", "sheep_id": "sheep_1"},
+        {"job_id": "uuid-existing", "model": model, "payload": "conflict"},
+        {"job_id": "uuid-unknown", "model": model},
+        {"job_id": "uuid-unknown-sheep", "model": model, "payload": "third", "sheep_id": "unknown-sheep"},
+    ]})
+
+    assert response.status == 200
+    results = (await response.json())["jobs"]
+    assert [result["job_id"] for result in results] == \
+        ["uuid-1", "uuid-2", "uuid-existing", "uuid-unknown", "uuid-unknown-sheep"]
+    assert [result["success"] for result in results] == [True, True, False, False, False]
+    assert "message" in results[2]
+    assert "unknown-sheep" in results[4]["message"]
+    assert not await memory_storage.job_dir_exists("uuid-unknown-sheep")
+
+    assert (await memory_storage.get_file("uuid-2", DEFAULT_PAYLOAD_PATH)).read() == b"second"
+
+    mock_shepherd.enqueue_jobs.assert_called_once()
+    enqueued = mock_shepherd.enqueue_jobs.call_args[0][0]
+    assert [(job_id, sheep_id, callback_url) for job_id, _, sheep_id, callback_url, _ in enqueued] == \
+        [("uuid-1", None, "http://example.com/hook"), ("uuid-2", "sheep_1", None)]
+
+
+async def test_start_jobs_batch_duplicate(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    model = {"name": "model_1", "version": "latest"}
+    response = await client.post("/jobs/batch", json={"jobs": [
+        {"job_id": "uuid-1", "model": model, "payload": "first"},
+        {"job_id": "uuid-1", "model": model, "payload": "second"},
+    ]})
+
+    assert response.status == 200
+    results = (await response.json())["jobs"]
+    assert [result["success"] for result in results] == [True, False]
+    assert "already" in results[1]["message"]
+    assert (await memory_storage.get_file("uuid-1", DEFAULT_PAYLOAD_PATH)).read() == b"first"
+
+    enqueued = mock_shepherd.enqueue_jobs.call_args[0][0]
+    assert [job_id for job_id, *_ in enqueued] == ["uuid-1"]
@@ -0,0 +1,136 @@
+import json
+
+import aiohttp
+
+from shepherd.api.models import ModelModel, JobStatusModel, JobStatus
+from shepherd.constants import INPUT_DIR
+from shepherd.errors.api import UnknownSheepError
+
+
+async def test_upload_input(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    response = await client.put("/jobs/job/inputs/images/1.bin", data=b"\x00\x01" * 1000)
+    assert response.status == 200
+    response = await client.put("/jobs/job/inputs/2.bin", data=b"second")
+    assert response.status == 200
+
+    assert (await memory_storage.get_file("job", INPUT_DIR + "/images/1.bin")).read() == b"\x00\x01" * 1000
+    assert (await memory_storage.get_file("job", INPUT_DIR + "/2.bin")).read() == b"second"
+
+    response = await client.post("/start-job", json={"job_id": "job", "model": {"name": "model", "version": "1"}})
+    assert response.status == 200
+    mock_shepherd.enqueue_job.assert_called_once()
+
+
+async def test_upload_input_submitted_job(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    await memory_storage.init_job("done")
+    await memory_storage.set_job_status("done", JobStatusModel({"status": JobStatus.DONE,
+                                                                "model": {"name": "model", "version": "1"}}))
+    response = await client.put("/jobs/done/inputs/1.bin", data=b"data")
+    assert response.status == 409
+    assert await memory_storage.get_file("done", INPUT_DIR + "/1.bin") is None
+
+    await memory_storage.init_job("queued")
+    mock_shepherd.get_job_status.side_effect = lambda job_id: JobStatusModel({"status": JobStatus.QUEUED})
+    response = await client.put("/jobs/queued/inputs/1.bin", data=b"data")
+    assert response.status == 409
+    assert await memory_storage.get_file("queued", INPUT_DIR + "/1.bin") is None
+
+
+async def test_upload_input_invalid_path(aiohttp_client, memory_app, memory_storage):
+    client = await aiohttp_client(memory_app)
+
+    response = await client.put("/jobs/job/inputs/images//1.bin", data=b"data")
+    assert response.status == 400
+
+
+async def test_start_job_multipart(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    form = aiohttp.FormData()
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+    form.add_field("sheep_id", "bare_sheep")
+    form.add_field("callback_url", "http://example.com/callback")
+    form.add_field("timeout", "30")
+    form.add_field("file", b"first", filename="a.bin")
+    form.add_field("file", b"second", filename="b.bin")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 200
+
+    assert (await memory_storage.get_file("job", INPUT_DIR + "/a.bin")).read() == b"first"
+    assert (await memory_storage.get_file("job", INPUT_DIR + "/b.bin")).read() == b"second"
+    mock_shepherd.enqueue_job.assert_called_once_with("job", ModelModel(dict(name="model", version="1")),
+                                                      "bare_sheep", "http://example.com/callback", 30.0)
+
+
+async def test_start_job_multipart_retry(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    form = aiohttp.FormData()
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+    form.add_field("file", b"first", filename="a.bin")
+    form.add_field("timeout", "30")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 400
+    assert await memory_storage.job_dir_exists("job")
+    mock_shepherd.enqueue_job.assert_not_called()
+
+    form = aiohttp.FormData()
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+    form.add_field("file", b"first", filename="a.bin")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 200
+    mock_shepherd.enqueue_job.assert_called_once()
+
+
+async def test_start_job_multipart_invalid_field(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    client = await aiohttp_client(memory_app)
+
+    form = aiohttp.FormData()
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+    form.add_field("timeout", "-1")
+    form.add_field("file", b"first", filename="a.bin")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 400
+    assert not await memory_storage.job_dir_exists("job")
+
+
+async def test_start_job_multipart_missing_model(aiohttp_client, memory_app):
+    client = await aiohttp_client(memory_app)
+
+    form = aiohttp.FormData()
+    form.add_field("file", b"first", filename="a.bin")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 400
+
+
+async def test_start_job_multipart_invalid(aiohttp_client, memory_app, memory_storage, mock_shepherd):
+    mock_shepherd.check_sheep_id.side_effect = UnknownSheepError("Unknown sheep")
+    client = await aiohttp_client(memory_app)
+
+    form = aiohttp.FormData()
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+    form.add_field("sheep_id", "unknown-sheep")
+    form.add_field("file", b"first", filename="a.bin")
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 400
+    assert not await memory_storage.job_dir_exists("job")
+
+    mock_shepherd.check_sheep_id.side_effect = None
+    form = aiohttp.FormData()
+    form.add_field("file", b"first", filename="a.bin")
+    form.add_field("model", json.dumps({"name": "model", "version": "1"}))
+
+    response = await client.post("/jobs/job/start", data=form)
+    assert response.status == 400
+    assert not await memory_storage.job_dir_exists("job")
+    mock_shepherd.enqueue_job.assert_not_called()
@@ -2,12 +2,13 @@ import pytest
 import zmq
 import zmq.asyncio
 
-from shepherd.comm import InputMessage, DoneMessage, ErrorMessage
+from shepherd.comm import InputMessage, DoneMessage, ErrorMessage, ProgressMessage
 
 
 messages = (InputMessage(dict(job_id='test_job', io_data_root='/tmp')),
             DoneMessage(dict(job_id='done_job')),
-            ErrorMessage(dict(job_id='test_job', message='short err', exception_traceback='it was really bad')))
+            ErrorMessage(dict(job_id='test_job', message='short err', exception_traceback='it was really bad')),
+            ProgressMessage(dict(job_id='test_job', percent=42.5, stage='inference')))
 
 
 @pytest.fixture(params=messages)
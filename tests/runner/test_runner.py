@@ -1,8 +1,11 @@
+import asyncio
 import json
 import os
 import os.path as path
 import re
 import subprocess
+import threading
+from contextlib import suppress
 
 import pytest
 
@@ -45,3 +48,219 @@ def test_n_gpus(mocker):
     assert n_available_gpus() == 1
     mocker.patch('os.environ', {'NVIDIA_VISIBLE_DEVICES': '0,3', 'CUDA_VISIBLE_DEVICES': ''})
     assert n_available_gpus() == 0
+
+
+class BlockingRunner(BaseRunner):
+    """Runner whose jobs block until they are released (or fail if their input contains ``fail``)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.released = threading.Event()
+
+    def _process_job(self, input_path: str, output_path: str) -> None:
+        if 'slow' in input_path:
+            assert self.released.wait(5)
+        if 'fail' in input_path:
+            raise ValueError('failed on purpose')
+
+
+async def test_runner_processes_jobs_concurrently(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = BlockingRunner('config.yaml', port, 'predict', max_workers=2)
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        for job_id in ('slow-job', 'fast-job', 'fail-job'):
+            await Messenger.send(socket, InputMessage(dict(job_id=job_id, io_data_root=str(tmpdir))))
+
+        # the slow job must not block the other ones
+        received = [await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ErrorMessage]), 5) for _ in range(2)]
+        assert {(message.job_id, type(message)) for message in received} == \
+            {('fast-job', DoneMessage), ('fail-job', ErrorMessage)}
+
+        runner.released.set()
+        message = await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ErrorMessage]), 5)
+        assert (message.job_id, type(message)) == ('slow-job', DoneMessage)
+    finally:
+        runner.released.set()
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
+
+
+class BatchRecordingRunner(BlockingRunner):
+    """Runner which records the sizes of the processed batches."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_sizes = []
+
+    def _process_batch(self, jobs):
+        self.batch_sizes.append(len(jobs))
+        return super()._process_batch(jobs)
+
+
+async def test_runner_processes_batches(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = BatchRecordingRunner('config.yaml', port, 'predict', max_batch_size=3, max_batch_latency=0.5)
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        for job_id in ('job-1', 'fail-job', 'job-2', 'job-3'):
+            await Messenger.send(socket, InputMessage(dict(job_id=job_id, io_data_root=str(tmpdir))))
+
+        received = [await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ErrorMessage]), 5) for _ in range(4)]
+        assert {(message.job_id, type(message)) for message in received} == \
+            {('job-1', DoneMessage), ('fail-job', ErrorMessage), ('job-2', DoneMessage), ('job-3', DoneMessage)}
+        assert runner.batch_sizes == [3, 1]
+        assert all(message.rss > 0 for message in received)
+        assert all(message.manifest == [] for message in received if isinstance(message, DoneMessage))
+    finally:
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
+
+
+class PipelineRunner(BaseRunner):
+    """Runner implementing the pipeline stages; computation of the first job waits until the second job is loaded."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.second_loaded = threading.Event()
+        self.written = []
+
+    def _load_inputs(self, input_path: str):
+        job_id = path.basename(path.dirname(input_path))
+        if job_id == 'fail-job':
+            raise ValueError('failed on purpose')
+        if job_id == 'job-2':
+            self.second_loaded.set()
+        return job_id
+
+    def _compute(self, inputs):
+        if inputs == 'job-1':
+            assert self.second_loaded.wait(5)
+        return inputs.upper()
+
+    def _write_outputs(self, outputs, output_path: str) -> None:
+        self.written.append(outputs)
+
+
+async def test_runner_pipeline(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = PipelineRunner('config.yaml', port, 'predict')
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        for job_id in ('job-1', 'job-2', 'fail-job'):
+            await Messenger.send(socket, InputMessage(dict(job_id=job_id, io_data_root=str(tmpdir))))
+
+        received = [await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ErrorMessage]), 5) for _ in range(3)]
+        assert {(message.job_id, type(message)) for message in received} == \
+            {('job-1', DoneMessage), ('job-2', DoneMessage), ('fail-job', ErrorMessage)}
+        assert runner.written == ['JOB-1', 'JOB-2']
+    finally:
+        runner.second_loaded.set()
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
+
+
+class ProgressRunner(BlockingRunner):
+    """Runner which reports its progress before blocking."""
+
+    def _process_job(self, input_path: str, output_path: str) -> None:
+        self._report_progress(50, 'halfway', 1.5)
+        super()._process_job(input_path, output_path)
+
+
+async def test_runner_reports_progress(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = ProgressRunner('config.yaml', port, 'predict', progress_interval=0.1)
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        await Messenger.send(socket, InputMessage(dict(job_id='slow-job', io_data_root=str(tmpdir))))
+
+        message = await asyncio.wait_for(Messenger.recv(socket, [ProgressMessage]), 5)
+        assert (message.job_id, message.percent, message.stage, message.eta) == ('slow-job', 50, 'halfway', 1.5)
+
+        runner.released.set()
+        while isinstance(message, ProgressMessage):
+            message = await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ProgressMessage]), 5)
+        assert message.job_id == 'slow-job'
+    finally:
+        runner.released.set()
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
+
+
+class TilingRunner(BaseRunner):
+    """Runner which writes two output tiles and announces the first one before writing the second one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.released = threading.Event()
+
+    def _process_job(self, input_path: str, output_path: str) -> None:
+        os.makedirs(output_path)
+        for tile in ('tile-1', 'tile-2'):
+            with open(path.join(output_path, tile), 'w') as file:
+                file.write(tile)
+            self._output_ready(path.join(output_path, tile))
+            assert self.released.wait(5)
+
+
+async def test_runner_announces_outputs(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = TilingRunner('config.yaml', port, 'predict')
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        await Messenger.send(socket, InputMessage(dict(job_id='job', io_data_root=str(tmpdir))))
+
+        message = await asyncio.wait_for(Messenger.recv(socket, [OutputMessage]), 5)
+        assert [(entry.path, entry.size) for entry in message.files] == [('tile-1', 6)]
+
+        runner.released.set()
+        message = await asyncio.wait_for(Messenger.recv(socket, [OutputMessage]), 5)
+        assert [entry.path for entry in message.files] == ['tile-2']
+        message = await asyncio.wait_for(Messenger.recv(socket, [DoneMessage]), 5)
+        assert [entry.path for entry in message.manifest] == ['tile-1', 'tile-2']
+    finally:
+        runner.released.set()
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
+
+
+class FailingRunner(BaseRunner):
+    """Runner whose jobs fail if their input contains ``fail``."""
+
+    def _process_job(self, input_path: str, output_path: str) -> None:
+        if 'fail' in input_path:
+            raise ValueError('failed on purpose')
+
+
+async def test_runner_process_pool(feeding_socket, tmpdir):
+    socket, port = feeding_socket
+    runner = FailingRunner('config.yaml', port, 'predict', executor_type='process')
+    runner_task = asyncio.create_task(runner.process_all())
+
+    try:
+        for job_id in ('job', 'fail-job'):
+            await Messenger.send(socket, InputMessage(dict(job_id=job_id, io_data_root=str(tmpdir))))
+
+        received = {}
+        for _ in range(2):
+            message = await asyncio.wait_for(Messenger.recv(socket, [DoneMessage, ErrorMessage]), 10)
+            received[message.job_id] = message
+
+        assert isinstance(received['job'], DoneMessage)
+        assert isinstance(received['fail-job'], ErrorMessage)
+        assert 'in _process_job' in received['fail-job'].exception_traceback
+    finally:
+        runner_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner_task
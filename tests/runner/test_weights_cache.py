@@ -0,0 +1,26 @@
+import os
+
+from shepherd.runner.weights_cache import cache_weights, map_weights
+
+
+def test_map_weights(tmpdir):
+    source_path = str(tmpdir / 'weights.bin')
+    cache_dir = str(tmpdir / 'cache')
+    with open(source_path, 'wb') as file:
+        file.write(b'\x01\x02\x03\x04')
+
+    weights = map_weights(source_path, cache_dir)
+    assert weights[:] == b'\x01\x02\x03\x04'
+    cached_path = cache_weights(source_path, cache_dir)
+    assert os.listdir(cache_dir) == [os.path.basename(cached_path)]
+    assert map_weights(source_path)[:] == b'\x01\x02\x03\x04'  # without the cache
+
+    # a modified file replaces its outdated copy, while the existing map stays valid
+    with open(source_path, 'wb') as file:
+        file.write(b'\x05\x06')
+    os.utime(source_path, ns=(0, 42))
+
+    assert map_weights(source_path, cache_dir)[:] == b'\x05\x06'
+    assert len(os.listdir(cache_dir)) == 1
+    assert cache_weights(source_path, cache_dir) != cached_path
+    assert weights[:] == b'\x01\x02\x03\x04'
@@ -0,0 +1,55 @@
+import os
+import asyncio
+import subprocess
+import sys
+import time
+
+from shepherd.runner.zygote import fork_runner, fork_runner_async
+
+
+def test_zygote_forks_runners(tmpdir):
+    socket_path = str(tmpdir / 'zygote.sock')
+    stderr_file = str(tmpdir / 'stderr.txt')
+    zygote = subprocess.Popen([sys.executable, '-m', 'shepherd.runner.zygote', socket_path, 'json'], cwd=str(tmpdir))
+
+    try:
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        pid = fork_runner(socket_path, ['-p', '9998', 'config.yaml'], str(tmpdir), env, stderr_file=stderr_file)
+        assert pid not in (zygote.pid, os.getpid())
+
+        # the forked runner fails to import the model from its working directory and reports it to its stderr
+        for _ in range(100):
+            if os.path.exists(stderr_file) and "No module named 'model'" in open(stderr_file).read():
+                break
+            time.sleep(0.05)
+        else:
+            assert False, 'the forked runner did not report the missing model'
+
+        assert zygote.poll() is None  # the zygote keeps running
+    finally:
+        zygote.kill()
+        zygote.wait()
+
+
+async def test_zygote_forks_runners_async(tmpdir):
+    socket_path = str(tmpdir / 'zygote.sock')
+    zygote = subprocess.Popen([sys.executable, '-m', 'shepherd.runner.zygote', socket_path, 'json'], cwd=str(tmpdir))
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.ensure_future(tick())
+
+    try:
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        pid = await fork_runner_async(socket_path, ['-p', '9998', 'config.yaml'], str(tmpdir), env)
+        assert pid not in (zygote.pid, os.getpid())
+        assert ticks > 1  # the event loop kept running while the zygote was starting
+    finally:
+        ticker.cancel()
+        zygote.kill()
+        zygote.wait()
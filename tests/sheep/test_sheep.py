@@ -73,3 +73,22 @@ def test_bare_sheep_stdout_file_permission_denied(sheep_socket, tmpdir: Path, ba
 
     with pytest.raises(SheepConfigurationError):
         bare_sheep.start('emloop-test', 'latest')
+
+
+def test_bare_sheep_recycling(sheep_socket, tmpdir: Path, bare_sheep_config):
+    bare_sheep_config.update(max_jobs=3, max_rss_mb=100)
+    bare_sheep = BareSheep(bare_sheep_config, socket=sheep_socket, sheep_data_root=str(tmpdir))
+    bare_sheep.started_at = 0
+    assert bare_sheep.recycling_reason is None
+
+    bare_sheep.record_job(rss=50 * 1024 ** 2)
+    bare_sheep.in_progress = {'job-2'}
+    assert bare_sheep.recycling_reason is None
+
+    bare_sheep.record_job(rss=None)  # the last known RSS is kept
+    assert bare_sheep.runner_rss == 50 * 1024 ** 2
+    assert 'jobs' in bare_sheep.recycling_reason
+
+    bare_sheep.jobs_processed = 0
+    bare_sheep.record_job(rss=200 * 1024 ** 2)
+    assert 'memory' in bare_sheep.recycling_reason
@@ -2,6 +2,7 @@ import logging
 
 import pytest
 import os
+import os.path as path
 from schematics.exceptions import DataError
 
 from shepherd.config import load_shepherd_config, ShepherdConfig
@@ -29,6 +30,8 @@ def test_load_config(valid_config_file):
     assert config.sheep['bare_sheep']['type'] == 'bare'
     assert config.sheep['bare_sheep']['port'] == 9001
 
+    assert config.webhooks is None  # webhooks are disabled unless configured
+
 
 def test_load_config_valid_env(valid_config_env_file):
     os.environ['REGISTRY_URL'] = 'http://0.0.0.0:6000'
@@ -94,3 +97,24 @@ def test_load_config_invalid_env_name(invalid_config_env_file):
 def test_invalid_config(invalid_config_file):
     with pytest.raises(DataError), open(invalid_config_file) as file:
         load_shepherd_config(file)
+
+
+def test_memory_storage_config(tmpdir):
+    config_filepath = path.join(str(tmpdir), 'config.yml')
+    with open(config_filepath, 'w') as file:
+        file.write('data_root: /tmp/shepherd-data\nstorage:\n  type: memory\n  byte_budget: 1024\nsheep: {}\n')
+
+    with open(config_filepath) as file:
+        config = load_shepherd_config(file)
+
+    assert config.storage.type == 'memory'
+    assert config.storage.byte_budget == 1024
+
+
+def test_minio_storage_config_missing_url(tmpdir):
+    config_filepath = path.join(str(tmpdir), 'config.yml')
+    with open(config_filepath, 'w') as file:
+        file.write('data_root: /tmp/shepherd-data\nstorage:\n  access_key: a\n  secret_key: b\nsheep: {}\n')
+
+    with pytest.raises(DataError), open(config_filepath) as file:
+        load_shepherd_config(file)
@@ -0,0 +1,62 @@
+from io import BytesIO
+
+from shepherd.api.models import ModelModel, JobStatus
+from shepherd.config import ResultCacheConfig
+from shepherd.constants import DEFAULT_PAYLOAD_PATH, DEFAULT_OUTPUT_PATH
+from shepherd.shepherd import Shepherd
+from shepherd.shepherd.result_cache import ResultCache
+from shepherd.storage import InMemoryStorage
+
+
+def test_result_cache(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('time.monotonic', lambda: now[0])
+
+    cache = ResultCache(ttl=10, max_entries=2)
+    model = ModelModel(dict(name='model', version='1'))
+    digest = ResultCache.make_digest('inputs', model)
+
+    assert digest != ResultCache.make_digest('inputs', ModelModel(dict(name='model', version='2')))
+    assert digest != ResultCache.make_digest('other-inputs', model)
+    assert cache.get(digest) is None
+
+    cache.put(digest, 'job-1')
+    cache.put('b', 'job-2')
+    assert cache.get(digest) == 'job-1'
+
+    cache.put('c', 'job-3')  # `b` is the least recently used entry
+    assert len(cache) == 2
+    assert cache.get('b') is None
+
+    now[0] = 11
+    assert cache.get(digest) is None
+    assert len(cache) == 1
+
+    cache.remove('c')
+    assert len(cache) == 0
+
+
+async def test_memoized_job(valid_config, loop):
+    storage = InMemoryStorage()
+    shepherd = Shepherd(valid_config.sheep, valid_config.data_root, storage, valid_config.registry,
+                        ResultCacheConfig())
+    await shepherd.start()
+    job_meta = ModelModel(dict(name='emloop-test', version='test2'))
+
+    for job_id in ('original', 'duplicate'):
+        await storage.init_job(job_id)
+        await storage.put_file(job_id, DEFAULT_PAYLOAD_PATH, BytesIO(b'{"key": [1000]}'), 15)
+
+    # pretend the original job was processed by a sheep
+    await storage.put_file('original', DEFAULT_OUTPUT_PATH, BytesIO(b'output'), 6)
+    shepherd._result_cache.put(ResultCache.make_digest(await storage.get_inputs_digest('original'), job_meta),
+                               'original')
+
+    await shepherd.enqueue_job('duplicate', job_meta)
+
+    assert await shepherd.is_job_done('duplicate')
+    assert (await storage.get_job_status('duplicate')).status == JobStatus.DONE
+    assert (await storage.get_file('duplicate', DEFAULT_OUTPUT_PATH)).read() == b'output'
+    assert not shepherd._get_sheep('bare_sheep').running
+
+    await shepherd.close()
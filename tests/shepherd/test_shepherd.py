@@ -1,17 +1,23 @@
 import asyncio
 import json
+import os
+import os.path as path
 from contextlib import suppress
 
 import pytest
+import zmq
+import zmq.asyncio
 
-from shepherd.constants import DEFAULT_OUTPUT_PATH, JOB_STATUS_FILE
+from shepherd.comm import Messenger, OutputMessage, DoneMessage, ManifestEntry, ProgressMessage
+from shepherd.constants import DEFAULT_OUTPUT_PATH, JOB_STATUS_FILE, OUTPUT_DIR
 from shepherd.sheep import BareSheep, DockerSheep
-from shepherd.api.models import JobStatus
+from shepherd.api.models import JobStatus, JobStatusModel, ModelModel
 from shepherd.shepherd import Shepherd
 from shepherd.errors.api import UnknownSheepError, UnknownJobError
 from shepherd.errors.sheep import SheepConfigurationError
-from shepherd.config import ShepherdConfig
+from shepherd.config import ShepherdConfig, WebhookConfig
 from shepherd.utils.storage import minio_object_exists
+from shepherd.storage import InMemoryStorage
 
 
 async def test_shepherd_init(valid_config: ShepherdConfig, minio):
@@ -108,3 +114,100 @@ async def test_bad_runner_job(shepherd, bad_runner_job, minio):
     assert await shepherd.is_job_done(job_id)
     assert minio_object_exists(minio, job_id, JOB_STATUS_FILE)
     assert json.load(minio.get_object(job_id, JOB_STATUS_FILE))["status"] == JobStatus.FAILED
+
+
+async def test_enqueue_jobs_unknown_sheep(valid_config: ShepherdConfig, loop):
+    shepherd = Shepherd(valid_config.sheep, valid_config.data_root, InMemoryStorage())
+    await shepherd.start()
+    job_meta = ModelModel(dict(name='emloop-test', version='test2'))
+
+    with pytest.raises(UnknownSheepError):
+        await shepherd.enqueue_jobs([('job-1', job_meta, None, None, None), ('job-2', job_meta, 'unknown-sheep', None, None)])
+
+    assert shepherd.get_job_status('job-1') is None
+    await shepherd.close()
+
+
+async def test_listen_uploads_announced_outputs(valid_config: ShepherdConfig, mocker, loop):
+    storage = InMemoryStorage()
+    shepherd = Shepherd(valid_config.sheep, valid_config.data_root, storage)
+    sheep = shepherd._get_sheep('bare_sheep')
+    mocker.patch.object(BareSheep, 'running', new_callable=mocker.PropertyMock, return_value=True)
+    await shepherd.start()
+
+    # pretend that the runner is processing the job
+    runner_socket = zmq.asyncio.Context.instance().socket(zmq.DEALER)
+    runner_socket.bind('tcp://0.0.0.0:{}'.format(valid_config.sheep['bare_sheep']['port']))
+    sheep.socket.connect('tcp://0.0.0.0:{}'.format(valid_config.sheep['bare_sheep']['port']))
+
+    await storage.init_job('job')
+    shepherd._job_status['job'] = JobStatusModel(dict(status=JobStatus.PROCESSING, model=dict(name='model')))
+    sheep.in_progress.add('job')
+    output_dir = path.join(sheep.sheep_data_root, 'job', OUTPUT_DIR)
+    os.makedirs(output_dir)
+    for tile in ('tile-1', 'tile-2'):
+        with open(path.join(output_dir, tile), 'w') as file:
+            file.write(tile)
+
+    push_job_output = mocker.spy(storage, 'push_job_output')
+    manifest = [ManifestEntry(dict(path=tile, size=6)) for tile in ('tile-1', 'tile-2')]
+
+    try:
+        await Messenger.send(runner_socket, OutputMessage(dict(job_id='job', files=manifest[:1])))
+        await Messenger.send(runner_socket, DoneMessage(dict(job_id='job', manifest=manifest)))
+
+        for _ in range(50):
+            if 'job' not in sheep.in_progress:
+                break
+            await asyncio.sleep(0.1)
+
+        assert push_job_output.call_count == 1
+        assert (await storage.get_file('job', OUTPUT_DIR + '/tile-1')).read() == b'tile-1'
+        assert (await storage.get_file('job', OUTPUT_DIR + '/tile-2')).read() == b'tile-2'
+        assert (await storage.get_job_status('job')).status == JobStatus.DONE
+    finally:
+        runner_socket.close(0)
+        await shepherd.close()
+
+
+async def test_progress_postpones_stall_deadline(valid_config: ShepherdConfig, mocker, loop):
+    shepherd = Shepherd(valid_config.sheep, valid_config.data_root, InMemoryStorage())
+    sheep = shepherd._get_sheep('bare_sheep')
+    mocker.patch.object(BareSheep, 'stall_timeout', new_callable=mocker.PropertyMock, return_value=10)
+    shepherd._job_status['job'] = JobStatusModel(dict(status=JobStatus.PROCESSING, model=dict(name='model')))
+
+    # heartbeats without any reported progress do not count as progress
+    shepherd._record_job_progress('job', ProgressMessage(dict(job_id='job')), sheep)
+    assert 'job' not in shepherd._job_stall_deadlines
+
+    shepherd._record_job_progress('job', ProgressMessage(dict(job_id='job', percent=10)), sheep)
+    assert 'job' in shepherd._job_stall_deadlines
+    shepherd._job_stall_deadlines.remove('job')
+
+    shepherd._record_job_progress('job', ProgressMessage(dict(job_id='job', percent=10)), sheep)
+    assert 'job' not in shepherd._job_stall_deadlines
+    assert shepherd.get_job_status('job').progress.percent == 10
+
+
+async def test_callback_url_stored_with_status(valid_config: ShepherdConfig, tmpdir, mocker, loop):
+    storage = InMemoryStorage()
+    shepherd = Shepherd(valid_config.sheep, str(tmpdir), storage, webhook_config=WebhookConfig())
+    notify = mocker.patch.object(shepherd._webhooks, 'notify')
+    mocker.patch.object(shepherd, '_dequeue_and_feed_jobs', new=mocker.AsyncMock())  # keep the job queued
+    await shepherd.start()
+
+    try:
+        await storage.init_job('job')
+        await shepherd.enqueue_job('job', ModelModel(dict(name='model', version='1')), 'bare_sheep',
+                                   'http://example.com/hook')
+        assert (await storage.get_job_status('job')).callback_url == 'http://example.com/hook'
+        notify.assert_not_called()
+
+        # the final status is reported to the callback URL stored in the status (e.g. loaded after a restart)
+        status = await storage.get_job_status('job')
+        status.status = JobStatus.DONE
+        await (await shepherd._update_job_status('job', status))
+        notify.assert_called_once()
+        assert notify.call_args[0][:2] == ('http://example.com/hook', 'job')
+    finally:
+        await shepherd.close()
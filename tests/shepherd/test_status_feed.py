@@ -0,0 +1,31 @@
+from shepherd.api.models import JobStatus, JobStatusModel
+from shepherd.shepherd.status_feed import JobStatusFeed
+
+
+def make_status(status: str) -> JobStatusModel:
+    return JobStatusModel({'status': status, 'model': {'name': 'model', 'version': '1'}})
+
+
+async def test_status_feed(loop):
+    feed = JobStatusFeed(max_pending=2)
+    all_jobs = feed.subscribe()
+    single_job = feed.subscribe({'job-1'})
+
+    feed.publish('job-1', make_status(JobStatus.QUEUED))
+    feed.publish('job-2', make_status(JobStatus.QUEUED))
+
+    assert [(job_id, status.status) for job_id, status in await all_jobs.get()] == \
+        [('job-1', JobStatus.QUEUED), ('job-2', JobStatus.QUEUED)]
+    assert [job_id for job_id, _ in await single_job.get()] == ['job-1']
+    assert await single_job.get(timeout=0.01) == []
+
+    for status in (JobStatus.PROCESSING, JobStatus.DONE, JobStatus.FAILED):
+        feed.publish('job-2', make_status(status))
+
+    assert [status.status for _, status in await all_jobs.get()] == [JobStatus.DONE, JobStatus.FAILED]
+    assert all_jobs.dropped_count == 1
+
+    all_jobs.close()
+    feed.publish('job-1', make_status(JobStatus.DONE))
+    assert await all_jobs.get(timeout=0.01) == []
+    assert len(await single_job.get()) == 1
@@ -0,0 +1,22 @@
+from shepherd.shepherd.timer_wheel import TimerWheel
+
+
+def test_timer_wheel():
+    wheel = TimerWheel(resolution=1, slot_count=4)
+    wheel.add('past', 0.5)
+    wheel.add('soon', 2.5)
+    wheel.add('later', 6.5)  # shares the slot with `soon`
+    wheel.add('removed', 3)
+    wheel.remove('removed')
+    assert len(wheel) == 3
+
+    assert wheel.advance(1.2) == ['past']
+    assert wheel.advance(2.2) == []
+    assert wheel.advance(3.2) == ['soon']
+    assert 'later' in wheel
+
+    wheel.add('overdue', 1)  # expires in the next tick even though its own tick already elapsed
+    assert wheel.advance(4.1) == ['overdue']
+
+    assert wheel.advance(100) == ['later']  # more than one revolution elapsed
+    assert len(wheel) == 0
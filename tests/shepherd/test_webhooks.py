@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+from shepherd.api.models import JobStatus, JobStatusModel
+from shepherd.shepherd.webhooks import WebhookDispatcher
+
+
+def make_status(status: str) -> JobStatusModel:
+    return JobStatusModel({'status': status, 'model': {'name': 'model', 'version': '1'}})
+
+
+async def start_webhook_server(aiohttp_server, failures: int = 0):
+    """Start a webhook endpoint which fails the given number of requests and records the other ones."""
+    received = []
+
+    async def webhook(request: web.Request):
+        nonlocal failures
+        if failures > 0:
+            failures -= 1
+            return web.Response(status=503)
+
+        received.append(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post('/hook', webhook)
+    server = await aiohttp_server(app)
+
+    return str(server.make_url('/hook')), received
+
+
+async def wait_until_empty(dispatcher: WebhookDispatcher):
+    for _ in range(100):
+        if len(dispatcher) == 0:
+            return
+        await asyncio.sleep(0.05)
+
+
+async def test_webhooks_batched(aiohttp_server, tmpdir, loop):
+    url, received = await start_webhook_server(aiohttp_server)
+    dispatcher = WebhookDispatcher(str(tmpdir), batch_size=2, batch_delay=0.1)
+    await dispatcher.start()
+
+    dispatcher.notify(url, 'job-1', make_status(JobStatus.DONE))
+    dispatcher.notify(url, 'job-2', make_status(JobStatus.FAILED))
+    dispatcher.notify(url, 'job-3', make_status(JobStatus.DONE))
+    await wait_until_empty(dispatcher)
+    await dispatcher.close()
+
+    assert sorted(len(body['jobs']) for body in received) == [1, 2]
+    statuses = {job['job_id']: job['status']['status'] for body in received for job in body['jobs']}
+    assert statuses == {'job-1': JobStatus.DONE, 'job-2': JobStatus.FAILED, 'job-3': JobStatus.DONE}
+    assert os.listdir(str(tmpdir)) == []
+
+
+async def test_webhooks_retried_from_outbox(aiohttp_server, tmpdir, loop):
+    url, received = await start_webhook_server(aiohttp_server, failures=1)
+
+    # the delivery survives a restart before it is sent
+    dispatcher = WebhookDispatcher(str(tmpdir))
+    dispatcher.notify(url, 'job-1', make_status(JobStatus.DONE))
+    await dispatcher.close()
+    assert len(os.listdir(str(tmpdir))) == 1
+
+    dispatcher = WebhookDispatcher(str(tmpdir), batch_delay=0, retry_delay=0.1)
+    assert len(dispatcher) == 1
+    await dispatcher.start()
+    await wait_until_empty(dispatcher)
+    await dispatcher.close()
+
+    assert [job['job_id'] for body in received for job in body['jobs']] == ['job-1']
+    assert os.listdir(str(tmpdir)) == []
+
+
+async def test_webhooks_give_up(aiohttp_server, tmpdir, loop):
+    url, received = await start_webhook_server(aiohttp_server, failures=10)
+    dispatcher = WebhookDispatcher(str(tmpdir), batch_delay=0, max_attempts=2, retry_delay=0.1)
+    await dispatcher.start()
+
+    dispatcher.notify(url, 'job-1', make_status(JobStatus.DONE))
+    await wait_until_empty(dispatcher)
+    await dispatcher.close()
+
+    assert len(dispatcher) == 0
+    assert received == []
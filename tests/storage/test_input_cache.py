@@ -0,0 +1,99 @@
+import os
+import errno
+import os.path as path
+
+import pytest
+
+from shepherd.storage import InputCache
+
+
+def write_file(file_path, content: bytes) -> str:
+    with open(file_path, 'wb') as file:
+        file.write(content)
+    return file_path
+
+
+@pytest.fixture()
+def cache_root(tmpdir):
+    yield path.join(str(tmpdir), 'cache')
+
+
+def test_add_and_link(tmpdir, cache_root):
+    cache = InputCache(cache_root, 100)
+    source = write_file(path.join(str(tmpdir), 'source'), b'content')
+    destination = path.join(str(tmpdir), 'destination')
+
+    assert not cache.link('key', destination)
+
+    cache.add('key', source)
+    assert cache.size == 7
+    assert cache.link('key', destination)
+    assert os.stat(destination).st_ino == os.stat(source).st_ino
+
+    with open(destination, 'rb') as file:
+        assert file.read() == b'content'
+
+
+def test_add_keeps_mode(tmpdir, cache_root):
+    cache = InputCache(cache_root, 100)
+    source = write_file(path.join(str(tmpdir), 'source'), b'content')
+    mode = os.stat(source).st_mode
+
+    cache.add('key', source)
+    assert os.stat(source).st_mode == mode
+
+
+def test_modified_file_is_evicted(tmpdir, cache_root):
+    cache = InputCache(cache_root, 100)
+    cache.add('key', write_file(path.join(str(tmpdir), 'source'), b'content'))
+    destination = path.join(str(tmpdir), 'destination')
+    assert cache.link('key', destination)
+
+    write_file(destination, b'tampered')  # modifies the shared content in place
+    assert not cache.link('key', path.join(str(tmpdir), 'destination-2'))
+    assert cache.size == 0
+    assert not path.exists(path.join(cache_root, 'key'))
+
+
+def test_link_falls_back_to_copy(tmpdir, cache_root, mocker):
+    cache = InputCache(cache_root, 100)
+    cache.add('key', write_file(path.join(str(tmpdir), 'source'), b'content'))
+    destination = path.join(str(tmpdir), 'destination')
+
+    mocker.patch('os.link', side_effect=OSError(errno.EXDEV, 'Invalid cross-device link'))
+    assert cache.link('key', destination)
+
+    with open(destination, 'rb') as file:
+        assert file.read() == b'content'
+
+
+def test_eviction(tmpdir, cache_root):
+    cache = InputCache(cache_root, 10)
+
+    for key in ('a', 'b'):
+        cache.add(key, write_file(path.join(str(tmpdir), key), b'12345'))
+
+    assert cache.link('a', path.join(str(tmpdir), 'a-link'))  # `a` is now more recent than `b`
+
+    cache.add('c', write_file(path.join(str(tmpdir), 'c'), b'12345'))
+    assert cache.size == 10
+    assert cache.link('a', path.join(str(tmpdir), 'a-link-2'))
+    assert not cache.link('b', path.join(str(tmpdir), 'b-link'))
+    assert not path.exists(path.join(cache_root, 'b'))
+
+    cache.add('too-big', write_file(path.join(str(tmpdir), 'too-big'), b'x' * 11))
+    assert not cache.link('too-big', path.join(str(tmpdir), 'too-big-link'))
+
+
+def test_reload(tmpdir, cache_root):
+    cache = InputCache(cache_root, 100)
+    cache.add('key', write_file(path.join(str(tmpdir), 'source'), b'content'))
+
+    reloaded_cache = InputCache(cache_root, 100)
+    assert reloaded_cache.size == 7
+    assert reloaded_cache.link('key', path.join(str(tmpdir), 'destination'))
+
+
+def test_make_key():
+    assert InputCache.make_key('"abc"', 42) == 'abc-42'
+    assert InputCache.make_key('"../abc-2"', 42) == 'abc-2-42'
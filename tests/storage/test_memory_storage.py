@@ -0,0 +1,233 @@
+import os
+import os.path as path
+from io import BytesIO
+from datetime import datetime
+
+import pytest
+
+from shepherd.api.models import JobStatus, JobStatusModel
+from shepherd.constants import DEFAULT_PAYLOAD_PATH, DEFAULT_OUTPUT_FILE, DEFAULT_OUTPUT_PATH, INPUT_DIR, OUTPUT_DIR, \
+    INPUT_ARCHIVE, OUTPUT_ARCHIVE
+from shepherd.comm.messages import ManifestEntry
+from shepherd.errors.api import NameConflictError, StorageError, UnknownJobError, OutputManifestError
+from shepherd.storage import InMemoryStorage
+from shepherd.utils.archive import create_archive, extract_archive
+
+
+async def test_job_lifecycle(tmpdir):
+    storage = InMemoryStorage()
+    assert await storage.is_accessible()
+    assert not await storage.job_dir_exists("job")
+
+    await storage.init_job("job")
+    assert await storage.job_dir_exists("job")
+
+    with pytest.raises(NameConflictError):
+        await storage.init_job("job")
+
+    await storage.put_file("job", DEFAULT_PAYLOAD_PATH, BytesIO(b"payload"), 7)
+    await storage.put_file("job", INPUT_DIR + "/nested/file", BytesIO(b"nested"), 6)
+
+    working_directory = str(tmpdir)
+    await storage.pull_job_data("job", working_directory)
+    with open(path.join(working_directory, DEFAULT_PAYLOAD_PATH), "rb") as file:
+        assert file.read() == b"payload"
+    with open(path.join(working_directory, INPUT_DIR, "nested", "file"), "rb") as file:
+        assert file.read() == b"nested"
+
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    with open(path.join(working_directory, OUTPUT_DIR, DEFAULT_OUTPUT_FILE), "wb") as file:
+        file.write(b"output")
+    await storage.push_job_data("job", working_directory)
+
+    assert (await storage.get_file("job", DEFAULT_OUTPUT_PATH)).read() == b"output"
+    assert await storage.get_file("job", OUTPUT_DIR + "/missing") is None
+    assert await storage.get_file("missing", DEFAULT_OUTPUT_PATH) is None
+
+
+async def test_push_job_data_with_manifest(tmpdir):
+    storage = InMemoryStorage()
+    await storage.init_job("job")
+
+    working_directory = str(tmpdir)
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    for name in ("listed", "unlisted"):
+        with open(path.join(working_directory, OUTPUT_DIR, name), "wb") as file:
+            file.write(b"output")
+
+    with pytest.raises(OutputManifestError):
+        await storage.push_job_data("job", working_directory, [ManifestEntry(dict(path="listed", size=42))])
+    assert await storage.get_file("job", OUTPUT_DIR + "/listed") is None
+
+    await storage.push_job_data("job", working_directory, [ManifestEntry(dict(path="listed", size=6))])
+    assert (await storage.get_file("job", OUTPUT_DIR + "/listed")).read() == b"output"
+    assert await storage.get_file("job", OUTPUT_DIR + "/unlisted") is None
+
+
+async def test_push_job_output(tmpdir, mocker):
+    storage = InMemoryStorage()
+    await storage.init_job("job")
+
+    working_directory = str(tmpdir)
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    with open(path.join(working_directory, OUTPUT_DIR, "tile"), "wb") as file:
+        file.write(b"tile")
+
+    entry = ManifestEntry(dict(path="tile", size=4))
+    assert await storage.push_job_output("job", working_directory, entry)
+    assert (await storage.get_file("job", OUTPUT_DIR + "/tile")).read() == b"tile"
+
+    # the file uploaded in advance is not uploaded again
+    put_object = mocker.spy(storage, "_put_object")
+    await storage.push_job_data("job", working_directory, [entry], [entry])
+    assert put_object.call_count == 0
+
+
+async def test_job_status():
+    storage = InMemoryStorage()
+
+    with pytest.raises(UnknownJobError):
+        await storage.get_job_status("job")
+
+    await storage.init_job("job")
+
+    with pytest.raises(UnknownJobError):
+        await storage.get_job_status("job")
+
+    await storage.set_job_status("job", JobStatusModel({"status": JobStatus.QUEUED, "model": {"name": "a"},
+                                                        "enqueued_at": datetime.utcnow()}))
+    assert (await storage.get_job_status("job")).status == JobStatus.QUEUED
+
+
+async def test_missing_job(tmpdir):
+    storage = InMemoryStorage()
+
+    with pytest.raises(StorageError):
+        await storage.pull_job_data("job", str(tmpdir))
+
+    with pytest.raises(StorageError):
+        await storage.put_file("job", DEFAULT_PAYLOAD_PATH, BytesIO(b"payload"), 7)
+
+
+async def test_eviction():
+    storage = InMemoryStorage(byte_budget=10)
+
+    for job_id in ("a", "b", "c"):
+        await storage.init_job(job_id)
+
+    await storage.put_file("a", DEFAULT_PAYLOAD_PATH, BytesIO(b"aaaa"), 4)
+    await storage.put_file("b", DEFAULT_PAYLOAD_PATH, BytesIO(b"bbbb"), 4)
+    assert (await storage.get_file("a", DEFAULT_PAYLOAD_PATH)).read() == b"aaaa"  # `a` is now more recent than `b`
+
+    await storage.put_file("c", DEFAULT_PAYLOAD_PATH, BytesIO(b"cccc"), 4)
+    assert storage.size == 8
+    assert await storage.job_dir_exists("a")
+    assert not await storage.job_dir_exists("b")
+    assert await storage.job_dir_exists("c")
+
+    with pytest.raises(StorageError):
+        await storage.put_file("c", INPUT_DIR + "/big", BytesIO(b"x" * 11), 11)
+
+    assert storage.size <= 10
+    assert await storage.get_file("c", INPUT_DIR + "/big") is None
+
+
+async def test_oversized_object_evicts_nothing():
+    storage = InMemoryStorage(byte_budget=10)
+
+    for job_id in ("a", "b", "c"):
+        await storage.init_job(job_id)
+
+    await storage.put_file("a", DEFAULT_PAYLOAD_PATH, BytesIO(b"aaaa"), 4)
+    await storage.put_file("b", DEFAULT_PAYLOAD_PATH, BytesIO(b"bbb"), 3)
+
+    with pytest.raises(StorageError):
+        await storage.put_file("c", DEFAULT_PAYLOAD_PATH, BytesIO(b"x" * 11), 11)
+
+    assert storage.size == 7
+    assert (await storage.get_file("a", DEFAULT_PAYLOAD_PATH)).read() == b"aaaa"
+    assert (await storage.get_file("b", DEFAULT_PAYLOAD_PATH)).read() == b"bbb"
+
+    with pytest.raises(StorageError):
+        await storage.put_file("b", DEFAULT_PAYLOAD_PATH, BytesIO(b"y" * 11), 11)
+
+    assert storage.size == 7
+    assert (await storage.get_file("b", DEFAULT_PAYLOAD_PATH)).read() == b"bbb"  # the previous object is kept
+
+
+async def test_packed_inputs(tmpdir):
+    source_directory = path.join(str(tmpdir), 'source')
+    os.makedirs(source_directory)
+    with open(path.join(source_directory, 'tile.bin'), 'wb') as file:
+        file.write(b'tile')
+
+    archive_path = path.join(str(tmpdir), INPUT_ARCHIVE)
+    create_archive(source_directory, archive_path)
+
+    storage = InMemoryStorage()
+    await storage.init_job("job")
+    with open(archive_path, 'rb') as archive:
+        await storage.put_file("job", INPUT_ARCHIVE, archive, os.stat(archive_path).st_size)
+
+    working_directory = path.join(str(tmpdir), 'job')
+    await storage.pull_job_data("job", working_directory)
+
+    with open(path.join(working_directory, INPUT_DIR, 'tile.bin'), 'rb') as file:
+        assert file.read() == b'tile'
+    assert not path.exists(path.join(working_directory, INPUT_ARCHIVE))
+
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    with open(path.join(working_directory, OUTPUT_DIR, 'result.bin'), 'wb') as file:
+        file.write(b'result')
+
+    assert not await storage.push_job_output("job", working_directory, ManifestEntry(dict(path='result.bin', size=6)))
+    await storage.push_job_data("job", working_directory)
+    assert await storage.get_file("job", OUTPUT_DIR + "/result.bin") is None
+
+    extracted_directory = path.join(str(tmpdir), 'extracted')
+    with open(path.join(str(tmpdir), OUTPUT_ARCHIVE), 'wb') as file:
+        file.write((await storage.get_file("job", OUTPUT_ARCHIVE)).read())
+    extract_archive(path.join(str(tmpdir), OUTPUT_ARCHIVE), extracted_directory)
+
+    with open(path.join(extracted_directory, 'result.bin'), 'rb') as file:
+        assert file.read() == b'result'
+
+
+async def test_forget_packed_job(tmpdir):
+    source_directory = path.join(str(tmpdir), 'source')
+    os.makedirs(source_directory)
+    archive_path = path.join(str(tmpdir), INPUT_ARCHIVE)
+    create_archive(source_directory, archive_path)
+
+    storage = InMemoryStorage()
+    await storage.init_job("job")
+    with open(archive_path, 'rb') as archive:
+        await storage.put_file("job", INPUT_ARCHIVE, archive, os.stat(archive_path).st_size)
+
+    working_directory = path.join(str(tmpdir), 'job')
+    await storage.pull_job_data("job", working_directory)
+    await storage.forget_job("job")
+
+    os.makedirs(path.join(working_directory, OUTPUT_DIR))
+    with open(path.join(working_directory, OUTPUT_DIR, 'result.bin'), 'wb') as file:
+        file.write(b'result')
+
+    assert await storage.push_job_output("job", working_directory, ManifestEntry(dict(path='result.bin', size=6)))
+
+
+async def test_inputs_digest_and_output_copy():
+    storage = InMemoryStorage()
+
+    for job_id in ("first", "second", "third"):
+        await storage.init_job(job_id)
+        await storage.put_file(job_id, DEFAULT_PAYLOAD_PATH, BytesIO(b"payload"), 7)
+
+    await storage.put_file("third", DEFAULT_PAYLOAD_PATH, BytesIO(b"changed"), 7)
+
+    assert await storage.get_inputs_digest("first") == await storage.get_inputs_digest("second")
+    assert await storage.get_inputs_digest("first") != await storage.get_inputs_digest("third")
+
+    await storage.put_file("first", DEFAULT_OUTPUT_PATH, BytesIO(b"output"), 6)
+    await storage.copy_job_outputs("first", "second")
+    assert (await storage.get_file("second", DEFAULT_OUTPUT_PATH)).read() == b"output"
+    assert (await storage.get_file("second", DEFAULT_PAYLOAD_PATH)).read() == b"payload"
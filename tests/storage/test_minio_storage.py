@@ -0,0 +1,166 @@
+import pytest
+from aiohttp import web
+
+from shepherd.errors.api import StorageError
+from shepherd.storage import MinioStorage
+
+
+def test_get_error_code():
+    error_xml = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+                '<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message>' \
+                '<Key>job_status.json</Key><BucketName>job</BucketName></Error>'
+
+    assert MinioStorage._get_error_code(error_xml) == "NoSuchKey"
+    assert MinioStorage._get_error_code("") is None
+    assert MinioStorage._get_error_code("<Error></Error>") is None
+
+
+def list_page(keys, next_token=None):
+    contents = ''.join(f'<Contents><Key>{key}</Key><ETag>&quot;{key}-etag&quot;</ETag><Size>1</Size></Contents>'
+                       for key in keys)
+    truncated = 'true' if next_token else 'false'
+    token = f'<NextContinuationToken>{next_token}</NextContinuationToken>' if next_token else ''
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n' \
+           f'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/"><Name>job</Name>' \
+           f'<KeyCount>{len(keys)}</KeyCount><MaxKeys>2</MaxKeys>{contents}' \
+           f'<IsTruncated>{truncated}</IsTruncated>{token}</ListBucketResult>'
+
+
+async def test_list_bucket(fake_minio):
+    async def list_objects(request):
+        if 'continuation-token' not in request.query:
+            return web.Response(text=list_page(['inputs/a', 'inputs/b'], 'token/1'))
+        return web.Response(text=list_page(['inputs/c']))
+
+    app = web.Application()
+    app.router.add_get('/job/', list_objects)
+    storage = await fake_minio(app, list_max_keys=2)
+
+    objects = [object_info async for object_info in storage._list_bucket('job', prefix='inputs/')]
+
+    assert [object_info.name for object_info in objects] == ['inputs/a', 'inputs/b', 'inputs/c']
+    assert objects[0].etag == '"inputs/a-etag"'
+    assert objects[0].size == 1
+
+    first, second = app['requests']
+    assert first.query['list-type'] == '2'
+    assert first.query['prefix'] == 'inputs/'
+    assert first.query['max-keys'] == '2'
+    assert 'continuation-token' not in first.query
+    assert second.query['continuation-token'] == 'token/1'
+
+
+async def test_list_bucket_error(fake_minio):
+    async def list_objects(request):
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get('/job/', list_objects)
+    storage = await fake_minio(app)
+
+    with pytest.raises(StorageError):
+        _ = [key async for key in storage._list_bucket('job')]
+
+
+def object_size_app() -> web.Application:
+    async def head_object(request):
+        sizes = {'small': 10, 'large': 1000}
+        if request.match_info['name'] not in sizes:
+            return web.Response(status=404)
+        return web.Response(headers={'Content-Length': str(sizes[request.match_info['name']])})
+
+    app = web.Application()
+    app.router.add_route('HEAD', '/job/outputs/{name}', head_object)
+    return app
+
+
+async def test_get_file_url(fake_minio):
+    storage = await fake_minio(object_size_app())
+    assert await storage.get_file_url('job', 'outputs/large') is None
+
+    app = object_size_app()
+    storage = await fake_minio(app, redirect_downloads=True, public_url='http://minio.example.com')
+    url = await storage.get_file_url('job', 'outputs/small')
+    assert url.startswith('http://minio.example.com/job/outputs/small?')
+    assert 'X-Amz-Expires=300' in url
+    assert await storage.get_file_url('job', 'outputs/missing') is None
+
+    storage = await fake_minio(object_size_app(), redirect_downloads=True, redirect_min_size=100)
+    assert await storage.get_file_url('job', 'outputs/small') is None
+    assert await storage.get_file_url('job', 'outputs/missing') is None
+    assert 'X-Amz-Signature=' in await storage.get_file_url('job', 'outputs/large')
+
+
+async def test_download_file(fake_minio):
+    async def get_object(request):
+        if request.match_info['name'] == 'missing':
+            return web.Response(status=404)
+        if request.headers.get('If-None-Match') == '"etag"':
+            return web.Response(status=304, headers={'ETag': '"etag"'})
+        return web.Response(status=206, body=b'234', headers={'ETag': '"etag"', 'Content-Range': 'bytes 2-4/10',
+                                                               'X-Amz-Request-Id': 'abc'})
+
+    app = web.Application()
+    app.router.add_get('/job/outputs/{name}', get_object)
+    storage = await fake_minio(app)
+
+    download = await storage.download_file('job', 'outputs/output', {'Range': 'bytes=2-4', 'Cookie': 'secret'})
+    assert download.status == 206
+    assert await download.stream.read() == b'234'
+    assert download.headers == {'ETag': '"etag"', 'Content-Range': 'bytes 2-4/10', 'Content-Length': '3'}
+    assert app['requests'][0].headers['Range'] == 'bytes=2-4'
+    assert 'Cookie' not in app['requests'][0].headers
+
+    download = await storage.download_file('job', 'outputs/output')
+    download.stream.close()  # e.g. the client disconnected before the content was read
+    assert download.stream._response.closed
+
+    download = await storage.download_file('job', 'outputs/output', {'If-None-Match': '"etag"'})
+    assert download.status == 304
+    assert download.stream is None
+
+    assert await storage.download_file('job', 'outputs/missing') is None
+
+
+async def test_put_file_stream(fake_minio):
+    async def put_object(request):
+        request.app['uploads'][request.match_info['name']] = (request.headers, await request.read())
+        return web.Response()
+
+    async def chunks():
+        for chunk in (b'first ', b'second'):
+            yield chunk
+
+    app = web.Application()
+    app['uploads'] = {}
+    app.router.add_put('/job/inputs/{name}', put_object)
+    storage = await fake_minio(app)
+
+    await storage.put_file_stream('job', 'inputs/known', chunks(), 12)
+    await storage.put_file_stream('job', 'inputs/unknown', chunks())
+
+    for name in ('known', 'unknown'):
+        headers, data = app['uploads'][name]
+        assert data == b'first second'
+        assert headers['Content-Length'] == '12'
+        assert headers['X-Amz-Content-Sha256'] == 'UNSIGNED-PAYLOAD'
+
+
+async def test_copy_object_error_in_body(fake_minio):
+    async def copy_object(request):
+        if request.match_info['name'] == 'failing':
+            return web.Response(text='<?xml version="1.0" encoding="UTF-8"?>\n'
+                                     '<Error><Code>InternalError</Code><Message>We encountered an internal error.'
+                                     '</Message></Error>')
+        return web.Response(text='<?xml version="1.0" encoding="UTF-8"?>\n'
+                                 '<CopyObjectResult><ETag>"etag"</ETag></CopyObjectResult>')
+
+    app = web.Application()
+    app.router.add_put('/target/outputs/{name}', copy_object)
+    storage = await fake_minio(app)
+
+    await storage._copy_object('source', 'outputs/ok', 'target', 'outputs/ok')
+    assert app['requests'][0].headers['X-Amz-Copy-Source'] == '/source/outputs/ok'
+
+    with pytest.raises(StorageError):
+        await storage._copy_object('source', 'outputs/failing', 'target', 'outputs/failing')
@@ -0,0 +1,104 @@
+import os
+import os.path as path
+
+import pytest
+
+from shepherd.constants import INPUT_DIR, OUTPUT_DIR
+from shepherd.storage import OutputCache
+
+
+def write_file(file_path, content: bytes) -> str:
+    os.makedirs(path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'wb') as file:
+        file.write(content)
+    return file_path
+
+
+@pytest.fixture()
+def cache_root(tmpdir):
+    yield path.join(str(tmpdir), 'cache')
+
+
+def test_tiers(tmpdir, cache_root):
+    cache = OutputCache(cache_root, max_memory_bytes=100, max_disk_bytes=100, max_memory_file_size=10)
+    working_directory = path.join(str(tmpdir), 'job')
+    write_file(path.join(working_directory, OUTPUT_DIR, 'small'), b'small')
+    write_file(path.join(working_directory, INPUT_DIR, 'input'), b'input')
+    large = write_file(path.join(working_directory, OUTPUT_DIR, 'nested', 'large'), b'large' * 10)
+
+    cache.add_job('job', working_directory)
+    assert cache.memory_size == 5
+    assert cache.disk_size == 50
+
+    assert cache.get('job', OUTPUT_DIR + '/small').read() == b'small'
+
+    large_path = cache.get('job', OUTPUT_DIR + '/nested/large')
+    assert os.stat(large_path).st_ino == os.stat(large).st_ino
+
+    assert cache.get('job', OUTPUT_DIR + '/missing') is None
+    assert cache.get('job', INPUT_DIR + '/input') is None
+    assert cache.get('other-job', OUTPUT_DIR + '/small') is None
+
+
+def test_eviction(tmpdir, cache_root):
+    cache = OutputCache(cache_root, max_memory_bytes=10, max_disk_bytes=60, max_memory_file_size=5)
+
+    for job_id in ('first', 'second', 'third'):
+        working_directory = path.join(str(tmpdir), job_id)
+        write_file(path.join(working_directory, OUTPUT_DIR, 'small'), b'small')
+        write_file(path.join(working_directory, OUTPUT_DIR, 'large'), b'large' * 5)
+        cache.get('first', OUTPUT_DIR + '/small')  # keep the first job recently used
+        cache.get('first', OUTPUT_DIR + '/large')
+        cache.add_job(job_id, working_directory)
+
+    assert cache.memory_size == 10
+    assert cache.disk_size == 50
+    assert cache.get('first', OUTPUT_DIR + '/small') is not None
+    assert cache.get('first', OUTPUT_DIR + '/large') is not None
+    assert cache.get('second', OUTPUT_DIR + '/small') is None
+    assert cache.get('second', OUTPUT_DIR + '/large') is None
+    assert len(os.listdir(cache_root)) == 2
+
+
+def test_cleared_on_start(tmpdir, cache_root):
+    cache = OutputCache(cache_root, max_memory_bytes=0, max_disk_bytes=100, max_memory_file_size=0)
+    write_file(path.join(str(tmpdir), 'job', OUTPUT_DIR, 'file'), b'content')
+    cache.add_job('job', path.join(str(tmpdir), 'job'))
+    assert len(os.listdir(cache_root)) == 1
+
+    OutputCache(cache_root, max_memory_bytes=0, max_disk_bytes=100, max_memory_file_size=0)
+    assert len(os.listdir(cache_root)) == 0
+
+
+def test_download(tmpdir, cache_root):
+    cache = OutputCache(cache_root, max_memory_bytes=100, max_disk_bytes=100, max_memory_file_size=10)
+    working_directory = path.join(str(tmpdir), 'job')
+    write_file(path.join(working_directory, OUTPUT_DIR, 'small'), b'small')
+    write_file(path.join(working_directory, OUTPUT_DIR, 'large'), b'0123456789' * 2)
+    cache.add_job('job', working_directory)
+
+    download = cache.download('job', OUTPUT_DIR + '/small')
+    assert download.status == 200
+    assert download.stream.read() == b'small'
+    download.stream.close()
+
+    download = cache.download('job', OUTPUT_DIR + '/large')
+    assert download.status == 200
+    assert download.stream is None  # sent with sendfile
+    with open(download.path, 'rb') as file:
+        assert file.read() == b'0123456789' * 2
+
+    for object_name in ('small', 'large'):
+        etag = cache.download('job', OUTPUT_DIR + '/' + object_name).headers['ETag']
+
+        download = cache.download('job', OUTPUT_DIR + '/' + object_name, {'If-None-Match': etag})
+        assert download.status == 304
+        assert download.stream is None
+
+    download = cache.download('job', OUTPUT_DIR + '/large', {'Range': 'bytes=5-14'})
+    assert download.status == 206
+    assert download.headers['Content-Range'] == 'bytes 5-14/20'
+    assert download.stream.read() == b'5678901234'
+    download.stream.close()
+
+    assert cache.download('job', OUTPUT_DIR + '/missing') is None
@@ -0,0 +1,62 @@
+import io
+import os
+import os.path as path
+import tarfile
+
+import pytest
+
+from shepherd.errors.api import StorageError
+from shepherd.utils.archive import create_archive, extract_archive
+
+
+@pytest.fixture()
+def source_directory(tmpdir):
+    source = path.join(str(tmpdir), 'source')
+    os.makedirs(path.join(source, 'nested'))
+
+    for name, content in (('a.json', b'{"a": 1}'), (path.join('nested', 'b.bin'), b'\x00\x01')):
+        with open(path.join(source, name), 'wb') as file:
+            file.write(content)
+
+    yield source
+
+
+@pytest.mark.parametrize('archive_name', ['archive.tar', 'archive.tar.zst'])
+def test_archive_roundtrip(tmpdir, source_directory, archive_name):
+    if archive_name.endswith('.zst'):
+        pytest.importorskip('zstandard')
+
+    archive_path = path.join(str(tmpdir), archive_name)
+    target = path.join(str(tmpdir), 'target')
+
+    assert create_archive(source_directory, archive_path) == 2
+    assert extract_archive(archive_path, target) == 2
+
+    with open(path.join(target, 'a.json'), 'rb') as file:
+        assert file.read() == b'{"a": 1}'
+    with open(path.join(target, 'nested', 'b.bin'), 'rb') as file:
+        assert file.read() == b'\x00\x01'
+
+
+def test_extract_path_traversal(tmpdir):
+    archive_path = path.join(str(tmpdir), 'evil.tar')
+
+    with tarfile.open(archive_path, 'w') as archive:
+        info = tarfile.TarInfo('../evil')
+        info.size = 4
+        archive.addfile(info, io.BytesIO(b'evil'))
+
+    with pytest.raises(StorageError):
+        extract_archive(archive_path, path.join(str(tmpdir), 'target'))
+
+    assert not path.exists(path.join(str(tmpdir), 'evil'))
+
+
+def test_extract_invalid_archive(tmpdir):
+    archive_path = path.join(str(tmpdir), 'invalid.tar')
+
+    with open(archive_path, 'wb') as file:
+        file.write(b'definitely not a tar archive')
+
+    with pytest.raises(StorageError):
+        extract_archive(archive_path, path.join(str(tmpdir), 'target'))
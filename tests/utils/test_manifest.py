@@ -0,0 +1,47 @@
+import hashlib
+import os
+import os.path as path
+
+import pytest
+
+from shepherd.comm.messages import ManifestEntry
+from shepherd.errors.api import OutputManifestError
+from shepherd.utils.manifest import build_manifest, verify_manifest
+
+
+@pytest.fixture()
+def output_directory(tmpdir):
+    outputs = str(tmpdir)
+    os.makedirs(path.join(outputs, 'nested'))
+
+    for name, content in (('a.json', b'{"a": 1}'), (path.join('nested', 'b.bin'), b'\x00\x01')):
+        with open(path.join(outputs, name), 'wb') as file:
+            file.write(content)
+
+    yield outputs
+
+
+def test_build_manifest(output_directory):
+    manifest = build_manifest(output_directory)
+    assert [(entry.path, entry.size, entry.md5) for entry in manifest] == \
+        [('a.json', 8, None), ('nested/b.bin', 2, None)]
+
+    manifest = build_manifest(output_directory, hashes=True)
+    assert [entry.md5 for entry in manifest] == \
+        [hashlib.md5(b'{"a": 1}').hexdigest(), hashlib.md5(b'\x00\x01').hexdigest()]
+
+
+def test_verify_manifest(output_directory):
+    manifest = build_manifest(output_directory)
+    verify_manifest(output_directory, manifest)
+
+    with open(path.join(output_directory, 'a.json'), 'ab') as file:
+        file.write(b' ')
+    with pytest.raises(OutputManifestError, match='a.json'):
+        verify_manifest(output_directory, manifest)
+
+    with pytest.raises(OutputManifestError, match='missing'):
+        verify_manifest(output_directory, [ManifestEntry(dict(path='missing.json', size=1))])
+
+    with pytest.raises(OutputManifestError, match='outside'):
+        verify_manifest(output_directory, [ManifestEntry(dict(path='../escape', size=1))])
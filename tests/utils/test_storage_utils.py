@@ -6,9 +6,11 @@ import io
 from minio import Minio
 
 from shepherd.config import StorageConfig
-from shepherd.constants import INPUT_DIR, OUTPUT_DIR
+from shepherd.constants import INPUT_DIR, OUTPUT_DIR, INPUT_ARCHIVE, OUTPUT_ARCHIVE
 from shepherd.storage import MinioStorage
 from shepherd.utils import *
+from shepherd.utils.archive import create_archive
+from shepherd.utils.manifest import build_manifest
 from shepherd.errors.api import StorageError, StorageInaccessibleError, UnknownJobError
 
 
@@ -79,6 +81,21 @@ async def test_minio_push(storage: MinioStorage, minio: Minio, bucket, job_dir):
     assert not minio_object_exists(minio, bucket, 'another/file.txt')
 
 
+async def test_minio_push_with_manifest(storage: MinioStorage, minio: Minio, bucket, job_dir, mocker):
+    outputs_dir = create_clean_dir(path.join(job_dir, OUTPUT_DIR))
+    with open(path.join(outputs_dir, 'file.txt'), 'w') as file:
+        file.write('content')
+
+    manifest = build_manifest(outputs_dir, hashes=True)
+    await storage.push_job_data(bucket, job_dir, manifest)
+    assert minio_object_exists(minio, bucket, OUTPUT_DIR + '/file.txt')
+
+    # the unchanged file is not uploaded again
+    upload = mocker.spy(storage, '_upload_object')
+    await storage.push_job_data(bucket, job_dir, manifest)
+    assert upload.call_count == 0
+
+
 async def test_minio_push_empty(storage: MinioStorage, bucket, job_dir, caplog, minio):
     # test warning
     await storage.push_job_data(bucket, job_dir)
@@ -135,3 +152,28 @@ async def test_minio_accessibility_negative(storage_config_inaccessible, minio):
 async def test_nonexistent_job_done(storage: MinioStorage, minio):
     with pytest.raises(UnknownJobError):
         await storage.get_job_status("whatever-i-dont-exist")
+
+
+async def test_minio_pull_packed(storage: MinioStorage, minio: Minio, bucket, job_dir, tmpdir):
+    source_dir = create_clean_dir(path.join(tmpdir, 'packed-source'))
+    with open(path.join(source_dir, 'file.dat'), 'w') as file:
+        file.write('packed data')
+
+    archive_path = path.join(tmpdir, INPUT_ARCHIVE)
+    create_archive(source_dir, archive_path)
+    minio.fput_object(bucket, INPUT_ARCHIVE, archive_path)
+
+    await storage.pull_job_data(bucket, job_dir)
+    with open(path.join(job_dir, INPUT_DIR, 'file.dat')) as file:
+        assert file.read() == 'packed data'
+    assert not path.exists(path.join(job_dir, INPUT_ARCHIVE))
+
+    # outputs of a job with packed inputs are packed as well
+    outputs_dir = create_clean_dir(path.join(job_dir, OUTPUT_DIR))
+    with open(path.join(outputs_dir, 'file.txt'), 'w') as file:
+        file.write('output')
+
+    await storage.push_job_data(bucket, job_dir)
+    minio_objects = [obj.object_name for obj in minio.list_objects_v2(bucket, recursive=True)]
+    assert OUTPUT_ARCHIVE in minio_objects
+    assert OUTPUT_DIR + '/file.txt' not in minio_objects